@@ -1,22 +1,58 @@
 from flask import Flask
 from flask_cors import CORS 
 from flask_jwt_extended import JWTManager
+import atexit
 import os
+import threading
 
 # --- Importaciones de Blueprints ---
 from src.routes.personaController import persona_bp
 from src.services.auth import auth_bp
-from src.routes.retosController import retos_bp 
+from src.routes.retosController import retos_bp, load_submission_events
 from src.routes.publicacionController import publicacion_bp # <-- 1. IMPORTAR
+from src.routes.monitorController import monitor_bp
+from src.database import session as db_session
+from src.models.personaModels.personaModel import PersonaModel
+from src.models.catalogoModels.catalogoModel import CatalogoModel
+from src.models.retosModels.retosModel import RetosModel
+from src.models.interaccionSocialModels.publicacionModel import PublicacionModel
+from src.services.searchIndex import search_index
+from src.services.rankingIndex import ranking_index
+from src.services.submissionEvents import submission_events, make_event
+from src.services.reactionCounters import reaction_counters
 
 os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
 
+# JUDGE_EMBEDDED=1: el juez corre dentro de este proceso y publica cada veredicto
+# al instante a los clientes conectados (si no, se detecta por sondeo a la BD)
+JUDGE_EMBEDDED = os.environ.get('JUDGE_EMBEDDED', '0') == '1'
+JUDGE_EMBEDDED_WORKERS = int(os.environ.get('JUDGE_EMBEDDED_WORKERS', 2))
+
+
+def _publish_verdict(id_respuesta, result):
+    submission_events.publish(id_respuesta, make_event(
+        id_respuesta, result['estado'], result['puntaje'], result['tiempo_ejecucion_ms'],
+        motivo=result.get('motivo')))
+
+
+def _start_embedded_judge():
+    from src.judge.engine import JudgeEngine
+    engine = JudgeEngine(workers=JUDGE_EMBEDDED_WORKERS, on_verdict=_publish_verdict, update_local_caches=True)
+    engine.start()
+    threading.Thread(target=engine.run_forever, name='juez-embebido', daemon=True).start()
+    return engine
+
+
 def create_app():
     app = Flask(__name__)
-    CORS(app)
+    # X-Next-Cursor: cursor de la página siguiente en los listados paginados
+    CORS(app, expose_headers=['X-Next-Cursor'])
     
     app.config["JWT_SECRET_KEY"] = os.environ.get('JWT_SECRET_KEY', 'clave_sh') 
     jwt = JWTManager(app)
+
+    # Una conexión y una transacción por petición (unidad de trabajo)
+    db_session.init_app(app)
     
     # ==========================================
     # Registrar Blueprints (Rutas)
@@ -25,7 +61,37 @@ def create_app():
     app.register_blueprint(auth_bp, url_prefix='/api')
     app.register_blueprint(retos_bp, url_prefix='/api/retos') 
     app.register_blueprint(publicacion_bp, url_prefix='/api/publicaciones')
+    app.register_blueprint(monitor_bp, url_prefix='/api')
     # ==========================================
+
+    # Índices en memoria: se precargan al arrancar (si la BD no responde,
+    # se cargan en la primera petición que los necesite)
+    try:
+        ranking_index.ensure_loaded(PersonaModel.get_ranking_snapshot, PersonaModel.get_ranking_rows)
+    except Exception as e:
+        print(f"No se pudo precargar el índice de ranking: {e}")
+    try:
+        CatalogoModel.registry()
+    except Exception as e:
+        print(f"No se pudo precargar el registro de catálogos: {e}")
+    try:
+        search_index.ensure_loaded(RetosModel.get_retos_for_search, RetosModel.count_retos)
+        atexit.register(search_index.save)
+    except Exception as e:
+        print(f"No se pudo precargar el índice de búsqueda: {e}")
+
+    # Contadores de reacciones con escritura diferida: lo pendiente se
+    # escribe también al apagar el proceso
+    reaction_counters.configure(PublicacionModel.apply_reaction_deltas, PublicacionModel.reaction_reconciler())
+    atexit.register(reaction_counters.flush)
+
+    # Veredictos para GET /api/retos/submissions/<id>/events
+    submission_events.set_status_loader(load_submission_events)
+    if JUDGE_EMBEDDED:
+        try:
+            app.extensions['judge_engine'] = _start_embedded_judge()
+        except Exception as e:
+            print(f"No se pudo iniciar el juez embebido: {e}")
     
     return app
 
@@ -0,0 +1,49 @@
+'''
+Importación masiva de retos desde un paquete (ver src/services/retoImporter.py).
+
+    python import_retos.py paquete.jsonl              # un reto por línea
+    python import_retos.py paquete.zip                # carpetas con reto.json y tests/*.in|*.out
+    python import_retos.py paquete.tar.gz --dry-run   # sólo valida
+    python import_retos.py paquete.jsonl.gz --batch-size 100
+'''
+import argparse
+import json
+import threading
+
+from src.services.retoImporter import RetoImporter, IMPORT_BATCH_SIZE, IMPORT_BATCH_BYTES
+
+
+def _report_periodically(importer, interval, stop):
+    while not stop.wait(interval):
+        progreso = importer.progress()
+        print(f"[import] {progreso['leidos']} leídos, {progreso['importados']} importados, "
+              f"{progreso['invalidos']} inválidos, {progreso.get('retos_por_segundo', 0)} retos/s, "
+              f"{progreso.get('mb_por_segundo', 0)} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importar retos a Codium")
+    parser.add_argument('paquete', help="Archivo JSONL (o .gz), .zip o .tar(.gz)")
+    parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help="Retos por transacción")
+    parser.add_argument('--batch-bytes', type=int, default=IMPORT_BATCH_BYTES,
+                        help="Bytes de tests a partir de los cuales se confirma el lote")
+    parser.add_argument('--dry-run', action='store_true', help="Validar el paquete sin insertar")
+    parser.add_argument('--report-interval', type=float, default=5, help="Segundos entre reportes de avance")
+    args = parser.parse_args()
+
+    importer = RetoImporter(args.paquete, batch_size=args.batch_size, batch_bytes=args.batch_bytes,
+                            dry_run=args.dry_run)
+    stop_report = threading.Event()
+    threading.Thread(target=_report_periodically, args=(importer, args.report_interval, stop_report),
+                     daemon=True).start()
+    try:
+        importer.run()
+    except KeyboardInterrupt:
+        importer.cancel()
+    finally:
+        stop_report.set()
+        print(f"[import] {json.dumps(importer.progress(), ensure_ascii=False, indent=2)}")
+
+
+if __name__ == '__main__':
+    main()
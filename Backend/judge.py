@@ -0,0 +1,74 @@
+'''
+Proceso del Juez de Codium: evalúa las respuestas 'Pendiente'.
+
+    python judge.py                # se queda escuchando nuevas respuestas
+    python judge.py --once         # evalúa lo pendiente y termina
+    python judge.py --workers 8    # número de procesos evaluadores
+    python judge.py --rejudge 12   # re-evalúa todas las respuestas del reto 12
+'''
+import argparse
+import json
+import threading
+import time
+
+from src.judge.engine import JudgeEngine, JUDGE_WORKERS
+from src.judge.rejudge import Rejudger, JUDGE_REJUDGE_WORKERS
+
+
+def _report_periodically(engine, interval, stop):
+    while not stop.wait(interval):
+        if isinstance(engine, Rejudger):
+            print(f"[rejudge] {json.dumps(engine.progress(), ensure_ascii=False)}")
+        else:
+            print(f"[juez] {json.dumps(engine.stats.snapshot(), ensure_ascii=False)}")
+
+
+def _rejudge(args):
+    rejudger = Rejudger(args.rejudge, workers=args.workers or JUDGE_REJUDGE_WORKERS)
+    stop_report = threading.Event()
+    threading.Thread(target=_report_periodically, args=(rejudger, args.report_interval, stop_report),
+                     daemon=True).start()
+    try:
+        rejudger.run()
+    except KeyboardInterrupt:
+        rejudger.cancel()
+    finally:
+        stop_report.set()
+        print(f"[rejudge] {json.dumps(rejudger.progress(), ensure_ascii=False)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Juez de Codium")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos evaluadores")
+    parser.add_argument('--once', action='store_true', help="Evaluar lo pendiente y terminar")
+    parser.add_argument('--report-interval', type=float, default=60, help="Segundos entre reportes de throughput")
+    parser.add_argument('--rejudge', type=int, metavar='ID_RETO',
+                        help="Re-evaluar todas las respuestas de un reto y terminar")
+    args = parser.parse_args()
+
+    if args.rejudge is not None:
+        _rejudge(args)
+        return
+
+    engine = JudgeEngine(workers=args.workers or JUDGE_WORKERS)
+    stop_report = threading.Event()
+    threading.Thread(target=_report_periodically, args=(engine, args.report_interval, stop_report),
+                     daemon=True).start()
+
+    start = time.monotonic()
+    try:
+        if args.once:
+            engine.drain()
+        else:
+            engine.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_report.set()
+        engine.stop()
+        print(f"[juez] Finalizado en {time.monotonic() - start:.1f}s: "
+              f"{json.dumps(engine.stats.snapshot(), ensure_ascii=False)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+'''
+Mueve a blobs en disco (src/services/testBlobStore.py) las entradas y salidas
+de TEST que siguen guardadas en la fila, y limpia los blobs sin referencias.
+
+    python migrate_test_blobs.py                    # tests con datos >= TEST_BLOB_MIN_BYTES
+    python migrate_test_blobs.py --min-bytes 1024   # umbral propio
+    python migrate_test_blobs.py --dry-run          # sólo cuenta lo que migraría
+    python migrate_test_blobs.py --gc               # elimina blobs que ningún TEST usa
+
+Se puede ejecutar con la API y el juez en marcha: cada lote es una
+transacción y los blobs se escriben antes de actualizar las filas.
+'''
+import argparse
+import json
+import time
+
+from src.models.retosModels.retosModel import RetosModel
+from src.services.testBlobStore import test_blob_store, TEST_BLOB_MIN_BYTES
+
+
+def _migrate(args):
+    progreso = {'tests': 0, 'blobs': 0, 'bytes_en_filas': 0, 'lotes': 0}
+    start = time.monotonic()
+    after_id = 0
+    while True:
+        filas = RetosModel.get_tests_for_blob_migration(after_id, args.batch_size, args.min_bytes)
+        if not filas:
+            break
+        after_id = filas[-1]['id_test']
+
+        cambios = []
+        for fila in filas:
+            hashes = []
+            for campo in ('datos_entrada', 'salida_esperada'):
+                texto = fila[campo]
+                if texto is None:
+                    hashes.append(None)
+                    continue
+                progreso['bytes_en_filas'] += len(texto.encode('utf-8'))
+                progreso['blobs'] += 1
+                hashes.append(None if args.dry_run else test_blob_store.put_if_large(texto, args.min_bytes))
+            cambios.append((fila['id_test'], fila['id_reto'], *hashes))
+
+        if not args.dry_run:
+            RetosModel.set_test_blobs(cambios)
+        progreso['tests'] += len(cambios)
+        progreso['lotes'] += 1
+        elapsed = max(time.monotonic() - start, 1e-6)
+        print(f"[blobs] {progreso['tests']} tests, {progreso['bytes_en_filas'] / 1024 / 1024:.1f} MB "
+              f"({progreso['bytes_en_filas'] / 1024 / 1024 / elapsed:.1f} MB/s)")
+
+    progreso['segundos'] = round(time.monotonic() - start, 1)
+    progreso['dry_run'] = args.dry_run
+    progreso['almacen'] = test_blob_store.stats()
+    print(f"[blobs] {json.dumps(progreso, ensure_ascii=False, indent=2)}")
+
+
+def _gc(args):
+    referenciados = RetosModel.get_referenced_blob_hashes()
+    eliminados, liberados = test_blob_store.gc(referenciados, grace_seconds=args.grace_seconds)
+    print(f"[blobs] {len(referenciados)} blobs en uso; eliminados {eliminados} sin referencias "
+          f"({liberados / 1024 / 1024:.1f} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migración de TEST a blobs en disco")
+    parser.add_argument('--min-bytes', type=int, default=TEST_BLOB_MIN_BYTES,
+                        help="Tamaño mínimo de una entrada/salida para moverla a un blob")
+    parser.add_argument('--batch-size', type=int, default=20, help="Tests por transacción")
+    parser.add_argument('--dry-run', action='store_true', help="Contar sin escribir blobs ni filas")
+    parser.add_argument('--gc', action='store_true', help="Eliminar blobs que ningún TEST referencia")
+    parser.add_argument('--grace-seconds', type=float, default=3600,
+                        help="Con --gc, conservar los blobs más nuevos que esto")
+    args = parser.parse_args()
+
+    if args.gc:
+        _gc(args)
+    else:
+        _migrate(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,9 @@
+# Backend/src/cache/identityCache.py
+import os
+from .lruCache import LRUCache
+
+# id_persona -> datos públicos de la persona (resultado de get_persona_by_id)
+identity_cache = LRUCache(
+    maxsize=int(os.environ.get('IDENTITY_CACHE_SIZE', 10000)),
+    ttl=int(os.environ.get('IDENTITY_CACHE_TTL', 60)),
+)
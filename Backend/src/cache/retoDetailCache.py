@@ -0,0 +1,11 @@
+# Backend/src/cache/retoDetailCache.py
+import os
+from .lruCache import LRUCache
+
+# id_reto -> (cuerpo JSON ya serializado de GET /api/retos/<id>, ETag)
+# El contenido de un reto no cambia tras crearlo; si se editan sus tests,
+# RetosModel._bump_tests_version invalida la entrada (en otros procesos vence por TTL).
+reto_detail_cache = LRUCache(
+    maxsize=int(os.environ.get('RETO_DETAIL_CACHE_SIZE', 2000)),
+    ttl=int(os.environ.get('RETO_DETAIL_CACHE_TTL', 300)),
+)
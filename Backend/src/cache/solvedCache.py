@@ -0,0 +1,11 @@
+# Backend/src/cache/solvedCache.py
+import os
+from .lruCache import LRUCache
+
+# id_persona -> frozenset(id_reto) de los retos que la persona ya resolvió
+# (filtro 'resuelto' del listado de retos). Se invalida al cambiar
+# num_retos_resueltos; en otros procesos vence por TTL.
+solved_cache = LRUCache(
+    maxsize=int(os.environ.get('SOLVED_CACHE_SIZE', 10000)),
+    ttl=int(os.environ.get('SOLVED_CACHE_TTL', 60)),
+)
@@ -0,0 +1,90 @@
+# Backend/src/cache/testSetCache.py
+import os
+import threading
+from collections import OrderedDict
+
+
+class TestSetCache:
+    """
+    Casos de prueba de cada reto para el juez: id_reto -> (version_tests, tests).
+
+    La versión viene de RETO.version_tests (se lee al reclamar la respuesta):
+    si no coincide con la guardada, el conjunto se vuelve a cargar. Así una
+    edición de los tests invalida la caché de todos los jueces, estén en el
+    proceso que sea. Acotada por número de retos y por bytes (LRU).
+    """
+
+    def __init__(self, maxsize=1000, max_bytes=256 * 1024 * 1024):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # id_reto -> (version, tests, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._stale = 0
+        self._evictions = 0
+
+    def get(self, id_reto, version, loader):
+        """ Devuelve los tests de la versión pedida, usando loader(id_reto) si no están. """
+        with self._lock:
+            item = self._data.get(id_reto)
+            if item is not None and item[0] == version:
+                self._data.move_to_end(id_reto)
+                self._hits += 1
+                return item[1]
+            self._misses += 1
+            if item is not None:
+                self._stale += 1
+
+        tests = tuple(loader(id_reto))
+        self.set(id_reto, version, tests)
+        return tests
+
+    def set(self, id_reto, version, tests):
+        size = sum(len(t.get('datos_entrada') or '') + len(t.get('salida_esperada') or '') + 64 for t in tests)
+        with self._lock:
+            previous = self._data.pop(id_reto, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            if size > self.max_bytes:
+                return
+            self._data[id_reto] = (version, tests, size)
+            self._bytes += size
+            while len(self._data) > self.maxsize or self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+
+    def invalidate(self, id_reto):
+        with self._lock:
+            item = self._data.pop(id_reto, None)
+            if item is not None:
+                self._bytes -= item[2]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'stale': self._stale,
+                'evictions': self._evictions,
+            }
+
+
+# id_reto -> casos de prueba (públicos y privados) usados por el juez
+test_set_cache = TestSetCache(
+    maxsize=int(os.environ.get('JUDGE_TEST_CACHE_SIZE', 1000)),
+    max_bytes=int(os.environ.get('JUDGE_TEST_CACHE_MAX_MB', 256)) * 1024 * 1024,
+)
@@ -0,0 +1,62 @@
+# Backend/src/cache/verdictCache.py
+import hashlib
+import os
+import threading
+from .lruCache import LRUCache
+
+
+def source_hash(codigo_fuente):
+    """
+    Hash del código normalizado: mismos bytes salvo finales de línea (CRLF/LF)
+    y espacio en blanco al final del archivo, que no cambian el programa. El
+    del inicio sí se conserva: en Python la indentación es parte del programa.
+    """
+    normalizado = codigo_fuente.replace('\r\n', '\n').rstrip()
+    return hashlib.sha256(normalizado.encode('utf-8')).hexdigest()
+
+
+class VerdictDedup:
+    """
+    Veredictos ya calculados por (hash del código, id_reto, id_lenguaje,
+    version_tests), para resolver al instante los reenvíos idénticos.
+
+    Delante de la consulta a RESPUESTA (ver RespuestaModel.create_submission)
+    hay una caché LRU en memoria; un veredicto no cambia mientras no cambie
+    la versión de los tests, que forma parte de la clave.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._stats = {'submissions': 0, 'deduplicated': 0, 'from_memory': 0, 'from_db': 0}
+
+    def lookup(self, key, loader):
+        """ Veredicto previo para `key` (o None), usando loader() si no está en memoria. """
+        verdict = self.cache.get(key)
+        source = 'from_memory'
+        if verdict is None:
+            verdict = loader()
+            source = 'from_db'
+            if verdict is not None:
+                self.cache.set(key, verdict)
+
+        with self._lock:
+            self._stats['submissions'] += 1
+            if verdict is not None:
+                self._stats['deduplicated'] += 1
+                self._stats[source] += 1
+        return verdict
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['dedup_rate'] = round(stats['deduplicated'] / stats['submissions'], 4) if stats['submissions'] else 0.0
+        stats['cache'] = self.cache.stats()
+        return stats
+
+
+# (hash, id_reto, id_lenguaje, version_tests) -> {id_estado, puntaje, tiempo_ejecucion_ms}
+verdict_dedup = VerdictDedup(
+    maxsize=int(os.environ.get('VERDICT_CACHE_SIZE', 10000)),
+    ttl=int(os.environ.get('VERDICT_CACHE_TTL', 600)),
+)
@@ -1,4 +1,8 @@
+import os
 import mysql.connector
+from flask import has_app_context
+from .pool import ConnectionPool, PoolTimeoutError
+from .session import get_session_connection, call_on_commit, release_session
 
 
 DB_CONFIG = {
@@ -9,10 +13,60 @@ DB_CONFIG = {
      'port': 3306
 }
 
+# Parámetros del pool (configurables por variables de entorno)
+POOL_CONFIG = {
+    'size': int(os.environ.get('DB_POOL_SIZE', 10)),
+    'max_overflow': int(os.environ.get('DB_POOL_MAX_OVERFLOW', 10)),
+    'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 5)),
+    'recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+    'ping_interval': int(os.environ.get('DB_POOL_PING_INTERVAL', 30)),
+}
+
+# consume_results: una conexión compartida nunca debe quedar con resultados sin leer
+_pool = ConnectionPool({**DB_CONFIG, 'consume_results': True}, **POOL_CONFIG)
+
+
 def get_db_connection():
+    """
+    Presta una conexión del pool. Los modelos la usan igual que antes:
+    conn.close() la devuelve al pool en lugar de cerrar el socket.
+
+    Dentro de un contexto de Flask se devuelve la conexión de la sesión
+    de la petición, compartida por todos los modelos (ver session.py).
+    """
+    if has_app_context():
+        return get_session_connection(_checkout)
+    return _checkout()
+
+
+def on_commit(callback):
+    """
+    Difiere efectos secundarios (cachés, índices en memoria) hasta que
+    la transacción de la petición se confirme.
+    """
+    if has_app_context():
+        call_on_commit(callback)
+    else:
+        callback()
+
+
+def release_connection():
+    """ Devuelve ya al pool la conexión de la petición actual (ver session.release_session). """
+    if has_app_context():
+        release_session()
+
+
+def _checkout():
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
+        return _pool.checkout()
+    except PoolTimeoutError as err:
+        print(f"Pool de conexiones agotado: {err}")
+        return None
     except mysql.connector.Error as err:
         print(f"Error al conectar a MySQL: {err}")
-        return None
\ No newline at end of file
+        return None
+
+
+def get_pool_stats():
+    """ Métricas del pool para monitoreo (en uso, en espera, tiempos de espera). """
+    return _pool.stats()
@@ -0,0 +1,236 @@
+# Backend/src/database/pool.py
+import os
+import threading
+import time
+from collections import deque
+
+import mysql.connector
+
+
+class PoolTimeoutError(Exception):
+    """ No se obtuvo una conexión libre dentro del tiempo de espera configurado. """
+    pass
+
+
+class _PoolEntry:
+    """ Conexión física junto con sus marcas de tiempo (creación y último uso). """
+
+    __slots__ = ('raw', 'created_at', 'last_used')
+
+    def __init__(self, raw):
+        now = time.monotonic()
+        self.raw = raw
+        self.created_at = now
+        self.last_used = now
+
+
+class PooledConnection:
+    """
+    Envoltorio de una conexión prestada por el pool.
+    Se comporta como la conexión de mysql.connector, pero close()
+    la devuelve al pool en lugar de cerrar el socket.
+    """
+
+    def __init__(self, pool, entry):
+        self._pool = pool
+        self._entry = entry
+
+    def __getattr__(self, name):
+        entry = self.__dict__.get('_entry')
+        if entry is None:
+            raise AttributeError(f"Conexión ya devuelta al pool (atributo '{name}')")
+        return getattr(entry.raw, name)
+
+    def close(self):
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._pool.release(entry)
+
+    def invalidate(self):
+        """ Descarta la conexión física (ej. tras un error de red). """
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._pool.release(entry, discard=True)
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones MySQL con tamaño fijo + desborde (overflow),
+    tiempo máximo de espera, ping de salud al prestar y reciclaje
+    de conexiones por tiempo de vida.
+    """
+
+    def __init__(self, connect_kwargs, size=10, max_overflow=10, timeout=5.0,
+                 recycle=1800, ping_interval=30):
+        self._connect_kwargs = connect_kwargs
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_interval = ping_interval
+
+        self._cond = threading.Condition()
+        self._reset_state()
+
+    def _reset_state(self):
+        self._pid = os.getpid()
+        self._idle = deque()
+        self._total = 0
+        self._in_use = 0
+        self._waiters = 0
+        self._stats = {
+            'checkouts': 0,
+            'timeouts': 0,
+            'created': 0,
+            'recycled': 0,
+            'invalidated': 0,
+            'wait_time_total_ms': 0.0,
+            'wait_time_max_ms': 0.0,
+        }
+
+    # -----------------------------------------------------------------
+    # Préstamo / devolución
+    # -----------------------------------------------------------------
+    def checkout(self):
+        start = time.monotonic()
+        deadline = start + self.timeout
+        entry = None
+
+        with self._cond:
+            # Tras un fork (ej. workers de gunicorn) los sockets heredados no son válidos
+            if self._pid != os.getpid():
+                self._reset_state()
+
+            self._waiters += 1
+            try:
+                while True:
+                    if self._idle:
+                        # LIFO: reutilizamos la conexión más "caliente"
+                        entry = self._idle.pop()
+                        break
+                    if self._total < self.size + self.max_overflow:
+                        # Reservamos el cupo; la conexión se abre fuera del lock
+                        self._total += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeoutError(
+                            f"Tiempo de espera agotado ({self.timeout}s) esperando una conexión libre"
+                        )
+                    self._cond.wait(remaining)
+            finally:
+                self._waiters -= 1
+
+            self._in_use += 1
+            waited_ms = (time.monotonic() - start) * 1000
+            self._stats['checkouts'] += 1
+            self._stats['wait_time_total_ms'] += waited_ms
+            self._stats['wait_time_max_ms'] = max(self._stats['wait_time_max_ms'], waited_ms)
+
+        try:
+            if entry is None:
+                entry = self._open()
+            else:
+                entry = self._validate(entry)
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+        return PooledConnection(self, entry)
+
+    def release(self, entry, discard=False):
+        if not discard:
+            try:
+                # Nunca devolvemos al pool una transacción a medias
+                if entry.raw.in_transaction:
+                    entry.raw.rollback()
+            except Exception:
+                discard = True
+
+        close_raw = False
+        with self._cond:
+            self._in_use -= 1
+            if discard or len(self._idle) >= self.size:
+                # Conexión inválida o de desborde: se cierra en vez de guardarla
+                self._total -= 1
+                close_raw = True
+                if discard:
+                    self._stats['invalidated'] += 1
+            else:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+            self._cond.notify()
+
+        if close_raw:
+            self._close_quietly(entry)
+
+    # -----------------------------------------------------------------
+    # Ciclo de vida de las conexiones físicas
+    # -----------------------------------------------------------------
+    def _open(self):
+        raw = mysql.connector.connect(**self._connect_kwargs)
+        with self._cond:
+            self._stats['created'] += 1
+        return _PoolEntry(raw)
+
+    def _validate(self, entry):
+        now = time.monotonic()
+
+        if self.recycle and now - entry.created_at >= self.recycle:
+            self._close_quietly(entry)
+            with self._cond:
+                self._stats['recycled'] += 1
+            return self._open()
+
+        if now - entry.last_used >= self.ping_interval:
+            try:
+                entry.raw.ping(reconnect=False)
+            except mysql.connector.Error:
+                self._close_quietly(entry)
+                with self._cond:
+                    self._stats['invalidated'] += 1
+                return self._open()
+
+        return entry
+
+    @staticmethod
+    def _close_quietly(entry):
+        try:
+            entry.raw.close()
+        except Exception:
+            pass
+
+    def dispose(self):
+        """ Cierra todas las conexiones ociosas (ej. al apagar la aplicación). """
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._total -= len(idle)
+        for entry in idle:
+            self._close_quietly(entry)
+
+    # -----------------------------------------------------------------
+    # Monitoreo
+    # -----------------------------------------------------------------
+    def stats(self):
+        with self._cond:
+            checkouts = self._stats['checkouts']
+            return {
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'open': self._total,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'waiters': self._waiters,
+                'checkouts': checkouts,
+                'timeouts': self._stats['timeouts'],
+                'created': self._stats['created'],
+                'recycled': self._stats['recycled'],
+                'invalidated': self._stats['invalidated'],
+                'wait_time_avg_ms': round(self._stats['wait_time_total_ms'] / checkouts, 3) if checkouts else 0.0,
+                'wait_time_max_ms': round(self._stats['wait_time_max_ms'], 3),
+            }
@@ -0,0 +1,164 @@
+# Backend/src/database/session.py
+from flask import g, jsonify
+
+
+class RequestSession:
+    """
+    Unidad de trabajo ligada al contexto de Flask.
+
+    Todos los modelos llamados durante una misma petición comparten una
+    sola conexión del pool y una sola transacción. Los conn.commit() de
+    los modelos se difieren y la transacción se confirma (o revierte)
+    una única vez al terminar la petición.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.rollback_only = False
+        self.finished = False
+        self._after_commit = []
+
+    def connection(self):
+        return _SessionConnection(self)
+
+    def after_commit(self, callback):
+        """ Registra una acción a ejecutar sólo si la transacción se confirma. """
+        self._after_commit.append(callback)
+
+    def commit(self):
+        if self.finished:
+            return
+        self.finished = True
+        if self.rollback_only:
+            self._conn.rollback()
+            return
+        self._conn.commit()
+
+        for callback in self._after_commit:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error en acción posterior al commit: {e}")
+
+    def rollback(self):
+        if self.finished:
+            return
+        self.finished = True
+        self._conn.rollback()
+
+    def close(self):
+        # PooledConnection.close() revierte lo pendiente y devuelve la conexión al pool
+        self._conn.close()
+
+
+class _SessionConnection:
+    """
+    Vista de la conexión de la sesión que reciben los modelos.
+    commit() y close() se difieren al cierre de la petición; rollback()
+    revierte de inmediato y marca toda la unidad de trabajo como fallida.
+    """
+
+    def __init__(self, session):
+        self._session = session
+
+    def __getattr__(self, name):
+        return getattr(self._session._conn, name)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self._session.rollback_only = True
+        self._session._conn.rollback()
+
+    def start_transaction(self, *args, **kwargs):
+        # La sesión ya puede tener una transacción abierta por una lectura previa
+        if not self._session._conn.in_transaction:
+            self._session._conn.start_transaction(*args, **kwargs)
+
+    def close(self):
+        pass
+
+
+def get_session_connection(checkout):
+    """
+    Devuelve la conexión de la sesión actual, creándola con `checkout`
+    la primera vez que un modelo la pide dentro del contexto.
+    """
+    session = g.get('_db_session')
+    if session is None:
+        conn = checkout()
+        if conn is None:
+            return None
+        session = RequestSession(conn)
+        g._db_session = session
+    return session.connection()
+
+
+def call_on_commit(callback):
+    """
+    Ejecuta `callback` cuando se confirme la transacción de la sesión
+    actual. Sin sesión abierta el modelo ya hizo commit: se ejecuta ya.
+    """
+    session = g.get('_db_session')
+    if session is None or session.finished:
+        callback()
+    else:
+        session.after_commit(callback)
+
+
+def release_session():
+    """
+    Cierra ya la unidad de trabajo de la petición: confirma lo pendiente y
+    devuelve la conexión al pool. Para peticiones que después esperan sin
+    usar la BD (long-poll, SSE) y no deben retener una conexión mientras.
+    """
+    session = g.pop('_db_session', None)
+    if session is None:
+        return
+    try:
+        if session.rollback_only:
+            session.rollback()
+        else:
+            session.commit()
+    finally:
+        session.close()
+
+
+def init_app(app):
+    """ Registra el cierre de la unidad de trabajo en el ciclo de vida de Flask. """
+
+    @app.after_request
+    def commit_db_session(response):
+        session = g.get('_db_session')
+        if session is None or session.finished:
+            return response
+
+        if response.status_code >= 400:
+            session.rollback()
+            return response
+
+        try:
+            session.commit()
+        except Exception as e:
+            print(f"Error al confirmar la transacción de la petición: {e}")
+            error_response = jsonify({"error": "Error interno del servidor"})
+            error_response.status_code = 500
+            return error_response
+        return response
+
+    @app.teardown_appcontext
+    def close_db_session(exc):
+        session = g.pop('_db_session', None)
+        if session is None:
+            return
+        try:
+            # Contextos fuera de una petición HTTP (CLI, tareas) confirman aquí
+            if exc is None:
+                session.commit()
+            else:
+                session.rollback()
+        except Exception as e:
+            print(f"Error al cerrar la sesión de base de datos: {e}")
+        finally:
+            session.close()
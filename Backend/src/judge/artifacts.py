@@ -0,0 +1,183 @@
+# Backend/src/judge/artifacts.py
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import uuid
+
+
+# Caché en disco de artefactos compilados (compartida por todos los procesos del juez del host)
+JUDGE_ARTIFACT_CACHE_DIR = os.environ.get('JUDGE_ARTIFACT_CACHE_DIR',
+                                          os.path.join(tempfile.gettempdir(), 'codium-artifacts'))
+JUDGE_ARTIFACT_CACHE_MAX_MB = int(os.environ.get('JUDGE_ARTIFACT_CACHE_MAX_MB', 512))
+
+_compiler_versions = {}
+_compiler_versions_lock = threading.Lock()
+
+
+def compiler_version(language):
+    """ Versión del compilador (salida de version_cmd), calculada una vez por proceso. """
+    with _compiler_versions_lock:
+        if language.nombre in _compiler_versions:
+            return _compiler_versions[language.nombre]
+    try:
+        proc = subprocess.run(language.version_cmd, capture_output=True, timeout=30)
+        version = (proc.stdout + proc.stderr).decode('utf-8', 'replace').strip() if proc.returncode == 0 else None
+    except (OSError, subprocess.TimeoutExpired):
+        version = None
+    with _compiler_versions_lock:
+        _compiler_versions[language.nombre] = version
+    return version
+
+
+def artifact_key(codigo_fuente, id_lenguaje, version):
+    digest = hashlib.sha256()
+    for part in (codigo_fuente, str(id_lenguaje), version):
+        digest.update(part.encode('utf-8') if isinstance(part, str) else part)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class ArtifactCache:
+    """
+    Caché direccionada por contenido de los archivos que produce la
+    compilación (ej. los .class de Java), con clave
+    (hash del código fuente, id_lenguaje, versión del compilador).
+
+    Cada entrada es un directorio <root>/<clave[:2]>/<clave>. Se escribe en
+    un directorio temporal y se publica con un rename atómico, así que
+    varios procesos pueden compartirla sin locks. El tamaño total está
+    acotado: al superarlo se eliminan las entradas usadas hace más tiempo
+    (LRU según el mtime, que se actualiza en cada acierto).
+    """
+
+    def __init__(self, root=JUDGE_ARTIFACT_CACHE_DIR, max_bytes=JUDGE_ARTIFACT_CACHE_MAX_MB * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = None   # estimación local; se recalcula al recorrer la caché
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'evicted_bytes': 0}
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _entry(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    # -----------------------------------------------------------------
+    # API pública
+    # -----------------------------------------------------------------
+    def restore(self, key, workdir):
+        """ Copia los artefactos al directorio de trabajo. True si había entrada. """
+        entry = self._entry(key)
+        try:
+            shutil.copytree(entry, workdir, dirs_exist_ok=True)
+            os.utime(entry)
+        except (FileNotFoundError, shutil.Error, OSError):
+            # No existe o se desalojó mientras se copiaba: se compila
+            self._count('misses')
+            return False
+        self._count('hits')
+        return True
+
+    def store(self, key, workdir, exclude=()):
+        """
+        Guarda los archivos generados en workdir (menos los de `exclude`).
+        Devuelve cuántas entradas se desalojaron para hacerle espacio.
+        """
+        entry = self._entry(key)
+        if os.path.isdir(entry):
+            return 0
+        staging = os.path.join(self.root, 'tmp', uuid.uuid4().hex)
+        try:
+            shutil.copytree(workdir, staging, ignore=lambda _, names: [n for n in names if n in exclude])
+            os.makedirs(os.path.dirname(entry), exist_ok=True)
+            os.rename(staging, entry)
+        except OSError as e:
+            # Otro proceso la publicó primero, o no hay espacio: la caché es opcional
+            shutil.rmtree(staging, ignore_errors=True)
+            if not os.path.isdir(entry):
+                print(f"No se pudo guardar el artefacto compilado {key}: {e}")
+            return 0
+
+        added = _dir_size(entry)
+        self._count('stores')
+        with self._lock:
+            if self._size is not None:
+                self._size += added
+            over = self._size is None or self._size > self.max_bytes
+        return self.evict() if over else 0
+
+    def evict(self):
+        """ Recorre la caché y elimina las entradas menos usadas hasta caber en max_bytes. """
+        entries = []
+        total = 0
+        try:
+            shards = os.listdir(self.root)
+        except FileNotFoundError:
+            shards = []
+        for shard in shards:
+            if shard == 'tmp':
+                continue
+            shard_path = os.path.join(self.root, shard)
+            try:
+                names = os.listdir(shard_path)
+            except OSError:
+                continue
+            for name in names:
+                path = os.path.join(shard_path, name)
+                try:
+                    mtime = os.stat(path).st_mtime
+                except OSError:
+                    continue
+                size = _dir_size(path)
+                entries.append((mtime, size, path))
+                total += size
+
+        evicted = evicted_bytes = 0
+        if total > self.max_bytes:
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                evicted += 1
+                evicted_bytes += size
+
+        with self._lock:
+            self._size = total
+            self._stats['evictions'] += evicted
+            self._stats['evicted_bytes'] += evicted_bytes
+        return evicted
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hit_rate': round(self._stats['hits'] / lookups, 4) if lookups else 0.0,
+            }
+
+
+artifact_cache = ArtifactCache()
@@ -0,0 +1,198 @@
+# Backend/src/judge/comparator.py
+import math
+import os
+import re
+
+
+# Modos de comparación (RETO.modo_comparacion)
+MODO_LINEAS = 'lineas'      # ignora espacios al final de cada línea y líneas vacías al final
+MODO_TOKENS = 'tokens'      # ignora cualquier diferencia de espacios y saltos de línea
+MODO_DECIMAL = 'decimal'    # como 'tokens', pero los números se comparan con tolerancia
+MODOS = (MODO_LINEAS, MODO_TOKENS, MODO_DECIMAL)
+
+JUDGE_FLOAT_TOLERANCE = float(os.environ.get('JUDGE_FLOAT_TOLERANCE', 1e-6))
+
+# Tamaño de los trozos en que se recorre la salida esperada
+_CHUNK_CHARS = 64 * 1024
+
+_TRAILING_SPACES = re.compile(rb'[ \t\r]+(?=\n)')
+_TRAILING_WHITESPACE = re.compile(rb'[ \t\r\n]*\Z')
+_WHITESPACE = re.compile(rb'\s+')
+
+
+class _LineNormalizer:
+    """
+    Convierte un flujo de bytes a su forma canónica del modo 'lineas' de
+    forma incremental: sin espacios al final de cada línea ni líneas vacías
+    al final. Sólo retiene el espacio en blanco del final de cada trozo,
+    porque aún no se sabe si le sigue más texto.
+    """
+
+    def __init__(self):
+        self._tail = b''
+
+    def feed(self, data):
+        data = self._tail + data
+        cut = _TRAILING_WHITESPACE.search(data).start()
+        body, tail = data[:cut], data[cut:]
+        # Del blanco pendiente sólo importan los saltos de línea y los espacios tras el último
+        last_newline = tail.rfind(b'\n')
+        if last_newline >= 0:
+            tail = b'\n' * tail.count(b'\n') + tail[last_newline + 1:]
+        self._tail = tail
+        return _TRAILING_SPACES.sub(b'', body)
+
+    def finish(self):
+        # Lo pendiente al final son espacios y líneas vacías finales: se descartan
+        self._tail = b''
+        return b''
+
+
+class _Tokenizer:
+    """ Separa un flujo de bytes en tokens (secuencias sin espacios) de forma incremental. """
+
+    def __init__(self):
+        self._partial = b''
+
+    def feed(self, data):
+        data = self._partial + data
+        tokens = _WHITESPACE.split(data)
+        # El último trozo puede ser un token cortado entre dos lecturas
+        self._partial = tokens.pop() if tokens else b''
+        return [t for t in tokens if t]
+
+    def finish(self):
+        partial, self._partial = self._partial, b''
+        return [partial] if partial else []
+
+
+def _expected_chunks(expected):
+    """ La salida esperada en trozos de bytes, sin codificarla completa de una vez. """
+    if not isinstance(expected, str):
+        # bytes o un blob mapeado en memoria (ver testBlobStore.open_mapped): se copia
+        # de a un trozo y no se retiene ninguna vista que impida cerrar el mapeo
+        expected = expected or b''
+        for i in range(0, len(expected), _CHUNK_CHARS):
+            yield bytes(expected[i:i + _CHUNK_CHARS])
+    else:
+        expected = expected or ''
+        for i in range(0, len(expected), _CHUNK_CHARS):
+            yield expected[i:i + _CHUNK_CHARS].encode('utf-8')
+
+
+def _numbers_match(actual, expected, tolerance):
+    try:
+        a = float(actual)
+        b = float(expected)
+    except ValueError:
+        return False
+    if math.isnan(a) or math.isnan(b):
+        return math.isnan(a) and math.isnan(b)
+    return abs(a - b) <= tolerance * max(1.0, abs(b))
+
+
+class OutputComparator:
+    """
+    Compara la salida de un programa con la esperada a medida que se lee
+    (feed por cada trozo leído del pipe), sin acumular ninguna de las dos:
+    la memoria usada no depende del tamaño de las salidas.
+
+    feed() devuelve False en cuanto hay una diferencia, para que quien
+    ejecuta el programa pueda detenerlo; finish() da el resultado final.
+    """
+
+    def __init__(self, expected, mode=MODO_LINEAS, tolerance=JUDGE_FLOAT_TOLERANCE):
+        if mode not in MODOS:
+            mode = MODO_LINEAS
+        self.mode = mode
+        self.tolerance = tolerance
+        self._expected_source = expected
+        self.reset()
+
+    def reset(self):
+        """ Vuelve a empezar (ej. si la ejecución se repite desde cero). """
+        expected, mode = self._expected_source, self.mode
+        self.mismatch = False
+        self._expected = _expected_chunks(expected)
+        self._expected_done = False
+        if mode == MODO_LINEAS:
+            self._actual_norm, self._expected_norm = _LineNormalizer(), _LineNormalizer()
+            self._pending = b''   # esperado canónico aún no comparado
+        else:
+            self._actual_norm, self._expected_norm = _Tokenizer(), _Tokenizer()
+            self._pending = []   # tokens esperados aún no comparados (desde _offset)
+        self._offset = 0
+
+    # -----------------------------------------------------------------
+    # API pública
+    # -----------------------------------------------------------------
+    def feed(self, chunk):
+        if self.mismatch:
+            return False
+        self._compare(self._actual_norm.feed(chunk))
+        return not self.mismatch
+
+    def finish(self):
+        """ True si la salida completa coincide con la esperada. """
+        if not self.mismatch:
+            self._compare(self._actual_norm.finish())
+        if not self.mismatch:
+            # No debe sobrar nada de la salida esperada
+            self._fill(1)
+            if self._available():
+                self.mismatch = True
+        return not self.mismatch
+
+    # -----------------------------------------------------------------
+    # Comparación
+    # -----------------------------------------------------------------
+    def _available(self):
+        return len(self._pending) - self._offset
+
+    def _fill(self, needed):
+        """ Avanza la salida esperada hasta tener al menos `needed` bytes/tokens pendientes. """
+        if self._offset and self._offset * 2 >= len(self._pending):
+            self._pending = self._pending[self._offset:]
+            self._offset = 0
+        while self._available() < needed and not self._expected_done:
+            chunk = next(self._expected, None)
+            if chunk is None:
+                self._expected_done = True
+                self._pending += self._expected_norm.finish()
+            else:
+                self._pending += self._expected_norm.feed(chunk)
+
+    def _compare(self, actual):
+        if not actual:
+            return
+        if self.mode == MODO_LINEAS:
+            view = memoryview(actual)
+            while view:
+                self._fill(1)
+                n = min(len(view), self._available())
+                if n == 0 or view[:n] != self._pending[self._offset:self._offset + n]:
+                    self.mismatch = True
+                    return
+                view = view[n:]
+                self._offset += n
+            return
+
+        self._fill(len(actual))
+        if self._available() < len(actual):
+            self.mismatch = True
+            return
+        expected = self._pending[self._offset:self._offset + len(actual)]
+        self._offset += len(actual)
+        if expected == actual:
+            return
+        if self.mode == MODO_DECIMAL and all(a == e or _numbers_match(a, e, self.tolerance)
+                                             for a, e in zip(actual, expected)):
+            return
+        self.mismatch = True
+
+
+def outputs_match(actual, expected, mode=MODO_LINEAS, tolerance=JUDGE_FLOAT_TOLERANCE):
+    """ Comparación de salidas ya completas (ej. para validar casos de prueba). """
+    comparator = OutputComparator(expected, mode, tolerance)
+    comparator.feed(actual.encode('utf-8') if isinstance(actual, str) else actual)
+    return comparator.finish()
@@ -0,0 +1,323 @@
+# Backend/src/judge/engine.py
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from . import verdicts
+from .evaluator import evaluate_submission
+from ..models.retosModels.respuestaModel import RespuestaModel
+from ..models.retosModels.retosModel import RetosModel
+from ..services.rankingIndex import ranking_index
+from ..cache.identityCache import identity_cache
+from ..cache.solvedCache import solved_cache
+from ..cache.testSetCache import test_set_cache
+
+
+JUDGE_WORKERS = int(os.environ.get('JUDGE_WORKERS', os.cpu_count() or 1))
+JUDGE_POLL_INTERVAL = float(os.environ.get('JUDGE_POLL_INTERVAL', 1.0))
+JUDGE_MAX_RETRIES = int(os.environ.get('JUDGE_MAX_RETRIES', 3))
+JUDGE_LEASE_SECONDS = int(os.environ.get('JUDGE_LEASE_SECONDS', 60))
+# Casos de prueba de una respuesta en paralelo; 0 = los núcleos que tocan a cada worker
+JUDGE_TEST_PARALLELISM = int(os.environ.get('JUDGE_TEST_PARALLELISM', 0))
+
+
+def _percentiles(values):
+    if not values:
+        return {'avg': 0.0, 'p50': 0, 'p95': 0, 'max': 0}
+    ordered = sorted(values)
+    return {
+        'avg': round(sum(ordered) / len(ordered), 1),
+        'p50': ordered[len(ordered) // 2],
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'max': ordered[-1],
+    }
+
+
+class JudgeStats:
+    """ Contadores del juez y throughput (respuestas/s y respuestas/s por núcleo). """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._judged = 0
+        self._errors = 0
+        self._claimed = 0
+        self._lost_leases = 0
+        self._by_estado = Counter()
+        self._compilaciones = Counter()
+        self._artefactos_desalojados = 0
+        self._latency_total_ms = 0.0
+        # Tiempo en cola (desde el envío hasta que un juez la reclama) de las últimas respuestas
+        self._queue_waits_ms = deque(maxlen=1000)
+
+    def record(self, result, latency_ms):
+        with self._lock:
+            self._judged += 1
+            self._by_estado[result['estado']] += 1
+            self._latency_total_ms += latency_ms
+            if result.get('compilacion'):
+                self._compilaciones[result['compilacion']] += 1
+            self._artefactos_desalojados += result.get('artefactos_desalojados', 0)
+
+    def record_error(self):
+        with self._lock:
+            self._errors += 1
+
+    def record_claimed(self, respuestas):
+        with self._lock:
+            self._claimed += len(respuestas)
+            self._queue_waits_ms.extend(max(0, int(r['espera_ms'])) for r in respuestas
+                                        if r.get('espera_ms') is not None)
+
+    def record_lost_lease(self):
+        with self._lock:
+            self._lost_leases += 1
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = time.monotonic() - self._started
+            throughput = self._judged / elapsed if elapsed > 0 else 0.0
+            return {
+                'workers': self.workers,
+                'uptime_seconds': round(elapsed, 1),
+                'claimed': self._claimed,
+                'judged': self._judged,
+                'errors': self._errors,
+                'lost_leases': self._lost_leases,
+                'by_estado': dict(self._by_estado),
+                'compilaciones': dict(self._compilaciones),
+                'artefactos_desalojados': self._artefactos_desalojados,
+                'latency_avg_ms': round(self._latency_total_ms / self._judged, 1) if self._judged else 0.0,
+                'queue_wait_ms': _percentiles(self._queue_waits_ms),
+                'submissions_per_second': round(throughput, 3),
+                'submissions_per_second_per_core': round(throughput / max(self.workers, 1), 3),
+                'test_cache': test_set_cache.stats(),
+            }
+
+
+class JudgeEngine:
+    """
+    Toma las respuestas 'Pendiente', las evalúa en un pool de procesos
+    (cada uno ejecuta el código en procesos hijos con límites) y guarda el
+    veredicto actualizando los contadores de la persona.
+
+    Varios motores (en la misma o en distintas máquinas) pueden compartir
+    la misma base de datos: cada uno reclama lotes con un lease propio
+    (ver RespuestaModel.claim_pending) y sólo el dueño del lease puede
+    guardar el veredicto.
+
+    Con update_local_caches=True (juez embebido en la API, JUDGE_EMBEDDED=1)
+    cada veredicto actualiza también el índice de ranking y las cachés de
+    identidad y de retos resueltos de este proceso. En judge.py no sirve de
+    nada: esas estructuras son de los procesos web, que ven los cambios al
+    recargar el ranking (RANKING_INDEX_REFRESH_SECONDS) y al vencer las
+    cachés (IDENTITY_CACHE_TTL, SOLVED_CACHE_TTL).
+    """
+
+    def __init__(self, workers=JUDGE_WORKERS, poll_interval=JUDGE_POLL_INTERVAL,
+                 lease_seconds=JUDGE_LEASE_SECONDS, owner=None, test_parallelism=JUDGE_TEST_PARALLELISM,
+                 on_verdict=None, update_local_caches=False):
+        self.workers = workers
+        self.test_parallelism = test_parallelism or max(1, (os.cpu_count() or 1) // max(workers, 1))
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.stats = JudgeStats(workers)
+        # on_verdict(id_respuesta, result): aviso tras guardar cada veredicto (ej. eventos SSE)
+        self.on_verdict = on_verdict
+        self.update_local_caches = update_local_caches
+
+        self._executor = None
+        self._in_flight = {}   # future -> (respuesta, instante de envío)
+        self._estados = None
+        self._stop = threading.Event()
+        self._last_renewal = time.monotonic()
+        self._last_exhausted_check = 0.0
+
+    # -----------------------------------------------------------------
+    # Ciclo de vida
+    # -----------------------------------------------------------------
+    def start(self):
+        estados = RespuestaModel.get_estados()
+        faltantes = [nombre for nombre in (verdicts.PENDIENTE, verdicts.ACEPTADO, verdicts.RECHAZADO,
+                                           verdicts.ERROR_COMPILACION, verdicts.LIMITE_TIEMPO,
+                                           verdicts.ERROR_JUEZ)
+                     if nombre not in estados]
+        if faltantes:
+            raise Exception(f"Faltan estados en ESTADO_RESPUESTA: {', '.join(faltantes)}")
+        self._estados = estados
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+
+    def stop(self):
+        self._stop.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+        # Guardar lo que alcanzó a terminar durante el apagado
+        for future in list(self._in_flight):
+            if future.done() and not future.cancelled():
+                self._finish(future)
+
+        # Lo que quedó sin veredicto vuelve a la cola sin contar como intento fallido
+        pendientes = [r['id_respuesta'] for r, _ in self._in_flight.values()]
+        self._in_flight.clear()
+        try:
+            RespuestaModel.release_leases(self.owner, pendientes, count_attempt=False)
+        except Exception as e:
+            print(f"No se pudieron liberar los leases del juez {self.owner}: {e}")
+
+    def run_forever(self):
+        if self._executor is None:
+            self.start()
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error en el ciclo del juez: {e}")
+                self._stop.wait(self.poll_interval)
+
+    def drain(self):
+        """ Evalúa todo lo pendiente y termina (modo --once). """
+        if self._executor is None:
+            self.start()
+        while self.run_once() or self._in_flight:
+            pass
+
+    # -----------------------------------------------------------------
+    # Un paso del ciclo: reclamar, despachar y recoger resultados
+    # -----------------------------------------------------------------
+    def run_once(self):
+        self._renew_leases()
+        self._fail_exhausted()
+        dispatched = self._dispatch()
+
+        if not self._in_flight:
+            if not dispatched:
+                self._stop.wait(self.poll_interval)
+            return dispatched
+
+        done, _ = wait(list(self._in_flight), timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+        for future in done:
+            self._finish(future)
+        return dispatched
+
+    def _dispatch(self):
+        # Se mantiene el doble de trabajos que workers para que nunca queden ociosos
+        capacity = self.workers * 2 - len(self._in_flight)
+        if capacity <= 0:
+            return 0
+
+        pendientes = RespuestaModel.claim_pending(
+            self.owner, self._estados[verdicts.PENDIENTE], limit=capacity,
+            lease_seconds=self.lease_seconds, max_intentos=JUDGE_MAX_RETRIES,
+        )
+        self.stats.record_claimed(pendientes)
+
+        for respuesta in pendientes:
+            job = dict(respuesta)
+            job['paralelismo'] = self.test_parallelism
+            job['tests'] = test_set_cache.get(respuesta['id_reto'], respuesta['version_tests'],
+                                              RetosModel.get_tests_for_judge)
+            future = self._executor.submit(evaluate_submission, job)
+            self._in_flight[future] = (respuesta, time.monotonic())
+        return len(pendientes)
+
+    def _renew_leases(self):
+        """ Mantiene vivos los leases de lo que sigue en evaluación (heartbeat). """
+        if time.monotonic() - self._last_renewal < self.lease_seconds / 3:
+            return
+        self._last_renewal = time.monotonic()
+        ids = [r['id_respuesta'] for r, _ in self._in_flight.values()]
+        try:
+            RespuestaModel.renew_leases(self.owner, ids, self.lease_seconds)
+        except Exception as e:
+            print(f"Error al renovar leases del juez {self.owner}: {e}")
+
+    def _fail_exhausted(self):
+        """
+        Cierra con 'Error del Juez' las respuestas que agotaron sus intentos sin
+        que su juez las liberara (murió durante el último): nadie más las reclama.
+        """
+        if time.monotonic() - self._last_exhausted_check < self.lease_seconds / 3:
+            return
+        self._last_exhausted_check = time.monotonic()
+        try:
+            ids = RespuestaModel.fail_exhausted(
+                self._estados[verdicts.PENDIENTE], self._estados[verdicts.ERROR_JUEZ], JUDGE_MAX_RETRIES,
+                f"El juez no terminó de evaluarla en {JUDGE_MAX_RETRIES} intentos")
+        except Exception as e:
+            print(f"Error al cerrar respuestas sin intentos restantes: {e}")
+            return
+        for id_respuesta in ids:
+            self._notify(id_respuesta, self._error_result(
+                f"El juez no terminó de evaluarla en {JUDGE_MAX_RETRIES} intentos"))
+
+    @staticmethod
+    def _error_result(motivo):
+        return {'estado': verdicts.ERROR_JUEZ, 'puntaje': 0, 'tiempo_ejecucion_ms': None, 'motivo': motivo}
+
+    def _notify(self, id_respuesta, result):
+        if self.on_verdict is None:
+            return
+        try:
+            self.on_verdict(id_respuesta, result)
+        except Exception as e:
+            print(f"Error al notificar el veredicto de la respuesta {id_respuesta}: {e}")
+
+    def _finish(self, future):
+        respuesta, submitted_at = self._in_flight.pop(future)
+        id_respuesta = respuesta['id_respuesta']
+
+        try:
+            result = future.result()
+            cambios = RespuestaModel.save_verdict(
+                id_respuesta,
+                self._estados[result['estado']],
+                result['puntaje'],
+                result['tiempo_ejecucion_ms'],
+                self._estados[verdicts.PENDIENTE],
+                self._estados[verdicts.ACEPTADO],
+                lease_owner=self.owner,
+                version_tests=respuesta.get('version_tests'),
+            )
+        except Exception as e:
+            self.stats.record_error()
+            print(f"Error al evaluar la respuesta {id_respuesta}: {e}")
+            # Se devuelve a la cola; en el último intento queda como 'Error del Juez'
+            motivo = f"La evaluación falló {JUDGE_MAX_RETRIES} veces: {e}"
+            try:
+                RespuestaModel.release_leases(self.owner, [id_respuesta], max_intentos=JUDGE_MAX_RETRIES,
+                                              id_estado_error=self._estados[verdicts.ERROR_JUEZ], motivo=motivo)
+            except Exception as release_error:
+                print(f"No se pudo liberar la respuesta {id_respuesta}: {release_error}")
+                return
+            if respuesta.get('intentos', 0) >= JUDGE_MAX_RETRIES:
+                self._notify(id_respuesta, self._error_result(motivo))
+            return
+
+        if cambios is None:
+            # El lease expiró y otro juez se quedó con la respuesta: no hay doble veredicto
+            self.stats.record_lost_lease()
+            return
+
+        self.stats.record(result, (time.monotonic() - submitted_at) * 1000)
+
+        if self.update_local_caches:
+            if cambios['delta_puntaje'] or cambios['delta_retos']:
+                ranking_index.apply_delta(cambios['id_persona'], cambios['delta_puntaje'], cambios['delta_retos'])
+                identity_cache.invalidate(cambios['id_persona'])
+            if cambios['delta_retos']:
+                solved_cache.invalidate(cambios['id_persona'])
+
+        self._notify(id_respuesta, result)
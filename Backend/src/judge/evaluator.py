@@ -0,0 +1,205 @@
+# Backend/src/judge/evaluator.py
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from . import verdicts
+from .artifacts import artifact_cache, artifact_key, compiler_version
+from .comparator import OutputComparator, MODO_LINEAS
+from .languages import get_language
+from .runners import run_test
+from .sandbox import CancelToken, run_process, JUDGE_OUTPUT_LIMIT_BYTES
+from ..services.testBlobStore import test_blob_store
+
+
+JUDGE_DEFAULT_TIME_LIMIT = float(os.environ.get('JUDGE_DEFAULT_TIME_LIMIT', 2))
+JUDGE_COMPILE_TIME_LIMIT = float(os.environ.get('JUDGE_COMPILE_TIME_LIMIT', 30))
+# Ejecutar todos los casos aunque alguno falle (puntaje parcial)
+JUDGE_RUN_ALL_TESTS = os.environ.get('JUDGE_RUN_ALL_TESTS', '0') in ('1', 'true', 'True')
+
+
+def _judge_run(run, comparator):
+    """ Veredicto de un caso de prueba: (estado, detalle). """
+    if run.timed_out:
+        return verdicts.LIMITE_TIEMPO, None
+    if run.output_exceeded:
+        return verdicts.RECHAZADO, f"La salida supera el límite de {JUDGE_OUTPUT_LIMIT_BYTES} bytes"
+    if comparator.mismatch:
+        # El programa pudo haberse detenido al detectar la diferencia: no es un error de ejecución
+        return verdicts.RECHAZADO, None
+    if run.exit_code != 0:
+        return verdicts.RECHAZADO, run.stderr.decode('utf-8', 'replace')
+    if not comparator.finish():
+        return verdicts.RECHAZADO, None
+    return verdicts.ACEPTADO, None
+
+
+def _run_tests(language, workdir, source, tests, time_limit, parallelism, run_all, mode):
+    """
+    Ejecuta los casos de prueba con hasta `parallelism` a la vez. Devuelve,
+    por cada test y en orden, (estado, RunResult, detalle) o None si no se
+    ejecutó. La salida de cada caso se compara mientras se lee (comparator.py).
+
+    Sin run_all, cuando el caso i falla se cancelan los casos posteriores
+    (los que no empezaron y los que están corriendo); los anteriores
+    terminan, para que el veredicto sea el mismo que en una ejecución
+    secuencial.
+    """
+    outcomes = [None] * len(tests)
+    tokens = [CancelToken() for _ in tests]
+
+    def run_one(i):
+        if tokens[i].cancelled:
+            return
+        with _payload(tests[i], 'datos_entrada', 'hash_entrada') as entrada, \
+                _payload(tests[i], 'salida_esperada', 'hash_salida') as salida:
+            comparator = OutputComparator(salida, mode)
+            try:
+                run = run_test(language, workdir, source, _to_bytes(entrada), time_limit, cancel=tokens[i],
+                               comparator=comparator)
+            except Exception:
+                if tokens[i].cancelled:
+                    return
+                raise
+            if tokens[i].cancelled:
+                return
+            estado, detalle = _judge_run(run, comparator)
+        outcomes[i] = (estado, run, detalle)
+        if estado != verdicts.ACEPTADO and not run_all:
+            for token in tokens[i + 1:]:
+                token.cancel()
+
+    if parallelism <= 1 or len(tests) <= 1:
+        for i in range(len(tests)):
+            run_one(i)
+        return outcomes
+
+    with ThreadPoolExecutor(max_workers=min(parallelism, len(tests))) as executor:
+        futures = [executor.submit(run_one, i) for i in range(len(tests))]
+        for future in futures:
+            future.result()
+    return outcomes
+
+
+def _to_bytes(value):
+    return value.encode('utf-8') if isinstance(value, str) else (value or b'')
+
+
+@contextmanager
+def _payload(test, campo, campo_hash):
+    """
+    Entrada o salida de un test: el texto de la fila o, si está guardado
+    como blob (ver services/testBlobStore.py), el archivo mapeado en memoria.
+    """
+    if test.get(campo_hash):
+        with test_blob_store.open_mapped(test[campo_hash]) as data:
+            yield data
+    else:
+        yield test.get(campo)
+
+
+def evaluate_submission(job):
+    """
+    Evalúa una respuesta contra todos los TEST de su reto. Se ejecuta en un
+    proceso del pool del juez, así que recibe y devuelve sólo datos simples.
+
+    job: {id_respuesta, codigo_fuente, nombre_lenguaje, nombre_dificultad,
+          limite_tiempo_segundos, tests: [{id_test, datos_entrada, salida_esperada, hash_entrada, hash_salida}],
+          modo_comparacion, paralelismo (opcional), ejecutar_todos (opcional)}
+    """
+    result = {
+        'id_respuesta': job['id_respuesta'],
+        'estado': verdicts.RECHAZADO,
+        'puntaje': 0,
+        'tiempo_ejecucion_ms': None,
+        'cpu_ms': None,
+        'memoria_kb': None,
+        'compilacion': None,
+        'artefactos_desalojados': 0,
+        'tests_ok': 0,
+        'tests_total': len(job['tests']),
+        'tests': None,   # tiempos y estado por caso de prueba
+        'detalle': None,
+    }
+
+    language = get_language(job['nombre_lenguaje'])
+    if language is None:
+        result['estado'] = verdicts.ERROR_COMPILACION
+        result['detalle'] = f"Lenguaje no soportado por el juez: {job['nombre_lenguaje']}"
+        return result
+
+    time_limit = float(job.get('limite_tiempo_segundos') or JUDGE_DEFAULT_TIME_LIMIT)
+    workdir = tempfile.mkdtemp(prefix='codium-judge-')
+    try:
+        with open(os.path.join(workdir, language.source_file), 'w', encoding='utf-8') as f:
+            f.write(job['codigo_fuente'])
+
+        # 1. Compilación (sólo lenguajes compilados), reutilizando artefactos ya compilados
+        if language.compiled:
+            key = None
+            if artifact_cache.enabled and language.version_cmd:
+                version = compiler_version(language)
+                if version is not None:
+                    key = artifact_key(job['codigo_fuente'], job.get('id_lenguaje', language.nombre), version)
+
+            if key is not None and artifact_cache.restore(key, workdir):
+                result['compilacion'] = 'cache'
+            else:
+                compiled = run_process(language.compile_cmd, workdir, time_limit=JUDGE_COMPILE_TIME_LIMIT,
+                                       limit_address_space=False)
+                if not compiled.ok:
+                    result['estado'] = verdicts.ERROR_COMPILACION
+                    result['detalle'] = compiled.stderr.decode('utf-8', 'replace')
+                    return result
+                result['compilacion'] = 'compilado'
+                if key is not None:
+                    result['artefactos_desalojados'] = artifact_cache.store(
+                        key, workdir, exclude={language.source_file})
+
+        # 2. Ejecución de los casos de prueba (en paralelo, cortando en el primer fallo)
+        source = _to_bytes(job['codigo_fuente'])
+        run_all = job.get('ejecutar_todos', JUDGE_RUN_ALL_TESTS)
+        outcomes = _run_tests(language, workdir, source, job['tests'], time_limit,
+                              job.get('paralelismo') or 1, run_all, job.get('modo_comparacion') or MODO_LINEAS)
+
+        result['tests'] = []
+        failure = None
+        for test, outcome in zip(job['tests'], outcomes):
+            if failure is not None and not run_all:
+                # Cortando en el primer fallo, lo que otros workers alcanzaron a terminar
+                # después de ese caso no cuenta: el resultado no depende del paralelismo
+                outcome = None
+            if outcome is None:
+                result['tests'].append({'id_test': test.get('id_test'), 'estado': None})
+                continue
+            estado, run, detalle = outcome
+            result['tests'].append({'id_test': test.get('id_test'), 'estado': estado, 'tiempo_ms': run.tiempo_ms,
+                                    'cpu_ms': run.cpu_ms, 'memoria_kb': run.peak_rss_kb})
+            result['tiempo_ejecucion_ms'] = max(result['tiempo_ejecucion_ms'] or 0, run.tiempo_ms)
+            if run.cpu_ms is not None:
+                result['cpu_ms'] = max(result['cpu_ms'] or 0, run.cpu_ms)
+            if run.peak_rss_kb is not None:
+                result['memoria_kb'] = max(result['memoria_kb'] or 0, run.peak_rss_kb)
+
+            if estado == verdicts.ACEPTADO:
+                result['tests_ok'] += 1
+            elif failure is None:
+                # El veredicto lo decide el primer caso (en orden) que falla
+                failure = (estado, detalle)
+
+        puntaje_maximo = verdicts.puntaje_maximo(job.get('nombre_dificultad'))
+        if failure is None:
+            result['estado'] = verdicts.ACEPTADO
+            result['puntaje'] = puntaje_maximo
+            return result
+
+        result['estado'], result['detalle'] = failure
+        if run_all and result['tests_total']:
+            # Puntaje parcial: proporcional a los casos superados
+            result['puntaje'] = puntaje_maximo * result['tests_ok'] // result['tests_total']
+        return result
+
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
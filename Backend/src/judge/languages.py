@@ -0,0 +1,60 @@
+# Backend/src/judge/languages.py
+import os
+import sys
+
+
+# Ejecutables configurables (ej. para apuntar a un runtime concreto en el host del juez)
+PYTHON_BIN = os.environ.get('JUDGE_PYTHON', sys.executable)
+NODE_BIN = os.environ.get('JUDGE_NODE', 'node')
+JAVA_BIN = os.environ.get('JUDGE_JAVA', 'java')
+JAVAC_BIN = os.environ.get('JUDGE_JAVAC', 'javac')
+
+
+class Language:
+    """
+    Cómo compilar (si aplica) y ejecutar un programa de un LENGUAJE del catálogo.
+    Los comandos se ejecutan dentro del directorio de trabajo de la evaluación.
+    """
+
+    def __init__(self, nombre, source_file, run_cmd, compile_cmd=None, limit_address_space=True, warm_cmd=None,
+                 version_cmd=None):
+        self.nombre = nombre
+        self.source_file = source_file
+        self.run_cmd = run_cmd
+        self.compile_cmd = compile_cmd
+        # Comando del runner precalentado (ver runners.py); None = siempre en frío
+        self.warm_cmd = warm_cmd
+        # Versión del compilador: forma parte de la clave de la caché de artefactos
+        self.version_cmd = version_cmd
+        # Los runtimes con JIT (JVM, V8) reservan mucha memoria virtual: se limitan con sus propias opciones
+        self.limit_address_space = limit_address_space
+
+    @property
+    def compiled(self):
+        return self.compile_cmd is not None
+
+
+# Claves = LENGUAJE.nombre_lenguaje
+LANGUAGES = {
+    'Python': Language(
+        'Python', 'main.py',
+        run_cmd=[PYTHON_BIN, '-I', '-B', 'main.py'],
+        warm_cmd=[PYTHON_BIN, '-I', '-B', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'zygote.py')],
+    ),
+    'JavaScript': Language(
+        'JavaScript', 'main.js',
+        run_cmd=[NODE_BIN, '--max-old-space-size=256', 'main.js'],
+        limit_address_space=False,
+    ),
+    'Java': Language(
+        'Java', 'Main.java',
+        compile_cmd=[JAVAC_BIN, '-J-Xmx256m', '-encoding', 'UTF-8', 'Main.java'],
+        version_cmd=[JAVAC_BIN, '-version'],
+        run_cmd=[JAVA_BIN, '-Xmx256m', '-Xss64m', '-XX:+UseSerialGC', '-cp', '.', 'Main'],
+        limit_address_space=False,
+    ),
+}
+
+
+def get_language(nombre_lenguaje):
+    return LANGUAGES.get(nombre_lenguaje)
@@ -0,0 +1,250 @@
+# Backend/src/judge/rejudge.py
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from . import verdicts
+from .engine import JUDGE_WORKERS
+from .evaluator import evaluate_submission
+from ..models.retosModels.respuestaModel import RespuestaModel
+from ..models.retosModels.retosModel import RetosModel
+from ..services.rankingIndex import ranking_index
+from ..cache.identityCache import identity_cache
+from ..cache.solvedCache import solved_cache
+from ..cache.testSetCache import test_set_cache
+
+
+# Por defecto la re-evaluación usa la mitad de los núcleos: el resto queda para el juez en vivo
+JUDGE_REJUDGE_WORKERS = int(os.environ.get('JUDGE_REJUDGE_WORKERS', max(1, JUDGE_WORKERS // 2)))
+JUDGE_REJUDGE_BATCH_SIZE = int(os.environ.get('JUDGE_REJUDGE_BATCH_SIZE', 50))
+# Máximo de respuestas re-evaluadas por segundo (0 = sin límite)
+JUDGE_REJUDGE_RATE = float(os.environ.get('JUDGE_REJUDGE_RATE', 0))
+# Con más respuestas 'Pendiente' que esto en la cola en vivo, la re-evaluación espera
+JUDGE_REJUDGE_MAX_BACKLOG = int(os.environ.get('JUDGE_REJUDGE_MAX_BACKLOG', 10))
+JUDGE_REJUDGE_BACKOFF_SECONDS = float(os.environ.get('JUDGE_REJUDGE_BACKOFF_SECONDS', 2.0))
+
+
+class Rejudger:
+    """
+    Re-evalúa todas las respuestas ya evaluadas de un reto (ej. tras corregir
+    sus TEST) en lotes, repartidos en un pool de procesos evaluadores.
+
+    - Antes de empezar incrementa RETO.version_tests: todas las respuestas se
+      evalúan con los tests actuales (ninguna caché sirve los anteriores) y
+      los reenvíos idénticos dejan de reutilizar veredictos previos.
+
+    - Recorre las respuestas por id_respuesta (keyset), sin cargarlas todas.
+    - Cada lote se guarda en una transacción que también reconcilia los
+      contadores de las personas afectadas (RespuestaModel.save_rejudged_verdicts).
+    - Cede capacidad al tráfico en vivo: limita los workers y la tasa, y
+      espera mientras la cola 'Pendiente' supera max_backlog.
+    - progress() informa el avance; cancel() la detiene tras el lote en curso.
+    - update_local_caches: como en JudgeEngine, sólo tiene sentido si corre
+      dentro de un proceso web (lanzada desde la API, ver start_rejudge).
+    """
+
+    def __init__(self, id_reto, workers=JUDGE_REJUDGE_WORKERS, batch_size=JUDGE_REJUDGE_BATCH_SIZE,
+                 rate=JUDGE_REJUDGE_RATE, max_backlog=JUDGE_REJUDGE_MAX_BACKLOG,
+                 backoff_seconds=JUDGE_REJUDGE_BACKOFF_SECONDS, update_local_caches=False):
+        self.id_reto = id_reto
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.rate = rate
+        self.max_backlog = max_backlog
+        self.backoff_seconds = backoff_seconds
+        self.update_local_caches = update_local_caches
+
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._progress = {
+            'id_reto': id_reto,
+            'estado': 'pendiente',
+            'total': None,
+            'procesadas': 0,
+            'modificadas': 0,
+            'errores': 0,
+            'personas_reconciliadas': 0,
+            'esperas_por_cola': 0,
+            'por_estado': {},
+            'version_tests': None,
+            'error': None,
+        }
+        self._version_tests = None
+        self._started = None
+        self._finished = None
+
+    # -----------------------------------------------------------------
+    # API pública
+    # -----------------------------------------------------------------
+    def run(self):
+        """ Ejecuta la re-evaluación completa (bloqueante). Devuelve el progreso final. """
+        self._update(estado='en_curso')
+        self._started = time.monotonic()
+        try:
+            estados = RespuestaModel.get_estados()
+            faltantes = [nombre for nombre in (verdicts.PENDIENTE, verdicts.ACEPTADO, verdicts.RECHAZADO,
+                                               verdicts.ERROR_COMPILACION, verdicts.LIMITE_TIEMPO)
+                         if nombre not in estados]
+            if faltantes:
+                raise Exception(f"Faltan estados en ESTADO_RESPUESTA: {', '.join(faltantes)}")
+            self._version_tests = RetosModel.bump_tests_version(self.id_reto)
+            if self._version_tests is None:
+                raise Exception(f"El reto {self.id_reto} no existe")
+            self._update(version_tests=self._version_tests,
+                         total=RespuestaModel.count_for_rejudge(self.id_reto, estados[verdicts.PENDIENTE]))
+
+            executor = ProcessPoolExecutor(max_workers=self.workers,
+                                           mp_context=multiprocessing.get_context('spawn'))
+            try:
+                self._run_batches(executor, estados)
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+            self._update(estado='cancelado' if self._cancel.is_set() else 'completado')
+        except Exception as e:
+            print(f"Error en la re-evaluación del reto {self.id_reto}: {e}")
+            self._update(estado='fallido', error=str(e))
+        finally:
+            self._finished = time.monotonic()
+        return self.progress()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def running(self):
+        return self.progress()['estado'] in ('pendiente', 'en_curso')
+
+    def progress(self):
+        with self._lock:
+            progress = dict(self._progress, por_estado=dict(self._progress['por_estado']))
+        if self._started is not None:
+            elapsed = (self._finished or time.monotonic()) - self._started
+            progress['segundos'] = round(elapsed, 1)
+            if progress['total']:
+                progress['porcentaje'] = round(100 * progress['procesadas'] / progress['total'], 1)
+                restantes = progress['total'] - progress['procesadas']
+                if progress['procesadas'] and restantes > 0 and self._finished is None:
+                    progress['eta_segundos'] = round(elapsed / progress['procesadas'] * restantes, 1)
+        return progress
+
+    # -----------------------------------------------------------------
+    # Lotes
+    # -----------------------------------------------------------------
+    def _run_batches(self, executor, estados):
+        id_pendiente = estados[verdicts.PENDIENTE]
+        after_id = 0
+        while not self._cancel.is_set():
+            self._wait_for_live_queue(id_pendiente)
+            if self._cancel.is_set():
+                break
+
+            lote = RespuestaModel.get_rejudge_batch(self.id_reto, id_pendiente, after_id, self.batch_size)
+            if not lote:
+                break
+            after_id = lote[-1]['id_respuesta']
+
+            veredictos = self._evaluate_batch(executor, lote, estados)
+            resultado = RespuestaModel.save_rejudged_verdicts(self.id_reto, veredictos, id_pendiente,
+                                                              estados[verdicts.ACEPTADO])
+            if self.update_local_caches:
+                for cambio in resultado['cambios']:
+                    ranking_index.apply_delta(cambio['id_persona'], cambio['delta_puntaje'], cambio['delta_retos'])
+                    identity_cache.invalidate(cambio['id_persona'])
+                    if cambio['delta_retos']:
+                        solved_cache.invalidate(cambio['id_persona'])
+
+            with self._lock:
+                self._progress['procesadas'] += len(lote)
+                self._progress['modificadas'] += resultado['actualizadas']
+                self._progress['errores'] += len(lote) - len(veredictos)
+                self._progress['personas_reconciliadas'] += len(resultado['cambios'])
+
+    def _evaluate_batch(self, executor, lote, estados):
+        """ Evalúa un lote con a lo sumo `workers` respuestas en curso, respetando la tasa. """
+        veredictos = []
+        in_flight = {}
+        pendientes = list(lote)
+        interval = 1.0 / self.rate if self.rate > 0 else 0.0
+        next_submit = time.monotonic()
+
+        while pendientes or in_flight:
+            while pendientes and len(in_flight) < self.workers:
+                if interval:
+                    delay = next_submit - time.monotonic()
+                    if delay > 0 and in_flight:
+                        break
+                    if delay > 0:
+                        time.sleep(delay)
+                    next_submit = max(next_submit, time.monotonic()) + interval
+                respuesta = pendientes.pop(0)
+                job = dict(respuesta)
+                job['paralelismo'] = 1
+                job['version_tests'] = self._version_tests
+                job['tests'] = test_set_cache.get(respuesta['id_reto'], self._version_tests,
+                                                  RetosModel.get_tests_for_judge)
+                in_flight[executor.submit(evaluate_submission, job)] = respuesta
+
+            timeout = max(0.0, next_submit - time.monotonic()) if interval and pendientes else None
+            done, _ = wait(list(in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                respuesta = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Error al re-evaluar la respuesta {respuesta['id_respuesta']}: {e}")
+                    continue
+                veredictos.append({
+                    'id_respuesta': respuesta['id_respuesta'],
+                    'id_estado': estados[result['estado']],
+                    'puntaje': result['puntaje'],
+                    'tiempo_ejecucion_ms': result['tiempo_ejecucion_ms'],
+                    'version_tests': self._version_tests,
+                })
+                with self._lock:
+                    por_estado = self._progress['por_estado']
+                    por_estado[result['estado']] = por_estado.get(result['estado'], 0) + 1
+        return veredictos
+
+    def _wait_for_live_queue(self, id_pendiente):
+        """ Mientras el juez en vivo tenga cola, la re-evaluación no le quita workers. """
+        if self.max_backlog < 0:
+            return
+        while not self._cancel.is_set():
+            if RespuestaModel.count_pending(id_pendiente) <= self.max_backlog:
+                return
+            with self._lock:
+                self._progress['esperas_por_cola'] += 1
+            self._cancel.wait(self.backoff_seconds)
+
+    def _update(self, **kwargs):
+        with self._lock:
+            self._progress.update(kwargs)
+
+
+# =====================================================================
+# Re-evaluaciones lanzadas desde la API (una por reto a la vez)
+# =====================================================================
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def start_rejudge(id_reto, **kwargs):
+    """ Lanza la re-evaluación del reto en segundo plano. None si ya hay una en curso. """
+    with _jobs_lock:
+        actual = _jobs.get(id_reto)
+        if actual is not None and actual.running:
+            return None
+        # Corre en el proceso web que la lanzó: sus cachés son las que hay que actualizar
+        kwargs.setdefault('update_local_caches', True)
+        rejudger = Rejudger(id_reto, **kwargs)
+        _jobs[id_reto] = rejudger
+    threading.Thread(target=rejudger.run, name=f'rejudge-{id_reto}', daemon=True).start()
+    return rejudger
+
+
+def get_rejudge(id_reto):
+    with _jobs_lock:
+        return _jobs.get(id_reto)
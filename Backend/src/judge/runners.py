@@ -0,0 +1,267 @@
+# Backend/src/judge/runners.py
+import atexit
+import os
+import select
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+
+from .sandbox import RunResult, run_process, JUDGE_MEMORY_LIMIT_MB, JUDGE_OUTPUT_LIMIT_BYTES, _SANDBOX_ENV, _PIPE_CHUNK
+from .zygote import read_exact, read_frame, send_frame
+
+
+# Runners precalentados por lenguaje (en cada proceso evaluador del juez)
+JUDGE_WARM_RUNNERS = os.environ.get('JUDGE_WARM_RUNNERS', '1') not in ('0', 'false', 'False')
+JUDGE_RUNNER_POOL_SIZE = int(os.environ.get('JUDGE_RUNNER_POOL_SIZE', 2))
+JUDGE_RUNNER_MAX_RUNS = int(os.environ.get('JUDGE_RUNNER_MAX_RUNS', 500))
+JUDGE_RUNNER_MAX_RSS_MB = int(os.environ.get('JUDGE_RUNNER_MAX_RSS_MB', 128))
+
+# Margen sobre el límite de tiempo antes de dar al runner por colgado
+_RUNNER_GRACE_SECONDS = 5
+
+
+class RunnerError(Exception):
+    """ El runner murió o no respondió: se descarta y la ejecución se repite en frío. """
+
+
+class WarmRunner:
+    """
+    Proceso zygote de un lenguaje, ya arrancado y con sus módulos cargados.
+    Cada ejecución es un fork del zygote (ver zygote.py), así que no hay
+    que reiniciar el intérprete entre casos de prueba.
+    """
+
+    def __init__(self, cmd):
+        self.workdir = tempfile.mkdtemp(prefix='codium-runner-')
+        self.runs = 0
+        self.rss_kb = 0
+        self._busy = False
+        self._busy_lock = threading.Lock()
+        self._proc = subprocess.Popen(
+            cmd + [self.workdir],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=_SANDBOX_ENV,
+            cwd=self.workdir,
+            start_new_session=True,
+        )
+        try:
+            ready = self._read_frame(_RUNNER_GRACE_SECONDS)
+        except Exception:
+            self.close()
+            raise
+        self.rss_kb = ready.get('runner_rss_kb', 0)
+
+    @property
+    def alive(self):
+        return self._proc.poll() is None
+
+    def run(self, source, stdin_data, time_limit, memory_limit_mb=JUDGE_MEMORY_LIMIT_MB, cancel=None,
+            stdout_sink=None):
+        job = {
+            'source_len': len(source),
+            'stdin_len': len(stdin_data),
+            'time_limit': time_limit,
+            'memory_limit_mb': memory_limit_mb,
+            'output_limit': JUDGE_OUTPUT_LIMIT_BYTES,
+        }
+        with self._busy_lock:
+            self._busy = True
+        if cancel is not None:
+            cancel.register(self.cancel)
+        try:
+            send_frame(self._proc.stdin.fileno(), job, source, stdin_data)
+            reply = self._read_frame(time_limit + _RUNNER_GRACE_SECONDS)
+            stderr = read_exact(self._proc.stdout.fileno(), reply['stderr_len'])
+            stdout = self._read_stdout(reply['stdout_len'], stdout_sink)
+        except RunnerError:
+            raise
+        except (OSError, EOFError, ValueError, KeyError) as e:
+            raise RunnerError(f"El runner dejó de responder: {e}")
+        finally:
+            if cancel is not None:
+                cancel.unregister(self.cancel)
+            with self._busy_lock:
+                self._busy = False
+
+        self.runs += 1
+        self.rss_kb = reply.get('runner_rss_kb', 0)
+        return RunResult(reply['exit_code'], stdout, stderr, reply['tiempo_ms'], reply['timed_out'],
+                         cpu_ms=reply['cpu_ms'], peak_rss_kb=reply['peak_rss_kb'],
+                         output_exceeded=reply['output_exceeded'])
+
+    def _read_stdout(self, length, sink):
+        """ Lee la salida en trozos; con sink no se acumula (el resto se descarta si sink corta). """
+        fd = self._proc.stdout.fileno()
+        chunks = []
+        wanted = True
+        while length:
+            chunk = os.read(fd, min(length, _PIPE_CHUNK))
+            if not chunk:
+                raise EOFError("El runner cerró la conexión")
+            length -= len(chunk)
+            if sink is None:
+                chunks.append(chunk)
+            elif wanted and sink(chunk) is False:
+                wanted = False
+        return b''.join(chunks)
+
+    def cancel(self):
+        """ Mata la ejecución en curso (el zygote sigue vivo y reutilizable). """
+        with self._busy_lock:
+            if self._busy and self.alive:
+                os.kill(self._proc.pid, signal.SIGUSR1)
+
+    def _read_frame(self, timeout):
+        fd = self._proc.stdout.fileno()
+        ready, _, _ = select.select([fd], [], [], timeout)
+        if not ready:
+            raise RunnerError("El runner no respondió a tiempo")
+        try:
+            return read_frame(fd)
+        except (OSError, EOFError, ValueError) as e:
+            raise RunnerError(f"El runner dejó de responder: {e}")
+
+    def needs_recycle(self):
+        return (not self.alive
+                or self.runs >= JUDGE_RUNNER_MAX_RUNS
+                or self.rss_kb > JUDGE_RUNNER_MAX_RSS_MB * 1024)
+
+    def close(self):
+        try:
+            self._proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self._proc.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+            self._proc.wait()
+        self._proc.stdout.close()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class RunnerPool:
+    """
+    Runners precalentados por lenguaje. Un runner se toma para una ejecución,
+    se devuelve al terminar y se recicla (se cierra y se arranca otro) tras
+    JUDGE_RUNNER_MAX_RUNS ejecuciones o si su memoria crece por encima de
+    JUDGE_RUNNER_MAX_RSS_MB.
+    """
+
+    def __init__(self, max_idle=JUDGE_RUNNER_POOL_SIZE):
+        self.max_idle = max_idle
+        self._idle = {}   # nombre del lenguaje -> [WarmRunner]
+        self._busy = {}   # nombre del lenguaje -> runners en uso
+        self._peak = {}   # nombre del lenguaje -> máximo de runners en uso a la vez
+        self._lock = threading.Lock()
+        self._stats = {'started': 0, 'recycled': 0, 'failures': 0, 'warm_runs': 0}
+
+    def run(self, language, source, stdin_data, time_limit, memory_limit_mb=JUDGE_MEMORY_LIMIT_MB, cancel=None,
+            stdout_sink=None):
+        """ Ejecuta en un runner caliente. Lanza RunnerError si no fue posible. """
+        runner = self._acquire(language)
+        try:
+            result = runner.run(source, stdin_data, time_limit, memory_limit_mb, cancel=cancel,
+                                stdout_sink=stdout_sink)
+        except RunnerError:
+            self._count('failures')
+            self._set_busy(language, -1)
+            runner.close()
+            raise
+        self._count('warm_runs')
+        self._release(language, runner)
+        return result
+
+    def _acquire(self, language):
+        self._set_busy(language, +1)
+        with self._lock:
+            idle = self._idle.get(language.nombre)
+            while idle:
+                runner = idle.pop()
+                if runner.alive:
+                    return runner
+                runner.close()
+        try:
+            runner = WarmRunner(language.warm_cmd)
+        except (OSError, RunnerError) as e:
+            self._count('failures')
+            self._set_busy(language, -1)
+            raise RunnerError(f"No se pudo arrancar el runner de {language.nombre}: {e}")
+        self._count('started')
+        return runner
+
+    def _release(self, language, runner):
+        self._set_busy(language, -1)
+        if runner.needs_recycle():
+            self._count('recycled')
+            runner.close()
+            return
+        with self._lock:
+            idle = self._idle.setdefault(language.nombre, [])
+            # Se conservan tantos como se usaron a la vez (casos de prueba en paralelo)
+            if len(idle) < max(self.max_idle, self._peak.get(language.nombre, 0)):
+                idle.append(runner)
+                return
+        runner.close()
+
+    def _set_busy(self, language, delta):
+        with self._lock:
+            busy = self._busy.get(language.nombre, 0) + delta
+            self._busy[language.nombre] = busy
+            self._peak[language.nombre] = max(self._peak.get(language.nombre, 0), busy)
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'idle': {nombre: len(r) for nombre, r in self._idle.items()}}
+
+    def close(self):
+        with self._lock:
+            runners = [r for idle in self._idle.values() for r in idle]
+            self._idle.clear()
+        for runner in runners:
+            runner.close()
+
+
+_pool = None
+_pool_pid = None
+
+
+def get_runner_pool():
+    """ Pool del proceso actual (cada proceso evaluador del juez tiene el suyo). """
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        _pool = RunnerPool()
+        _pool_pid = os.getpid()
+        atexit.register(_pool.close)
+    return _pool
+
+
+def run_test(language, workdir, source, stdin_data, time_limit, cancel=None, comparator=None):
+    """
+    Ejecuta un caso de prueba: en un runner caliente si el lenguaje lo
+    soporta y, si no (o si el runner falla), arrancando el programa en frío.
+    Con `comparator` (OutputComparator) la salida se compara mientras se lee.
+    """
+    sink = comparator.feed if comparator is not None else None
+    if JUDGE_WARM_RUNNERS and language.warm_cmd is not None:
+        try:
+            return get_runner_pool().run(language, source, stdin_data, time_limit, cancel=cancel,
+                                         stdout_sink=sink)
+        except RunnerError as e:
+            if cancel is not None and cancel.cancelled:
+                raise
+            print(f"Runner caliente no disponible, ejecución en frío: {e}")
+            if comparator is not None:
+                comparator.reset()
+
+    return run_process(language.run_cmd, workdir, stdin_data, time_limit=time_limit,
+                       limit_address_space=language.limit_address_space, cancel=cancel,
+                       stdout_sink=sink)
@@ -0,0 +1,220 @@
+# Backend/src/judge/sandbox.py
+import math
+import os
+import resource
+import selectors
+import signal
+import subprocess
+import threading
+import time
+
+
+JUDGE_MEMORY_LIMIT_MB = int(os.environ.get('JUDGE_MEMORY_LIMIT_MB', 256))
+JUDGE_OUTPUT_LIMIT_BYTES = int(os.environ.get('JUDGE_OUTPUT_LIMIT_BYTES', 16 * 1024 * 1024))
+
+_PIPE_CHUNK = 64 * 1024
+
+# Entorno mínimo para los programas de los usuarios (no heredan secretos del juez)
+_SANDBOX_ENV = {
+    'PATH': os.environ.get('PATH', '/usr/bin:/bin'),
+    'LANG': 'C.UTF-8',
+    'PYTHONIOENCODING': 'utf-8',
+    'HOME': '/tmp',
+}
+
+
+class RunResult:
+    __slots__ = ('exit_code', 'stdout', 'stderr', 'tiempo_ms', 'timed_out', 'cpu_ms', 'peak_rss_kb',
+                 'output_exceeded')
+
+    def __init__(self, exit_code, stdout, stderr, tiempo_ms, timed_out, cpu_ms=None, peak_rss_kb=None,
+                 output_exceeded=False):
+        self.exit_code = exit_code
+        # Vacío si la salida se entregó a un stdout_sink en lugar de acumularse
+        self.stdout = stdout
+        self.stderr = stderr
+        self.tiempo_ms = tiempo_ms
+        self.timed_out = timed_out
+        self.output_exceeded = output_exceeded
+        # Tiempo de CPU y memoria máxima del proceso (si se pudieron medir)
+        self.cpu_ms = cpu_ms
+        self.peak_rss_kb = peak_rss_kb
+
+    @property
+    def ok(self):
+        return self.exit_code == 0 and not self.timed_out
+
+
+class CancelToken:
+    """
+    Permite abortar una ejecución en curso desde otro hilo (ej. cuando otro
+    caso de prueba de la misma respuesta ya falló). Quien ejecuta registra
+    cómo matar su proceso; cancel() lo invoca.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._kills = []
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def register(self, kill):
+        """ Registra `kill`; si ya estaba cancelado lo invoca de inmediato. """
+        with self._lock:
+            if not self._cancelled:
+                self._kills.append(kill)
+                return
+        kill()
+
+    def unregister(self, kill):
+        with self._lock:
+            if kill in self._kills:
+                self._kills.remove(kill)
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            kills, self._kills = self._kills, []
+        for kill in kills:
+            kill()
+
+
+def _limits(time_limit, memory_limit_mb, limit_address_space):
+    """ preexec_fn: límites de recursos aplicados al proceso hijo antes del exec. """
+    # Se calcula todo antes del fork: entre fork y exec sólo se llama a setrlimit
+    cpu = math.ceil(time_limit) + 1
+    memory = memory_limit_mb * 1024 * 1024 if limit_address_space and memory_limit_mb else None
+
+    def apply():
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (JUDGE_OUTPUT_LIMIT_BYTES, JUDGE_OUTPUT_LIMIT_BYTES))
+        if memory is not None:
+            resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    return apply
+
+
+def run_process(cmd, cwd, stdin_data=b'', time_limit=2.0,
+                memory_limit_mb=JUDGE_MEMORY_LIMIT_MB, limit_address_space=True, cancel=None,
+                stdout_sink=None, output_limit=JUDGE_OUTPUT_LIMIT_BYTES):
+    """
+    Ejecuta `cmd` aislado en lo posible (sesión propia, entorno mínimo,
+    límites de CPU/memoria/archivos) y con límite de tiempo real.
+
+    Si se pasa stdout_sink, la salida se le entrega en trozos a medida que
+    se lee (sin acumularla); si devuelve False el programa se detiene. La
+    salida que supere output_limit bytes también lo detiene.
+
+    No es un aislamiento completo: en producción el juez debe correr con
+    un usuario sin privilegios o dentro de un contenedor.
+    """
+    start = time.monotonic()
+    proc = subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=_SANDBOX_ENV,
+        start_new_session=True,
+        preexec_fn=_limits(time_limit, memory_limit_mb, limit_address_space),
+    )
+
+    kill = lambda: _kill_group(proc)  # noqa: E731
+    if cancel is not None:
+        cancel.register(kill)
+
+    chunks = []
+    sink = stdout_sink or chunks.append
+    try:
+        timed_out, output_exceeded, stderr = _communicate(proc, stdin_data, start + time_limit, sink, output_limit)
+    finally:
+        if cancel is not None:
+            cancel.unregister(kill)
+
+    tiempo_ms = int((time.monotonic() - start) * 1000)
+
+    # SIGXCPU = se agotó el límite de CPU: también es un límite de tiempo
+    if proc.returncode == -signal.SIGXCPU:
+        timed_out = True
+
+    return RunResult(proc.returncode, b''.join(chunks), stderr, tiempo_ms, timed_out,
+                     output_exceeded=output_exceeded)
+
+
+def _communicate(proc, stdin_data, deadline, sink, output_limit, stderr_limit=4096):
+    """
+    Como Popen.communicate, pero entrega stdout a `sink` en trozos y corta
+    al vencer el plazo, al superar output_limit o cuando sink devuelve False.
+    Devuelve (timed_out, output_exceeded, cola de stderr).
+    """
+    selector = selectors.DefaultSelector()
+    stdin_view = memoryview(stdin_data or b'')
+    if stdin_view:
+        os.set_blocking(proc.stdin.fileno(), False)
+        selector.register(proc.stdin, selectors.EVENT_WRITE)
+    else:
+        proc.stdin.close()
+    selector.register(proc.stdout, selectors.EVENT_READ)
+    selector.register(proc.stderr, selectors.EVENT_READ)
+
+    timed_out = output_exceeded = stopped = False
+    stderr_tail = b''
+    written = read = 0
+    try:
+        while selector.get_map() and not (output_exceeded or stopped):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                break
+            for key, _ in selector.select(remaining):
+                if key.fileobj is proc.stdin:
+                    try:
+                        written += os.write(key.fd, stdin_view[written:written + _PIPE_CHUNK])
+                    except BrokenPipeError:
+                        # El programa terminó sin leer toda la entrada
+                        written = len(stdin_view)
+                    if written >= len(stdin_view):
+                        selector.unregister(proc.stdin)
+                        proc.stdin.close()
+                    continue
+
+                data = os.read(key.fd, _PIPE_CHUNK)
+                if not data:
+                    selector.unregister(key.fileobj)
+                    key.fileobj.close()
+                elif key.fileobj is proc.stdout:
+                    read += len(data)
+                    if read > output_limit:
+                        output_exceeded = True
+                    elif sink(data) is False:
+                        stopped = True
+                else:
+                    stderr_tail = (stderr_tail + data)[-stderr_limit:]
+    finally:
+        selector.close()
+
+    if not (timed_out or output_exceeded or stopped):
+        try:
+            proc.wait(timeout=max(deadline - time.monotonic(), 0))
+        except subprocess.TimeoutExpired:
+            # Cerró sus pipes pero sigue ejecutándose
+            timed_out = True
+
+    if proc.returncode is None:
+        _kill_group(proc)
+        proc.wait()
+    for pipe in (proc.stdin, proc.stdout, proc.stderr):
+        if not pipe.closed:
+            pipe.close()
+    return timed_out, output_exceeded, stderr_tail
+
+
+def _kill_group(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
@@ -0,0 +1,23 @@
+# Backend/src/judge/verdicts.py
+import os
+
+# Valores de ESTADO_RESPUESTA.nombre_estado
+PENDIENTE = 'Pendiente'
+ACEPTADO = 'Aceptado'
+RECHAZADO = 'Rechazado'
+ERROR_COMPILACION = 'Error de Compilación'
+LIMITE_TIEMPO = 'Límite de Tiempo Excedido'
+# Estado final de una respuesta que el juez no pudo evaluar en JUDGE_MAX_RETRIES intentos
+ERROR_JUEZ = 'Error del Juez'
+
+# Puntaje de un reto aceptado según su dificultad (DIFICULTAD.nombre_dificultad)
+PUNTAJE_POR_DIFICULTAD = {
+    'Fácil': int(os.environ.get('JUDGE_PUNTAJE_FACIL', 10)),
+    'Medio': int(os.environ.get('JUDGE_PUNTAJE_MEDIO', 20)),
+    'Difícil': int(os.environ.get('JUDGE_PUNTAJE_DIFICIL', 30)),
+}
+PUNTAJE_POR_DEFECTO = 10
+
+
+def puntaje_maximo(nombre_dificultad):
+    return PUNTAJE_POR_DIFICULTAD.get(nombre_dificultad, PUNTAJE_POR_DEFECTO)
@@ -0,0 +1,298 @@
+# Backend/src/judge/zygote.py
+'''
+Runner "zygote" de Python para el juez.
+
+Se ejecuta como proceso independiente (python -I -B zygote.py <directorio>)
+con el intérprete y los módulos más usados ya cargados. Recibe trabajos
+(código fuente, stdin y límites) por su stdin y, por cada uno, hace fork de
+un hijo que aplica los límites y ejecuta el código como __main__. Como cada
+ejecución ocurre en un fork, el estado del zygote nunca se ensucia; entre
+trabajos sólo se limpia el directorio de trabajo.
+
+Sólo usa la librería estándar: no puede importar nada del paquete src.
+'''
+import json
+import os
+import select
+import shutil
+import signal
+import struct
+import sys
+import time
+
+# Módulos precargados: los hijos los heredan ya importados
+import bisect, collections, functools, heapq, itertools, math, re, string  # noqa: E401,F401
+
+_HEADER = struct.Struct('>I')
+_CHUNK = 64 * 1024
+
+# Hijo en ejecución (para poder cancelarlo con SIGUSR1 desde el juez)
+_current = {'pid': None}
+
+
+# =============================================================================
+# Protocolo: [4 bytes longitud][cabecera JSON][payload binario]
+# =============================================================================
+def read_exact(fd, n):
+    chunks = []
+    while n:
+        chunk = os.read(fd, n)
+        if not chunk:
+            raise EOFError("El otro extremo cerró la conexión")
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b''.join(chunks)
+
+
+def write_all(fd, data):
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def send_frame(fd, header, *payloads):
+    encoded = json.dumps(header).encode('utf-8')
+    write_all(fd, _HEADER.pack(len(encoded)) + encoded)
+    # Sin concatenar: una entrada grande (o mapeada en memoria) no se copia
+    for payload in payloads:
+        if len(payload):
+            write_all(fd, payload)
+
+
+def read_frame(fd):
+    """ Devuelve la cabecera; los payloads se leen aparte con read_exact. """
+    (length,) = _HEADER.unpack(read_exact(fd, _HEADER.size))
+    return json.loads(read_exact(fd, length).decode('utf-8'))
+
+
+# =============================================================================
+# Ejecución de un trabajo
+# =============================================================================
+def _rss_kb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * (os.sysconf('SC_PAGE_SIZE') // 1024)
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _child(code, workdir, job):
+    """ Proceso hijo: límites, redirecciones y ejecución del código. Nunca retorna. """
+    import resource
+    try:
+        os.setsid()
+        os.chdir(workdir)
+
+        stdin_fd = os.open('stdin.txt', os.O_RDONLY)
+        stdout_fd = os.open('stdout.txt', os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        stderr_fd = os.open('stderr.txt', os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        for fd, target in ((stdin_fd, 0), (stdout_fd, 1), (stderr_fd, 2)):
+            os.dup2(fd, target)
+            os.close(fd)
+
+        cpu = int(job['time_limit']) + 2
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (job['output_limit'], job['output_limit']))
+        if job.get('memory_limit_mb'):
+            limit = job['memory_limit_mb'] * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+        # Los objetos de sys.std* del zygote apuntan al protocolo: se recrean
+        sys.stdin = sys.__stdin__ = open(0, 'r', encoding='utf-8', closefd=False)
+        sys.stdout = sys.__stdout__ = open(1, 'w', encoding='utf-8', closefd=False)
+        sys.stderr = sys.__stderr__ = open(2, 'w', encoding='utf-8', closefd=False)
+        sys.argv = ['main.py']
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGUSR1, signal.SIG_DFL)
+        # Python ignora SIGXFSZ por defecto: así superar el límite de salida termina el programa
+        signal.signal(signal.SIGXFSZ, signal.SIG_DFL)
+    except BaseException:
+        os._exit(120)
+
+    exit_code = 0
+    try:
+        exec(code, {'__name__': '__main__', '__file__': 'main.py', '__builtins__': __builtins__})
+    except SystemExit as e:
+        if e.code is None:
+            exit_code = 0
+        elif isinstance(e.code, int):
+            exit_code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+        exit_code = 1
+
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    except BaseException:
+        exit_code = exit_code or 1
+    os._exit(exit_code & 0xFF)
+
+
+def _cancel_current(signum, frame):
+    """ SIGUSR1: el juez ya no necesita el resultado del hijo en curso. """
+    pid = _current['pid']
+    if pid is None:
+        return
+    for kill in (os.killpg, os.kill):
+        try:
+            kill(pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+def _wait_with_timeout(pid, time_limit):
+    """ Espera al hijo con límite de tiempo real. Devuelve (status, rusage, timed_out). """
+    deadline = time.monotonic() + time_limit
+    timed_out = False
+    pidfd = None
+    if hasattr(os, 'pidfd_open'):
+        try:
+            pidfd = os.pidfd_open(pid)
+        except OSError:
+            pidfd = None
+
+    try:
+        while True:
+            waited, status, rusage = os.wait4(pid, os.WNOHANG)
+            if waited == pid:
+                return status, rusage, timed_out
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 and not timed_out:
+                timed_out = True
+                try:
+                    os.killpg(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                _, status, rusage = os.wait4(pid, 0)
+                return status, rusage, timed_out
+            if pidfd is not None:
+                select.select([pidfd], [], [], max(remaining, 0))
+            else:
+                time.sleep(min(0.001, max(remaining, 0)))
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
+
+
+def _read_tail(path, limit):
+    try:
+        with open(path, 'rb') as f:
+            f.seek(max(os.path.getsize(path) - limit, 0))
+            return f.read(limit)
+    except OSError:
+        return b''
+
+
+def _stream_file(fd, path, length):
+    """ Envía los primeros `length` bytes de path por fd en trozos (sin cargarlo entero). """
+    if not length:
+        return
+    with open(path, 'rb') as f:
+        while length:
+            chunk = f.read(min(length, _CHUNK))
+            if not chunk:
+                break
+            write_all(fd, chunk)
+            length -= len(chunk)
+        # Si el archivo se acortó, se completa para no desincronizar el protocolo
+        if length:
+            write_all(fd, b'\0' * length)
+
+
+def _clean(workdir):
+    for name in os.listdir(workdir):
+        path = os.path.join(workdir, name)
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+def run_job(job, source, stdin_data, workdir, compiled_cache):
+    # El mismo código se envía una vez por caso de prueba: se compila una sola vez.
+    # La clave es el código mismo (el dict compara los bytes al coincidir el hash):
+    # con hash(source) una colisión ejecutaría el código de otra respuesta
+    key = source
+    code = compiled_cache.get(key)
+    if code is None:
+        try:
+            code = compile(source.decode('utf-8', 'replace'), 'main.py', 'exec', dont_inherit=True)
+        except (SyntaxError, ValueError) as e:
+            import traceback
+            stderr = ''.join(traceback.format_exception_only(type(e), e)).encode('utf-8')
+            return {'exit_code': 1, 'tiempo_ms': 0, 'cpu_ms': 0, 'peak_rss_kb': 0,
+                    'timed_out': False, 'output_exceeded': False, 'stdout_len': 0}, stderr
+        compiled_cache.clear()
+        compiled_cache[key] = code
+
+    with open(os.path.join(workdir, 'stdin.txt'), 'wb') as f:
+        f.write(stdin_data)
+
+    start = time.monotonic()
+    pid = os.fork()
+    if pid == 0:
+        _child(code, workdir, job)
+    _current['pid'] = pid
+    try:
+        status, rusage, timed_out = _wait_with_timeout(pid, job['time_limit'])
+    finally:
+        _current['pid'] = None
+    tiempo_ms = int((time.monotonic() - start) * 1000)
+
+    if os.WIFSIGNALED(status):
+        exit_code = -os.WTERMSIG(status)
+        if exit_code == -signal.SIGXCPU:
+            timed_out = True
+    else:
+        exit_code = os.WEXITSTATUS(status)
+
+    # La salida queda en stdout.txt y se envía en trozos (ver serve)
+    try:
+        stdout_size = os.path.getsize(os.path.join(workdir, 'stdout.txt'))
+    except OSError:
+        stdout_size = 0
+
+    return {
+        'exit_code': exit_code,
+        'tiempo_ms': tiempo_ms,
+        'cpu_ms': int((rusage.ru_utime + rusage.ru_stime) * 1000),
+        'peak_rss_kb': rusage.ru_maxrss,
+        'timed_out': timed_out,
+        # SIGXFSZ = el programa superó el límite de tamaño de salida (RLIMIT_FSIZE)
+        'output_exceeded': exit_code == -signal.SIGXFSZ or stdout_size >= job['output_limit'],
+        'stdout_len': min(stdout_size, job['output_limit']),
+    }, _read_tail(os.path.join(workdir, 'stderr.txt'), 4096)
+
+
+def serve(workdir):
+    signal.signal(signal.SIGUSR1, _cancel_current)
+    compiled_cache = {}
+    send_frame(1, {'ready': True, 'pid': os.getpid(), 'runner_rss_kb': _rss_kb()})
+    while True:
+        try:
+            job = read_frame(0)
+        except EOFError:
+            return
+        source = read_exact(0, job['source_len'])
+        stdin_data = read_exact(0, job['stdin_len'])
+        result, stderr = run_job(job, source, stdin_data, workdir, compiled_cache)
+        result['stderr_len'] = len(stderr)
+        result['runner_rss_kb'] = _rss_kb()
+        # [cabecera][stderr][stdout en trozos]
+        send_frame(1, result, stderr)
+        _stream_file(1, os.path.join(workdir, 'stdout.txt'), result['stdout_len'])
+        _clean(workdir)
+
+
+if __name__ == '__main__':
+    serve(sys.argv[1])
@@ -0,0 +1,90 @@
+# Backend/src/models/catalogoModels/catalogoModel.py
+from ...database.db import get_db_connection
+from ...services.catalogRegistry import catalog_registry, CATALOGOS
+
+
+class CatalogoModel:
+
+    @classmethod
+    def registry(cls):
+        """ Registro de catálogos en memoria, cargado (y verificado) si hace falta. """
+        catalog_registry.ensure_loaded(cls.get_snapshot, cls.get_version)
+        return catalog_registry
+
+    @classmethod
+    def refresh(cls):
+        catalog_registry.refresh(cls.get_snapshot)
+        return catalog_registry
+
+    # =====================================================================
+    #  Lectura de los catálogos
+    # =====================================================================
+    @classmethod
+    def get_snapshot(cls):
+        """ Todos los catálogos y RETO_LENGUAJE, con su versión, para cargar el registro. """
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("Sin respuesta de la base de datos")
+
+        cursor = conn.cursor(dictionary=True)
+        try:
+            snapshot = {'version': cls._read_version(cursor)}
+            for catalogo, (tabla, columna_id, columna_nombre) in CATALOGOS.items():
+                extra = ", version" if tabla == 'LENGUAJE' else ""
+                cursor.execute(f"SELECT {columna_id}, {columna_nombre}{extra} FROM {tabla}")
+                snapshot[catalogo] = cursor.fetchall()
+
+            cursor.execute("SELECT id_reto, id_lenguaje FROM RETO_LENGUAJE")
+            snapshot['reto_lenguaje'] = [(row['id_reto'], row['id_lenguaje']) for row in cursor.fetchall()]
+            return snapshot
+        except Exception as e:
+            print(f"Error al ejecutar consulta en get_snapshot: {e}")
+            raise Exception("Error interno al cargar los catálogos")
+        finally:
+            cursor.close()
+            conn.close()
+
+    @classmethod
+    def get_version(cls):
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("Sin respuesta de la base de datos")
+
+        cursor = conn.cursor(dictionary=True)
+        try:
+            return cls._read_version(cursor)
+        except Exception as e:
+            print(f"Error al ejecutar consulta en get_version: {e}")
+            raise Exception("Error interno al verificar la versión de los catálogos")
+        finally:
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    def _read_version(cursor):
+        """
+        Huella de los catálogos: número de filas y suma de CRC32 de cada tabla.
+        Cambia con cualquier alta, baja o renombre, sin columnas de versión.
+        """
+        partes = [
+            f"(SELECT CONCAT(COUNT(*), ':', COALESCE(SUM(CRC32(CONCAT_WS('|', {columna_id}, {columna_nombre}))), 0)) "
+            f"FROM {tabla}) AS {catalogo}"
+            for catalogo, (tabla, columna_id, columna_nombre) in CATALOGOS.items()
+        ]
+        partes.append(
+            "(SELECT CONCAT(COUNT(*), ':', COALESCE(SUM(CRC32(CONCAT_WS('|', id_reto, id_lenguaje))), 0)) "
+            "FROM RETO_LENGUAJE) AS reto_lenguaje"
+        )
+        cursor.execute("SELECT " + ", ".join(partes))
+        fila = cursor.fetchone()
+        return '/'.join(str(fila[k]) for k in (*CATALOGOS, 'reto_lenguaje'))
+
+    @staticmethod
+    def get_reto_lenguajes(cursor, id_reto):
+        """ Lenguajes de un reto que aún no está en el registro (ej. creado por otro proceso). """
+        cursor.execute("SELECT id_lenguaje FROM RETO_LENGUAJE WHERE id_reto = %s", (id_reto,))
+        filas = cursor.fetchall()
+        ids = {fila['id_lenguaje'] if isinstance(fila, dict) else fila[0] for fila in filas}
+        if ids:
+            catalog_registry.set_reto_lenguajes(id_reto, ids)
+        return frozenset(ids)
@@ -1,6 +1,9 @@
 # Backend/src/models/publicacionModel.py
 import mysql
-from ...database.db import get_db_connection
+from contextlib import contextmanager
+from ...database.db import get_db_connection, on_commit
+from ...services.reactionCounters import reaction_counters
+from ..catalogoModels.catalogoModel import CatalogoModel
 from datetime import datetime
 
 class PublicacionModel:
@@ -35,16 +38,33 @@ class PublicacionModel:
             conn.close()
 
     @classmethod
-    def get_all_posts(cls, page=1, per_page=10):
-        """ Obtiene un 'feed' de publicaciones, uniendo con el autor """
+    def get_all_posts(cls, page=1, per_page=10, after=None, id_persona=None):
+        """
+        Obtiene un 'feed' de publicaciones, uniendo con el autor.
+        `after` = (fecha, id_publicacion) de la última publicación vista:
+        el feed no se desplaza aunque lleguen publicaciones nuevas.
+
+        Cada publicación trae sus reacciones por tipo, su número de
+        comentarios y la reacción de `id_persona` (ver _attach_counts): la
+        página cuesta siempre dos consultas, sin importar cuántas trae.
+        """
         conn = get_db_connection()
         if conn is None:
             raise Exception("Sin respuesta de la base de datos")
         
         cursor = conn.cursor(dictionary=True)
         try:
-            offset = (page - 1) * per_page
-            query = """
+            if after is not None:
+                fecha, id_publicacion = after
+                seek = "WHERE p.fecha < %s OR (p.fecha = %s AND p.id_publicacion < %s)"
+                params = (fecha, fecha, id_publicacion, per_page)
+                limit = "LIMIT %s"
+            else:
+                seek = ""
+                params = (per_page, (page - 1) * per_page)
+                limit = "LIMIT %s OFFSET %s"
+
+            query = f"""
                 SELECT 
                     p.id_publicacion, 
                     p.contenido, 
@@ -53,11 +73,13 @@ class PublicacionModel:
                     per.nombre_usuario
                 FROM PUBLICACION p
                 JOIN PERSONA per ON p.id_persona = per.id_persona
-                ORDER BY p.fecha DESC
-                LIMIT %s OFFSET %s
+                {seek}
+                ORDER BY p.fecha DESC, p.id_publicacion DESC
+                {limit}
             """
-            cursor.execute(query, (per_page, offset))
+            cursor.execute(query, params)
             posts = cursor.fetchall()
+            cls._attach_counts(cursor, posts, id_persona)
             return posts, 200
         except Exception as e:
             print(f"Error en get_all_posts: {e}")
@@ -67,9 +89,10 @@ class PublicacionModel:
             conn.close()
 
     @classmethod
-    def get_post_by_id(cls, id_publicacion):
+    def get_post_by_id(cls, id_publicacion, id_persona=None):
         """ 
-        Obtiene una publicación, su autor, sus comentarios y sus reacciones.
+        Obtiene una publicación, su autor, sus comentarios y sus reacciones
+        (con la de `id_persona`, si se indica).
         Esta es una consulta más compleja.
         """
         conn = get_db_connection()
@@ -107,18 +130,8 @@ class PublicacionModel:
             cursor.execute(query_comments, (id_publicacion,))
             post['comentarios'] = cursor.fetchall()
 
-            # 3. Obtener el conteo de reacciones
-            query_reactions = """
-                SELECT 
-                    tr.id_tipo_reaccion, 
-                    tr.nombre_reaccion, 
-                    COUNT(r.id_persona) AS conteo
-                FROM TIPO_REACCION tr
-                LEFT JOIN REACCION r ON tr.id_tipo_reaccion = r.id_tipo_reaccion AND r.id_publicacion = %s
-                GROUP BY tr.id_tipo_reaccion, tr.nombre_reaccion
-            """
-            cursor.execute(query_reactions, (id_publicacion,))
-            post['reacciones'] = cursor.fetchall()
+            # 3. Obtener el conteo de reacciones (mismo cálculo que el feed)
+            cls._attach_counts(cursor, [post], id_persona)
 
             return post, 200
 
@@ -129,6 +142,68 @@ class PublicacionModel:
             cursor.close()
             conn.close()
 
+    @staticmethod
+    def _attach_counts(cursor, posts, id_persona=None):
+        """
+        Agrega a cada publicación `reacciones` (conteo por tipo), `total_reacciones`,
+        `num_comentarios` y `mi_reaccion` (id_tipo_reaccion de id_persona o None)
+        con una sola consulta para todas: la página no hace una consulta por
+        publicación. Los nombres y los tipos sin reacciones salen del registro
+        de catálogos, sin JOIN.
+
+        Los conteos salen de REACCION_CONTEO (más lo que este proceso aún no
+        escribió, ver services/reactionCounters.py), no de agregar REACCION:
+        el costo no crece con las reacciones de la publicación.
+        """
+        if not posts:
+            return
+        ids = [post['id_publicacion'] for post in posts]
+        placeholders = ','.join(['%s'] * len(ids))
+        # Todas por PK: REACCION_CONTEO y REACCION (id_publicacion, ...);
+        # COMENTARIO por idx_comentario_publicacion_fecha
+        cursor.execute(f"""
+            SELECT 'r' AS origen, id_publicacion, id_tipo_reaccion, conteo
+            FROM REACCION_CONTEO
+            WHERE id_publicacion IN ({placeholders})
+            UNION ALL
+            SELECT 'm', id_publicacion, id_tipo_reaccion, 1
+            FROM REACCION
+            WHERE id_persona = %s AND id_publicacion IN ({placeholders})
+            UNION ALL
+            SELECT 'c', id_publicacion, NULL, COUNT(*)
+            FROM COMENTARIO
+            WHERE id_publicacion IN ({placeholders})
+            GROUP BY id_publicacion
+        """, (*ids, id_persona or 0, *ids, *ids))
+
+        conteos, comentarios, mias = {}, {}, {}
+        for fila in cursor.fetchall():
+            id_publicacion = fila['id_publicacion']
+            if fila['origen'] == 'c':
+                comentarios[id_publicacion] = fila['conteo']
+            elif fila['origen'] == 'm':
+                mias[id_publicacion] = fila['id_tipo_reaccion']
+            else:
+                conteos[(id_publicacion, fila['id_tipo_reaccion'])] = fila['conteo']
+        for key, delta in reaction_counters.pending(ids).items():
+            conteos[key] = conteos.get(key, 0) + delta
+
+        tipos = CatalogoModel.registry().rows('tipo_reaccion')
+        for post in posts:
+            id_publicacion = post['id_publicacion']
+            post['reacciones'] = [
+                {
+                    "id_tipo_reaccion": tipo['id_tipo_reaccion'],
+                    "nombre_reaccion": tipo['nombre_reaccion'],
+                    # Puede quedar negativo un instante si otro proceso escribió antes un -1
+                    "conteo": max(0, conteos.get((id_publicacion, tipo['id_tipo_reaccion']), 0)),
+                }
+                for tipo in tipos
+            ]
+            post['total_reacciones'] = sum(r['conteo'] for r in post['reacciones'])
+            post['num_comentarios'] = comentarios.get(id_publicacion, 0)
+            post['mi_reaccion'] = mias.get(id_publicacion)
+
     # =====================================================================
     #  MÉTODOS PARA COMENTARIOS
     # =====================================================================
@@ -168,6 +243,9 @@ class PublicacionModel:
         Crea o actualiza una reacción (Upsert).
         Un usuario solo puede tener una reacción por publicación.
         """
+        if CatalogoModel.registry().nombre_of('tipo_reaccion', id_tipo_reaccion) is None:
+            return {"error": "La publicación o el tipo de reacción no existe"}, 404
+
         conn = get_db_connection()
         if conn is None:
             raise Exception("No se pudo conectar a la base de datos")
@@ -175,20 +253,26 @@ class PublicacionModel:
         try:
             # INSERT ... ON DUPLICATE KEY UPDATE
             # Intenta insertar. Si la llave (id_publicacion, id_persona) ya existe,
-            # actualiza el id_tipo_reaccion.
+            # actualiza el id_tipo_reaccion. LAST_INSERT_ID(<tipo anterior>) devuelve
+            # en lastrowid el tipo reemplazado (0 si se insertó): el cambio en los
+            # contadores es exacto aunque la misma persona reaccione dos veces a la
+            # vez, y sin lecturas con bloqueo previas
             query = """
                 INSERT INTO REACCION (id_publicacion, id_persona, id_tipo_reaccion)
                 VALUES (%s, %s, %s)
                 ON DUPLICATE KEY UPDATE
-                    id_tipo_reaccion = %s
+                    id_tipo_reaccion = %s + 0 * LAST_INSERT_ID(id_tipo_reaccion)
             """
             cursor.execute(query, (id_publicacion, id_persona, id_tipo_reaccion, id_tipo_reaccion))
+            tipo_anterior = cursor.lastrowid or None
             conn.commit()
-            
-            # rowcount 1 = insertado, rowcount 2 = actualizado
-            if cursor.rowcount == 1:
+
+            if tipo_anterior is None:
+                on_commit(lambda: reaction_counters.add(id_publicacion, id_tipo_reaccion, 1))
                 return {"message": "Reacción creada"}, 201
-            elif cursor.rowcount == 2:
+            elif tipo_anterior != id_tipo_reaccion:
+                on_commit(lambda: reaction_counters.add(id_publicacion, tipo_anterior, -1))
+                on_commit(lambda: reaction_counters.add(id_publicacion, id_tipo_reaccion, 1))
                 return {"message": "Reacción actualizada"}, 200
             else:
                 return {"message": "Reacción sin cambios"}, 200
@@ -210,6 +294,15 @@ class PublicacionModel:
         if conn is None: raise Exception("No se pudo conectar")
         cursor = conn.cursor()
         try:
+            # Bloquea la fila para saber qué tipo se descuenta de los contadores
+            cursor.execute(
+                "SELECT id_tipo_reaccion FROM REACCION WHERE id_publicacion = %s AND id_persona = %s FOR UPDATE",
+                (id_publicacion, id_persona)
+            )
+            fila = cursor.fetchone()
+            if fila is None:
+                return {"error": "Reacción no encontrada para eliminar"}, 404
+
             query = "DELETE FROM REACCION WHERE id_publicacion = %s AND id_persona = %s"
             cursor.execute(query, (id_publicacion, id_persona))
             conn.commit()
@@ -217,6 +310,8 @@ class PublicacionModel:
             if cursor.rowcount == 0:
                 return {"error": "Reacción no encontrada para eliminar"}, 404
             
+            tipo_anterior = fila[0]
+            on_commit(lambda: reaction_counters.add(id_publicacion, tipo_anterior, -1))
             return {"message": "Reacción eliminada"}, 200
 
         except Exception as e:
@@ -225,4 +320,124 @@ class PublicacionModel:
             raise Exception("Error interno al eliminar reacción")
         finally:
             cursor.close()
-            conn.close()
\ No newline at end of file
+            conn.close()
+
+    # =====================================================================
+    #  CONTADORES DE REACCIONES (REACCION_CONTEO, escritura diferida)
+    # =====================================================================
+    @classmethod
+    def apply_reaction_deltas(cls, deltas):
+        """
+        Suma {(id_publicacion, id_tipo_reaccion): n} a REACCION_CONTEO en una
+        transacción. Las filas se escriben ordenadas por clave: dos procesos
+        que escriben a la vez bloquean en el mismo orden (sin deadlocks).
+        """
+        if cls._write_reaction_deltas(deltas):
+            return
+        # Alguna publicación se eliminó: se reintenta clave por clave (una sola
+        # vez, sin recursión) y sólo se descartan las que vuelven a fallar
+        for key, delta in sorted(deltas.items()):
+            if len(deltas) == 1 or not cls._write_reaction_deltas({key: delta}):
+                print(f"Contador de reacciones {key} descartado: la publicación ya no existe")
+
+    @classmethod
+    def _write_reaction_deltas(cls, deltas):
+        """ Una transacción con los incrementos. False si alguna publicación no existe (FK). """
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("No se pudo conectar a la base de datos")
+        cursor = conn.cursor()
+        try:
+            conn.start_transaction()
+            cursor.executemany("""
+                INSERT INTO REACCION_CONTEO (id_publicacion, id_tipo_reaccion, conteo)
+                VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE conteo = conteo + VALUES(conteo)
+            """, [(id_publicacion, id_tipo, delta) for (id_publicacion, id_tipo), delta in sorted(deltas.items())])
+            conn.commit()
+            return True
+        except mysql.connector.Error as err:
+            conn.rollback()
+            if err.errno == 1452:
+                return False
+            print(f"Error en apply_reaction_deltas: {err}")
+            raise Exception(f"Error interno al escribir contadores de reacciones: {err}")
+        finally:
+            cursor.close()
+            conn.close()
+
+    @classmethod
+    def reaction_reconciler(cls):
+        """ Acceso a la BD que necesita reaction_counters.reconcile(). """
+        return _ReactionReconciler
+
+
+class _ReactionReconciler:
+
+    @staticmethod
+    def drift(desde, hasta):
+        """
+        {(id_publicacion, id_tipo_reaccion): COUNT(*) de REACCION - conteo} de las
+        publicaciones con id en (desde, hasta], sólo las que no coinciden.
+        """
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("Sin respuesta de la base de datos")
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT id_publicacion, id_tipo_reaccion, SUM(n) AS diferencia
+                FROM (
+                    SELECT id_publicacion, id_tipo_reaccion, COUNT(*) AS n
+                    FROM REACCION
+                    WHERE id_publicacion > %s AND id_publicacion <= %s
+                    GROUP BY id_publicacion, id_tipo_reaccion
+                    UNION ALL
+                    SELECT id_publicacion, id_tipo_reaccion, -conteo
+                    FROM REACCION_CONTEO
+                    WHERE id_publicacion > %s AND id_publicacion <= %s
+                ) x
+                GROUP BY id_publicacion, id_tipo_reaccion
+                HAVING SUM(n) <> 0
+            """, (desde, hasta, desde, hasta))
+            return {(fila[0], fila[1]): int(fila[2]) for fila in cursor.fetchall()}
+        except Exception as e:
+            print(f"Error al ejecutar consulta en drift: {e}")
+            raise Exception("Error interno al comparar contadores de reacciones")
+        finally:
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    def max_post_id():
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("Sin respuesta de la base de datos")
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT MAX(id_publicacion) FROM PUBLICACION")
+            return cursor.fetchone()[0]
+        finally:
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    @contextmanager
+    def lock():
+        """ Lock con nombre de MySQL: una sola reconciliación a la vez entre todos los procesos. """
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("Sin respuesta de la base de datos")
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT GET_LOCK('codium_reconciliar_reacciones', 0)")
+            adquirido = cursor.fetchone()[0] == 1
+            try:
+                yield adquirido
+            finally:
+                if adquirido:
+                    cursor.execute("SELECT RELEASE_LOCK('codium_reconciliar_reacciones')")
+                    cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
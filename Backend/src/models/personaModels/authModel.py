@@ -1,6 +1,7 @@
 import mysql
-from ...database.db import get_db_connection
-from werkzeug.security import generate_password_hash, check_password_hash
+from ...database.db import get_db_connection, on_commit
+from ...services.passwordHasher import password_hasher
+from ...services.rankingIndex import ranking_index
 
 
 class authModel:
@@ -46,6 +47,10 @@ class authModel:
                           token_refresco = None,
                           id_rol = 2):
 
+        # El hash (costoso en CPU) se calcula en el pool de procesos y antes de
+        # ocupar una conexión. Si el pool está saturado lanza HasherOverloadedError.
+        hashed_password = password_hasher.hash(contrasena_plana)
+
         conn = get_db_connection()
         if conn is None:
             raise Exception("No se pudo conectar a la base de datos")
@@ -53,8 +58,6 @@ class authModel:
         cursor = conn.cursor()
         
         try:
-            hashed_password = generate_password_hash(contrasena_plana)
-            
             query = """
                 INSERT INTO persona (nombre, apellidos, correo, contraseña_hash, nombre_usuario, token_refresco, id_rol)
                 VALUES (%s, %s, %s, %s, %s, %s, %s)
@@ -65,6 +68,7 @@ class authModel:
             new_person_id = cursor.lastrowid
             
             conn.commit()
+            on_commit(lambda: ranking_index.upsert(new_person_id, nombre_usuario, 0, 0))
             
             
             return {"message": "Persona creada exitosamente", "id_persona": new_person_id}, 201
@@ -1,28 +1,53 @@
 import mysql
-from ...database.db import get_db_connection
+from ...database.db import get_db_connection, on_commit
+from ...cache.identityCache import identity_cache
+from ...services.rankingIndex import ranking_index
 
 
+def _invalidate_identity(id_persona):
+    """
+    Saca a la persona de la caché de identidades de inmediato y otra vez
+    al confirmarse la transacción (evita que una lectura concurrente la
+    vuelva a cachear con los datos anteriores).
+    """
+    identity_cache.invalidate(id_persona)
+    on_commit(lambda: identity_cache.invalidate(id_persona))
+
 
 class PersonaModel:
 
 
     @classmethod
-    def get_all_persons(cls, page=1, per_page=20):
+    def get_all_persons(cls, page=1, per_page=20, after=None):
+        """
+        Lista paginada de personas activas por id_persona.
+        Con `after` (id_persona de la última fila vista) se usa paginación
+        por cursor: la consulta salta directo por la PK en lugar de usar OFFSET.
+        """
         conn = get_db_connection()
         if conn is None:
             raise Exception("Sin respuesta de la base de datos")
         
         cursor = conn.cursor(dictionary=True)
         try:
-            offset = (page - 1) * per_page
-            query = """
+            if after is not None:
+                seek = "AND id_persona > %s"
+                params = (after[0], per_page)
+                limit = "LIMIT %s"
+            else:
+                seek = ""
+                params = (per_page, (page - 1) * per_page)
+                limit = "LIMIT %s OFFSET %s"
+
+            query = f"""
                 SELECT id_persona, nombre, apellidos, correo, nombre_usuario, 
                        num_retos_resueltos, puntaje_total, id_rol 
                 FROM PERSONA
-                WHERE esta_activo = TRUE
-            LIMIT %s OFFSET %s
+                WHERE esta_activo = TRUE {seek}
+                ORDER BY id_persona ASC
+            {limit}
             """
-            cursor.execute(query, (per_page, offset))
+            cursor.execute(query, params)
             personas = cursor.fetchall()
             return personas
         except Exception as e:
@@ -163,6 +188,9 @@ class PersonaModel:
                 return {"error": "Persona no encontrada o inactiva"}, 404
             
             conn.commit()
+            _invalidate_identity(id_persona)
+            if 'nombre_usuario' in update_data:
+                on_commit(lambda: ranking_index.rename(id_persona, update_data['nombre_usuario']))
             # 12. CORREGIDO: Devolver diccionario
             return {"message": "Persona actualizada"}, 200
 
@@ -202,6 +230,8 @@ class PersonaModel:
                 return {"error": "Persona no encontrada"}, 404
             
             conn.commit()
+            _invalidate_identity(id_persona)
+            on_commit(lambda: ranking_index.remove(id_persona))
             # 17. CORREGIDO: Devolver diccionario
             return {"message": "Persona desactivada"}, 200
 
@@ -236,6 +266,30 @@ class PersonaModel:
             conn.close()
 
 
+    @classmethod
+    def update_password_hash(cls, id_persona, password_hash):
+        """
+        Reemplaza el hash de la contraseña (rehash al cambiar los parámetros de hashing).
+        """
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("No se pudo conectar a la base de datos")
+
+        cursor = conn.cursor()
+        try:
+            query = "UPDATE persona SET contraseña_hash = %s WHERE id_persona = %s"
+            cursor.execute(query, (password_hash, id_persona))
+            conn.commit()
+            return cursor.rowcount > 0
+        except Exception as e:
+            print(f"Error al ejecutar consulta en update_password_hash: {e}")
+            conn.rollback()
+            raise Exception("Error interno al actualizar la contraseña")
+        finally:
+            cursor.close()
+            conn.close()
+
+
     @classmethod
     def get_person_by_email(cls, correo):
         conn = get_db_connection()
@@ -263,35 +317,126 @@ class PersonaModel:
 
 
     @classmethod
-    def get_ranking(cls, page=1, per_page=10):
+    def get_ranking(cls, page=1, per_page=10, after=None):
         """
         Obtiene la lista de usuarios ordenados por puntaje (ranking).
+        Se sirve desde el índice en memoria (O(log n) por posición); la
+        consulta a la base de datos queda como respaldo.
+        `after` = (puntaje_total, num_retos_resueltos, id_persona) de la
+        última fila vista, para paginación por cursor.
+        """
+        try:
+            ranking_index.ensure_loaded(cls.get_ranking_snapshot, cls.get_ranking_rows)
+            if after is not None:
+                return ranking_index.page_after(after, per_page)
+            return ranking_index.page(page, per_page)
+        except Exception as e:
+            print(f"Índice de ranking no disponible, se consulta la base de datos: {e}")
+            return cls._get_ranking_from_db(page, per_page, after)
+
+
+    @classmethod
+    def get_ranking_position(cls, id_persona):
+        """
+        Posición de una persona en el ranking ("mi posición").
+        Devuelve None si la persona no está activa.
+        """
+        ranking_index.ensure_loaded(cls.get_ranking_snapshot, cls.get_ranking_rows)
+        return ranking_index.position_of(id_persona)
+
+
+    @classmethod
+    def get_ranking_snapshot(cls):
         """
+        Lee el puntaje de todas las personas activas para (re)construir
+        el índice de ranking en memoria.
+        """
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("Sin respuesta de la base de datos")
+
+        cursor = conn.cursor(dictionary=True)
+        try:
+            query = """
+                SELECT id_persona, nombre_usuario, puntaje_total, num_retos_resueltos
+                FROM PERSONA
+                WHERE esta_activo = TRUE
+            """
+            cursor.execute(query)
+            return cursor.fetchall()
+        except Exception as e:
+            print(f"Error al ejecutar consulta en get_ranking_snapshot: {e}")
+            raise Exception("Error interno al cargar el ranking")
+        finally:
+            cursor.close()
+            conn.close()
+
+    @classmethod
+    def get_ranking_rows(cls, ids):
+        """ Como get_ranking_snapshot, sólo para esas personas (las inactivas no vienen). """
+        if not ids:
+            return []
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("Sin respuesta de la base de datos")
+
+        cursor = conn.cursor(dictionary=True)
+        try:
+            placeholders = ','.join(['%s'] * len(ids))
+            cursor.execute(f"""
+                SELECT id_persona, nombre_usuario, puntaje_total, num_retos_resueltos
+                FROM PERSONA
+                WHERE esta_activo = TRUE AND id_persona IN ({placeholders})
+            """, tuple(ids))
+            return cursor.fetchall()
+        except Exception as e:
+            print(f"Error al ejecutar consulta en get_ranking_rows: {e}")
+            raise Exception("Error interno al cargar el ranking")
+        finally:
+            cursor.close()
+            conn.close()
+
+
+    @classmethod
+    def _get_ranking_from_db(cls, page=1, per_page=10, after=None):
         conn = get_db_connection()
         if conn is None:
             raise Exception("Sin respuesta de la base de datos")
         
         cursor = conn.cursor(dictionary=True)
         try:
-            offset = (page - 1) * per_page
+            if after is not None:
+                # Búsqueda por clave (índice idx_persona_ranking) en lugar de OFFSET
+                puntaje, retos, id_persona = after
+                seek = """
+                    AND (puntaje_total < %s
+                         OR (puntaje_total = %s AND num_retos_resueltos < %s)
+                         OR (puntaje_total = %s AND num_retos_resueltos = %s AND id_persona > %s))
+                """
+                params = (puntaje, puntaje, retos, puntaje, retos, id_persona, per_page)
+                limit = "LIMIT %s"
+            else:
+                seek = ""
+                params = (per_page, (page - 1) * per_page)
+                limit = "LIMIT %s OFFSET %s"
             
             # Ordenamos por puntaje (desc), luego por retos resueltos (desc),
             # y finalmente por id (asc) para un orden consistente.
-            query = """
+            query = f"""
                 SELECT 
                     id_persona, 
                     nombre_usuario, 
                     puntaje_total, 
                     num_retos_resueltos
                 FROM PERSONA
-                WHERE esta_activo = TRUE
+                WHERE esta_activo = TRUE {seek}
                 ORDER BY 
                     puntaje_total DESC, 
                     num_retos_resueltos DESC, 
                     id_persona ASC
-                LIMIT %s OFFSET %s
+                {limit}
             """
-            cursor.execute(query, (per_page, offset))
+            cursor.execute(query, params)
             ranking = cursor.fetchall()
             return ranking
         
@@ -332,6 +477,8 @@ class PersonaModel:
                  return {"error": "Persona no encontrada"}, 404
                  
             conn.commit()
+            _invalidate_identity(id_persona)
+            on_commit(lambda: ranking_index.apply_delta(id_persona, puntaje_adicional, retos_adicionales))
             return {"message": "Puntaje actualizado (simulación de Juez)"}, 200
 
         except Exception as e:
@@ -2,55 +2,130 @@
 
 # Backend/src/models/respuestaModel.py
 import mysql
-from ...database.db import get_db_connection
+from ...database.db import get_db_connection, on_commit
+from ...cache.identityCache import identity_cache
+from ...cache.verdictCache import verdict_dedup, source_hash
+from ...cache.solvedCache import solved_cache
+from ...judge import verdicts
+from ...services.rankingIndex import ranking_index
+from ...services.submissionScheduler import submission_scheduler, SubmissionRejected
+from ..catalogoModels.catalogoModel import CatalogoModel
 from datetime import datetime
 
+# Veredictos reutilizables para reenvíos idénticos. 'Límite de Tiempo Excedido'
+# no se reutiliza: depende de la carga del juez y un reintento puede pasar.
+_ESTADOS_DEDUPLICABLES = (verdicts.ACEPTADO, verdicts.RECHAZADO, verdicts.ERROR_COMPILACION)
+
 class RespuestaModel:
 
     @classmethod
     def create_submission(cls, id_persona, id_reto, id_lenguaje, codigo_fuente):
-
+        """
+        Registra una respuesta 'Pendiente' para el juez. Si ya existe un
+        veredicto para el mismo código (normalizado), reto, lenguaje y versión
+        de los tests, la respuesta se guarda directamente con ese veredicto y
+        se acredita a la persona sin volver a ejecutar nada.
+        """
         conn = get_db_connection()
         if conn is None:
             raise Exception("No se pudo conectar a la base de datos")
 
         cursor = conn.cursor(dictionary=True)
 
-        # Asumimos que 'Pendiente' es el ID 5 (o el ID que te haya dado el INSERT)
-        # Sería mejor buscar el ID por nombre
-        query_estado = "SELECT id_estado FROM ESTADO_RESPUESTA WHERE nombre_estado = 'Pendiente'"
-        cursor.execute(query_estado)
-        estado = cursor.fetchone()
-        if not estado:
-            raise Exception("Estado 'Pendiente' no encontrado en la base de datos")
-        
-        id_estado_pendiente = estado['id_estado']
-
         try:
+            catalogos = CatalogoModel.registry()
+            estados = catalogos.ids('estado_respuesta')
+            if verdicts.PENDIENTE not in estados:
+                raise Exception("Estado 'Pendiente' no encontrado en la base de datos")
+
+            cursor.execute("SELECT version_tests FROM RETO WHERE id_reto = %s", (id_reto,))
+            reto = cursor.fetchone()
+            if not reto:
+                return {"error": "El reto o el lenguaje especificado no es válido"}, 400
+
+            permitidos = catalogos.lenguajes_de_reto(id_reto)
+            if permitidos is None:
+                permitidos = CatalogoModel.get_reto_lenguajes(cursor, id_reto)
+            if id_lenguaje not in permitidos:
+                return {"error": "El lenguaje especificado no está permitido para este reto"}, 400
+
+            hash_codigo = source_hash(codigo_fuente)
+            version_tests = reto['version_tests']
+
+            # 1. ¿Ya se evaluó exactamente este código para esta versión de los tests?
+            dedupables = [estados[n] for n in _ESTADOS_DEDUPLICABLES if n in estados]
+            veredicto = verdict_dedup.lookup(
+                (hash_codigo, id_reto, id_lenguaje, version_tests),
+                lambda: cls._find_verdict(cursor, id_reto, id_lenguaje, hash_codigo, version_tests, dedupables),
+            )
+
             query_insert = """
                 INSERT INTO RESPUESTA 
                     (codigo_fuente, fecha, puntaje, tiempo_ejecucion_ms, 
-                     id_persona, id_reto, id_lenguaje, id_estado)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                     id_persona, id_reto, id_lenguaje, id_estado, hash_codigo, version_tests)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             """
             
             fecha_ahora = datetime.utcnow()
-            
+
+            if veredicto is None:
+                # 2a. Código nuevo: queda 'Pendiente' para el juez, si la persona y la cola lo permiten
+                try:
+                    submission_scheduler.admit(cursor, id_persona, estados[verdicts.PENDIENTE])
+                except SubmissionRejected as rechazo:
+                    conn.rollback()
+                    return {"error": str(rechazo), "retry_after": rechazo.retry_after}, 429
+
+                cursor.execute(query_insert, (
+                    codigo_fuente,
+                    fecha_ahora,
+                    0,           # Puntaje inicial
+                    None,        # Tiempo de ejecución (aún no se sabe)
+                    id_persona,
+                    id_reto,
+                    id_lenguaje,
+                    estados[verdicts.PENDIENTE],
+                    hash_codigo,
+                    None         # Versión de los tests (se fija al evaluarla)
+                ))
+                new_submission_id = cursor.lastrowid
+                conn.commit()
+                return {"message": "Respuesta enviada para procesamiento", "id_respuesta": new_submission_id}, 201
+
+            # 2b. Reenvío idéntico: se guarda con el veredicto ya conocido
             cursor.execute(query_insert, (
                 codigo_fuente,
                 fecha_ahora,
-                0,           # Puntaje inicial
-                None,        # Tiempo de ejecución (aún no se sabe)
+                veredicto['puntaje'],
+                veredicto['tiempo_ejecucion_ms'],
                 id_persona,
                 id_reto,
                 id_lenguaje,
-                id_estado_pendiente
+                veredicto['id_estado'],
+                hash_codigo,
+                version_tests
             ))
-            
             new_submission_id = cursor.lastrowid
+            cambios = cls._credit_persona(cursor, id_persona, id_reto, new_submission_id,
+                                          veredicto['id_estado'], veredicto['puntaje'],
+                                          estados.get(verdicts.ACEPTADO))
             conn.commit()
-            
-            return {"message": "Respuesta enviada para procesamiento", "id_respuesta": new_submission_id}, 201
+
+            if cambios['delta_puntaje'] or cambios['delta_retos']:
+                on_commit(lambda: ranking_index.apply_delta(id_persona, cambios['delta_puntaje'], cambios['delta_retos']))
+                on_commit(lambda: identity_cache.invalidate(id_persona))
+            if cambios['delta_retos']:
+                on_commit(lambda: solved_cache.invalidate(id_persona))
+
+            nombres = {v: k for k, v in estados.items()}
+            return {
+                "message": "Respuesta evaluada (idéntica a un envío anterior)",
+                "id_respuesta": new_submission_id,
+                "estado": nombres.get(veredicto['id_estado']),
+                "puntaje": veredicto['puntaje'],
+                "tiempo_ejecucion_ms": veredicto['tiempo_ejecucion_ms'],
+                "deduplicada": True,
+            }, 201
 
         except mysql.connector.Error as err:
             conn.rollback()
@@ -65,4 +140,576 @@ class RespuestaModel:
             raise Exception(f"Error interno al crear la respuesta: {e}")
         finally:
             cursor.close()
-            conn.close()
\ No newline at end of file
+            conn.close()
+
+    @staticmethod
+    def _find_verdict(cursor, id_reto, id_lenguaje, hash_codigo, version_tests, ids_estado):
+        """ Veredicto de una respuesta ya evaluada con el mismo código y versión de tests. """
+        if not ids_estado:
+            return None
+        placeholders = ','.join(['%s'] * len(ids_estado))
+        cursor.execute(f"""
+            SELECT id_estado, puntaje, tiempo_ejecucion_ms
+            FROM RESPUESTA
+            WHERE id_reto = %s AND id_lenguaje = %s AND hash_codigo = %s
+              AND version_tests = %s AND id_estado IN ({placeholders})
+            ORDER BY id_respuesta DESC
+            LIMIT 1
+        """, (id_reto, id_lenguaje, hash_codigo, version_tests, *ids_estado))
+        return cursor.fetchone()
+
+    @staticmethod
+    def _credit_persona(cursor, id_persona, id_reto, id_respuesta, id_estado, puntaje, id_estado_aceptado):
+        """
+        Actualiza los contadores de la persona por el veredicto de id_respuesta
+        (dentro de la transacción de quien llama):
+          - puntaje_total sube sólo lo que esta respuesta mejora el mejor puntaje
+            previo de la persona en ese reto.
+          - num_retos_resueltos sube sólo con el primer 'Aceptado' del reto.
+        """
+        # Bloquear la fila de la persona serializa los veredictos de un mismo usuario
+        cursor.execute("SELECT id_persona FROM PERSONA WHERE id_persona = %s FOR UPDATE", (id_persona,))
+        cursor.fetchone()
+
+        cursor.execute("""
+            SELECT 
+                COALESCE(MAX(puntaje), 0) AS mejor_puntaje,
+                COALESCE(MAX(id_estado = %s), 0) AS ya_resuelto
+            FROM RESPUESTA
+            WHERE id_persona = %s AND id_reto = %s AND id_respuesta <> %s
+        """, (id_estado_aceptado, id_persona, id_reto, id_respuesta))
+        previo = cursor.fetchone()
+
+        delta_puntaje = max(0, puntaje - int(previo['mejor_puntaje']))
+        delta_retos = 1 if id_estado == id_estado_aceptado and not previo['ya_resuelto'] else 0
+
+        if delta_puntaje or delta_retos:
+            cursor.execute("""
+                UPDATE PERSONA
+                SET 
+                    puntaje_total = puntaje_total + %s,
+                    num_retos_resueltos = num_retos_resueltos + %s
+                WHERE id_persona = %s
+            """, (delta_puntaje, delta_retos, id_persona))
+
+        return {"id_persona": id_persona, "delta_puntaje": delta_puntaje, "delta_retos": delta_retos}
+
+    # =====================================================================
+    #  Estado de respuestas (eventos de veredicto)
+    # =====================================================================
+    @classmethod
+    def get_submission_statuses(cls, ids):
+        """ Estado actual de varias respuestas en una sola consulta. """
+        if not ids:
+            return []
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("Sin respuesta de la base de datos")
+
+        cursor = conn.cursor(dictionary=True)
+        try:
+            placeholders = ','.join(['%s'] * len(ids))
+            cursor.execute(f"""
+                SELECT res.id_respuesta, res.id_persona, e.nombre_estado, res.puntaje, res.tiempo_ejecucion_ms,
+                       res.motivo_error
+                FROM RESPUESTA res
+                JOIN ESTADO_RESPUESTA e ON res.id_estado = e.id_estado
+                WHERE res.id_respuesta IN ({placeholders})
+            """, tuple(ids))
+            return cursor.fetchall()
+        except Exception as e:
+            print(f"Error al ejecutar consulta en get_submission_statuses: {e}")
+            raise Exception("Error interno al consultar el estado de las respuestas")
+        finally:
+            cursor.close()
+            conn.close()
+
+    @classmethod
+    def get_solved_retos(cls, id_persona):
+        """ ids de los retos que la persona resolvió (con 'Aceptado'), desde la caché si está. """
+        resueltos = solved_cache.get(id_persona)
+        if resueltos is not None:
+            return resueltos
+
+        id_aceptado = CatalogoModel.registry().id_of('estado_respuesta', verdicts.ACEPTADO)
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("Sin respuesta de la base de datos")
+
+        cursor = conn.cursor()
+        try:
+            # Cubierta por idx_respuesta_persona_estado (id_persona, id_estado, id_reto)
+            cursor.execute(
+                "SELECT DISTINCT id_reto FROM RESPUESTA WHERE id_persona = %s AND id_estado = %s",
+                (id_persona, id_aceptado)
+            )
+            resueltos = frozenset(row[0] for row in cursor.fetchall())
+        except Exception as e:
+            print(f"Error al ejecutar consulta en get_solved_retos: {e}")
+            raise Exception("Error interno al consultar los retos resueltos")
+        finally:
+            cursor.close()
+            conn.close()
+
+        solved_cache.set(id_persona, resueltos)
+        return resueltos
+
+    # =====================================================================
+    #  MÉTODOS DEL JUEZ
+    # =====================================================================
+    @classmethod
+    def get_estados(cls):
+        """ Catálogo ESTADO_RESPUESTA como {nombre_estado: id_estado} (del registro de catálogos). """
+        return CatalogoModel.registry().ids('estado_respuesta')
+
+    @classmethod
+    def claim_pending(cls, lease_owner, id_estado_pendiente, limit=10, lease_seconds=60, max_intentos=3):
+        """
+        Reclama un lote de respuestas 'Pendiente' para un proceso juez.
+
+        Cada respuesta reclamada queda con un "lease" (dueño + expiración).
+        FOR UPDATE SKIP LOCKED permite que varios jueces (en distintas
+        máquinas) reclamen a la vez sin bloquearse ni repetir trabajo; si un
+        juez muere, su lease expira y otro juez la vuelve a tomar.
+        Devuelve las respuestas con los datos del reto y del lenguaje, y
+        `espera_ms`: cuánto llevaba cada una en la cola.
+
+        Reparto justo: se reclama por turnos entre personas (la 1ª respuesta
+        en cola de cada persona, luego la 2ª, ...), contando como turnos ya
+        usados las respuestas de esa persona que otro juez está evaluando.
+        Así quien envía muchas respuestas seguidas no acapara a los jueces.
+        """
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("Sin respuesta de la base de datos")
+
+        cursor = conn.cursor(dictionary=True)
+        try:
+            conn.start_transaction()
+
+            # 1. Candidatos en orden de turno (lectura sin bloqueo; la cola está acotada
+            #    por el control de admisión, ver submissionScheduler)
+            cursor.execute("""
+                SELECT c.id_respuesta
+                FROM (
+                    SELECT 
+                        id_respuesta,
+                        (lease_expira IS NULL OR lease_expira < UTC_TIMESTAMP()) AND intentos < %s AS elegible,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY id_persona,
+                                         (lease_expira IS NULL OR lease_expira < UTC_TIMESTAMP()) AND intentos < %s
+                            ORDER BY id_respuesta
+                        ) AS turno,
+                        SUM(lease_expira >= UTC_TIMESTAMP()) OVER (PARTITION BY id_persona) AS en_evaluacion
+                    FROM RESPUESTA
+                    WHERE id_estado = %s
+                ) c
+                WHERE c.elegible
+                ORDER BY c.turno + COALESCE(c.en_evaluacion, 0), c.id_respuesta
+                LIMIT %s
+            """, (max_intentos, max_intentos, id_estado_pendiente, limit * 2))
+            candidatos = [row['id_respuesta'] for row in cursor.fetchall()]
+            if not candidatos:
+                conn.commit()
+                return []
+
+            # 2. Bloquear los que sigan libres (otro juez puede haber tomado algunos)
+            placeholders = ','.join(['%s'] * len(candidatos))
+            cursor.execute(f"""
+                SELECT id_respuesta
+                FROM RESPUESTA
+                WHERE id_respuesta IN ({placeholders})
+                  AND id_estado = %s
+                  AND (lease_expira IS NULL OR lease_expira < UTC_TIMESTAMP())
+                  AND intentos < %s
+                FOR UPDATE SKIP LOCKED
+            """, (*candidatos, id_estado_pendiente, max_intentos))
+            libres = {row['id_respuesta'] for row in cursor.fetchall()}
+            ids = [id_respuesta for id_respuesta in candidatos if id_respuesta in libres][:limit]
+            if not ids:
+                conn.commit()
+                return []
+
+            placeholders = ','.join(['%s'] * len(ids))
+            cursor.execute(f"""
+                UPDATE RESPUESTA
+                SET lease_owner = %s,
+                    lease_expira = UTC_TIMESTAMP() + INTERVAL %s SECOND,
+                    intentos = intentos + 1
+                WHERE id_respuesta IN ({placeholders})
+            """, (lease_owner, lease_seconds, *ids))
+
+            cursor.execute(f"""
+                SELECT 
+                    res.id_respuesta, res.codigo_fuente, res.id_persona, res.id_reto,
+                    res.id_lenguaje, res.fecha, res.intentos, l.nombre_lenguaje,
+                    r.limite_tiempo_segundos, r.version_tests, r.modo_comparacion, d.nombre_dificultad,
+                    TIMESTAMPDIFF(MICROSECOND, res.fecha, UTC_TIMESTAMP(3)) DIV 1000 AS espera_ms
+                FROM RESPUESTA res
+                JOIN LENGUAJE l ON res.id_lenguaje = l.id_lenguaje
+                JOIN RETO r ON res.id_reto = r.id_reto
+                JOIN DIFICULTAD d ON r.id_dificultad = d.id_dificultad
+                WHERE res.id_respuesta IN ({placeholders})
+            """, tuple(ids))
+            por_id = {row['id_respuesta']: row for row in cursor.fetchall()}
+            respuestas = [por_id[id_respuesta] for id_respuesta in ids if id_respuesta in por_id]
+
+            conn.commit()
+            return respuestas
+        except Exception as e:
+            conn.rollback()
+            print(f"Error al ejecutar consulta en claim_pending: {e}")
+            raise Exception("Error interno al reclamar respuestas pendientes")
+        finally:
+            cursor.close()
+            conn.close()
+
+    @classmethod
+    def renew_leases(cls, lease_owner, ids, lease_seconds=60):
+        """ Extiende el lease de las respuestas que el juez sigue evaluando. """
+        if not ids:
+            return 0
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("Sin respuesta de la base de datos")
+
+        cursor = conn.cursor()
+        try:
+            placeholders = ','.join(['%s'] * len(ids))
+            cursor.execute(f"""
+                UPDATE RESPUESTA
+                SET lease_expira = UTC_TIMESTAMP() + INTERVAL %s SECOND
+                WHERE lease_owner = %s AND id_respuesta IN ({placeholders})
+            """, (lease_seconds, lease_owner, *ids))
+            conn.commit()
+            return cursor.rowcount
+        except Exception as e:
+            conn.rollback()
+            print(f"Error al ejecutar consulta en renew_leases: {e}")
+            raise Exception("Error interno al renovar leases")
+        finally:
+            cursor.close()
+            conn.close()
+
+    @classmethod
+    def release_leases(cls, lease_owner, ids, count_attempt=True, max_intentos=None,
+                       id_estado_error=None, motivo=None):
+        """
+        Libera respuestas reclamadas sin veredicto para que otro juez las tome.
+        Con count_attempt=False (ej. apagado ordenado) no cuenta como intento.
+        Con `max_intentos` e `id_estado_error`, las que ya usaron todos sus
+        intentos no vuelven a la cola: quedan en ese estado final con `motivo`.
+        """
+        if not ids:
+            return 0
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("Sin respuesta de la base de datos")
+
+        agotada = count_attempt and max_intentos is not None and id_estado_error is not None
+        cursor = conn.cursor()
+        try:
+            placeholders = ','.join(['%s'] * len(ids))
+            # MySQL aplica el SET en orden: `intentos` se modifica al final para
+            # que las condiciones anteriores vean el valor original
+            cursor.execute(f"""
+                UPDATE RESPUESTA
+                SET id_estado = IF(%s AND intentos >= %s, %s, id_estado),
+                    motivo_error = IF(%s AND intentos >= %s, %s, motivo_error),
+                    lease_owner = NULL,
+                    lease_expira = NULL,
+                    intentos = intentos - %s
+                WHERE lease_owner = %s AND id_respuesta IN ({placeholders})
+            """, (agotada, max_intentos or 0, id_estado_error,
+                  agotada, max_intentos or 0, (motivo or '')[:255],
+                  0 if count_attempt else 1, lease_owner, *ids))
+            conn.commit()
+            return cursor.rowcount
+        except Exception as e:
+            conn.rollback()
+            print(f"Error al ejecutar consulta en release_leases: {e}")
+            raise Exception("Error interno al liberar leases")
+        finally:
+            cursor.close()
+            conn.close()
+
+    @classmethod
+    def fail_exhausted(cls, id_estado_pendiente, id_estado_error, max_intentos, motivo):
+        """
+        Pasa a `id_estado_error` las respuestas 'Pendiente' que ya usaron sus
+        `max_intentos` y que ningún juez está evaluando (ej. el juez murió
+        durante el último intento y su lease expiró). Sin esto quedarían en
+        la cola para siempre: ningún juez las reclama, pero cuentan para el
+        control de admisión. Devuelve los ids afectados.
+        """
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("Sin respuesta de la base de datos")
+
+        cursor = conn.cursor()
+        try:
+            conn.start_transaction()
+            # Recorre idx_respuesta_cola (id_estado, lease_expira, ...)
+            cursor.execute("""
+                SELECT id_respuesta
+                FROM RESPUESTA
+                WHERE id_estado = %s
+                  AND (lease_expira IS NULL OR lease_expira < UTC_TIMESTAMP())
+                  AND intentos >= %s
+                FOR UPDATE SKIP LOCKED
+            """, (id_estado_pendiente, max_intentos))
+            ids = [row[0] for row in cursor.fetchall()]
+            if ids:
+                placeholders = ','.join(['%s'] * len(ids))
+                cursor.execute(f"""
+                    UPDATE RESPUESTA
+                    SET id_estado = %s, motivo_error = %s, lease_owner = NULL, lease_expira = NULL
+                    WHERE id_respuesta IN ({placeholders})
+                """, (id_estado_error, motivo[:255], *ids))
+            conn.commit()
+            return ids
+        except Exception as e:
+            conn.rollback()
+            print(f"Error al ejecutar consulta en fail_exhausted: {e}")
+            raise Exception("Error interno al cerrar respuestas sin intentos")
+        finally:
+            cursor.close()
+            conn.close()
+
+    @classmethod
+    def save_verdict(cls, id_respuesta, id_estado, puntaje, tiempo_ejecucion_ms,
+                     id_estado_pendiente, id_estado_aceptado, lease_owner=None, version_tests=None):
+        """
+        Guarda el veredicto del juez y actualiza los contadores de la persona
+        en una sola transacción (ver _credit_persona).
+        Con `lease_owner` sólo se guarda si el juez sigue siendo el dueño del
+        lease (si expiró y otro juez la reclamó, este veredicto se descarta).
+        `version_tests` es la versión de los tests con la que se evaluó; permite
+        reutilizar el veredicto para reenvíos idénticos.
+        Devuelve {id_persona, delta_puntaje, delta_retos} o None si la
+        respuesta ya no estaba pendiente (o ya no era nuestra).
+        """
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("No se pudo conectar a la base de datos")
+
+        cursor = conn.cursor(dictionary=True)
+        try:
+            conn.start_transaction()
+
+            cursor.execute(
+                "SELECT id_persona, id_reto, id_estado, lease_owner FROM RESPUESTA WHERE id_respuesta = %s FOR UPDATE",
+                (id_respuesta,)
+            )
+            respuesta = cursor.fetchone()
+            if not respuesta or respuesta['id_estado'] != id_estado_pendiente:
+                conn.rollback()
+                return None
+            if lease_owner is not None and respuesta['lease_owner'] != lease_owner:
+                conn.rollback()
+                return None
+
+            cursor.execute("""
+                UPDATE RESPUESTA
+                SET id_estado = %s, puntaje = %s, tiempo_ejecucion_ms = %s, version_tests = %s,
+                    lease_owner = NULL, lease_expira = NULL
+                WHERE id_respuesta = %s AND id_estado = %s
+            """, (id_estado, puntaje, tiempo_ejecucion_ms, version_tests, id_respuesta, id_estado_pendiente))
+            if cursor.rowcount == 0:
+                conn.rollback()
+                return None
+
+            cambios = cls._credit_persona(cursor, respuesta['id_persona'], respuesta['id_reto'], id_respuesta,
+                                          id_estado, puntaje, id_estado_aceptado)
+            conn.commit()
+            return cambios
+
+        except Exception as e:
+            conn.rollback()
+            print(f"Error al guardar veredicto de la respuesta {id_respuesta}: {e}")
+            raise Exception(f"Error interno al guardar el veredicto: {e}")
+        finally:
+            cursor.close()
+            conn.close()
+
+    # =====================================================================
+    #  RE-EVALUACIÓN (rejudge) DE UN RETO
+    # =====================================================================
+    @classmethod
+    def count_for_rejudge(cls, id_reto, id_estado_pendiente):
+        """ Respuestas ya evaluadas de un reto (las que re-evalúa un rejudge). """
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("Sin respuesta de la base de datos")
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "SELECT COUNT(*) FROM RESPUESTA WHERE id_reto = %s AND id_estado <> %s",
+                (id_reto, id_estado_pendiente)
+            )
+            return cursor.fetchone()[0]
+        except Exception as e:
+            print(f"Error al ejecutar consulta en count_for_rejudge: {e}")
+            raise Exception("Error interno al contar respuestas del reto")
+        finally:
+            cursor.close()
+            conn.close()
+
+    @classmethod
+    def count_pending(cls, id_estado_pendiente):
+        """ Tamaño de la cola del juez (para no quitarle capacidad al tráfico en vivo). """
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("Sin respuesta de la base de datos")
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT COUNT(*) FROM RESPUESTA WHERE id_estado = %s", (id_estado_pendiente,))
+            return cursor.fetchone()[0]
+        except Exception as e:
+            print(f"Error al ejecutar consulta en count_pending: {e}")
+            raise Exception("Error interno al consultar la cola del juez")
+        finally:
+            cursor.close()
+            conn.close()
+
+    @classmethod
+    def get_rejudge_batch(cls, id_reto, id_estado_pendiente, after_id=0, limit=100):
+        """
+        Siguiente lote de respuestas evaluadas de un reto (id_respuesta > after_id),
+        con los mismos datos que entrega claim_pending al juez.
+        """
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("Sin respuesta de la base de datos")
+
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("""
+                SELECT 
+                    res.id_respuesta, res.codigo_fuente, res.id_persona, res.id_reto,
+                    res.id_lenguaje, res.fecha, res.id_estado, res.puntaje, l.nombre_lenguaje,
+                    r.limite_tiempo_segundos, r.version_tests, r.modo_comparacion, d.nombre_dificultad
+                FROM RESPUESTA res
+                JOIN LENGUAJE l ON res.id_lenguaje = l.id_lenguaje
+                JOIN RETO r ON res.id_reto = r.id_reto
+                JOIN DIFICULTAD d ON r.id_dificultad = d.id_dificultad
+                WHERE res.id_reto = %s AND res.id_respuesta > %s AND res.id_estado <> %s
+                ORDER BY res.id_respuesta ASC
+                LIMIT %s
+            """, (id_reto, after_id, id_estado_pendiente, limit))
+            return cursor.fetchall()
+        except Exception as e:
+            print(f"Error al ejecutar consulta en get_rejudge_batch: {e}")
+            raise Exception("Error interno al leer respuestas para re-evaluar")
+        finally:
+            cursor.close()
+            conn.close()
+
+    @classmethod
+    def save_rejudged_verdicts(cls, id_reto, veredictos, id_estado_pendiente, id_estado_aceptado):
+        """
+        Guarda los nuevos veredictos de un lote re-evaluado y reconcilia, en la
+        misma transacción, los contadores de las personas afectadas: sólo se
+        recalcula lo que este reto aporta a cada una (mejor puntaje y si lo
+        resolvió) antes y después del lote, y se aplica la diferencia.
+
+        veredictos: [{id_respuesta, id_estado, puntaje, tiempo_ejecucion_ms, version_tests}]
+        Devuelve {actualizadas, cambios: [{id_persona, delta_puntaje, delta_retos}]}.
+        """
+        if not veredictos:
+            return {"actualizadas": 0, "cambios": []}
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("No se pudo conectar a la base de datos")
+
+        cursor = conn.cursor(dictionary=True)
+        try:
+            conn.start_transaction()
+
+            # Mismo orden de bloqueo que save_verdict: primero las respuestas, luego las personas
+            ids = [v['id_respuesta'] for v in veredictos]
+            placeholders = ','.join(['%s'] * len(ids))
+            cursor.execute(f"""
+                SELECT id_respuesta, id_persona, id_estado, puntaje
+                FROM RESPUESTA
+                WHERE id_reto = %s AND id_respuesta IN ({placeholders})
+                FOR UPDATE
+            """, (id_reto, *ids))
+            actuales = {row['id_respuesta']: row for row in cursor.fetchall()}
+
+            # Sólo las que siguen evaluadas y cuyo veredicto cambia
+            modificadas = [
+                v for v in veredictos
+                if v['id_respuesta'] in actuales
+                and actuales[v['id_respuesta']]['id_estado'] != id_estado_pendiente
+                and (actuales[v['id_respuesta']]['id_estado'], actuales[v['id_respuesta']]['puntaje'])
+                    != (v['id_estado'], v['puntaje'])
+            ]
+            personas = sorted({actuales[v['id_respuesta']]['id_persona'] for v in modificadas})
+
+            if personas:
+                placeholders = ','.join(['%s'] * len(personas))
+                cursor.execute(
+                    f"SELECT id_persona FROM PERSONA WHERE id_persona IN ({placeholders}) ORDER BY id_persona FOR UPDATE",
+                    tuple(personas)
+                )
+                cursor.fetchall()
+                antes = cls._reto_contribution(cursor, id_reto, personas, id_estado_aceptado)
+
+            # El tiempo y la versión de los tests se actualizan siempre (sirven para la deduplicación)
+            cursor.executemany("""
+                UPDATE RESPUESTA
+                SET id_estado = %s, puntaje = %s, tiempo_ejecucion_ms = %s, version_tests = %s
+                WHERE id_respuesta = %s AND id_estado <> %s
+            """, [(v['id_estado'], v['puntaje'], v['tiempo_ejecucion_ms'], v['version_tests'],
+                   v['id_respuesta'], id_estado_pendiente) for v in veredictos if v['id_respuesta'] in actuales])
+
+            cambios = []
+            if personas:
+                despues = cls._reto_contribution(cursor, id_reto, personas, id_estado_aceptado)
+                for id_persona in personas:
+                    delta_puntaje = despues[id_persona][0] - antes[id_persona][0]
+                    delta_retos = despues[id_persona][1] - antes[id_persona][1]
+                    if not delta_puntaje and not delta_retos:
+                        continue
+                    cursor.execute("""
+                        UPDATE PERSONA
+                        SET 
+                            puntaje_total = puntaje_total + %s,
+                            num_retos_resueltos = num_retos_resueltos + %s
+                        WHERE id_persona = %s
+                    """, (delta_puntaje, delta_retos, id_persona))
+                    cambios.append({"id_persona": id_persona, "delta_puntaje": delta_puntaje,
+                                    "delta_retos": delta_retos})
+
+            conn.commit()
+            return {"actualizadas": len(modificadas), "cambios": cambios}
+
+        except Exception as e:
+            conn.rollback()
+            print(f"Error al guardar veredictos re-evaluados del reto {id_reto}: {e}")
+            raise Exception(f"Error interno al guardar la re-evaluación: {e}")
+        finally:
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    def _reto_contribution(cursor, id_reto, personas, id_estado_aceptado):
+        """ id_persona -> (mejor puntaje, 1 si resolvió el reto) según las respuestas actuales. """
+        placeholders = ','.join(['%s'] * len(personas))
+        cursor.execute(f"""
+            SELECT 
+                id_persona,
+                COALESCE(MAX(puntaje), 0) AS mejor_puntaje,
+                COALESCE(MAX(id_estado = %s), 0) AS resuelto
+            FROM RESPUESTA
+            WHERE id_reto = %s AND id_persona IN ({placeholders})
+            GROUP BY id_persona
+        """, (id_estado_aceptado, id_reto, *personas))
+        contribucion = {id_persona: (0, 0) for id_persona in personas}
+        for row in cursor.fetchall():
+            contribucion[row['id_persona']] = (int(row['mejor_puntaje']), int(row['resuelto']))
+        return contribucion
+
@@ -1,8 +1,31 @@
 # Backend/src/models/retosModel.py
+import json
+import os
 import mysql
-from ...database.db import get_db_connection
+from ...database.db import get_db_connection, on_commit
+from ...cache.testSetCache import test_set_cache
+from ...cache.retoDetailCache import reto_detail_cache
+from ...services.searchIndex import search_index
+from ...services.testBlobStore import test_blob_store
+from ...judge.comparator import MODOS, MODO_LINEAS
+from ...services.catalogRegistry import catalog_registry
+from ..catalogoModels.catalogoModel import CatalogoModel
+from .respuestaModel import RespuestaModel
 from datetime import datetime
 
+
+# TEST.datos_entrada / salida_esperada son MEDIUMTEXT (16 MB)
+MAX_TEST_CHARS = 16 * 1024 * 1024 - 1
+# En el detalle de un reto, los tests públicos guardados como blob de hasta este
+# tamaño se incluyen completos; los mayores se enlazan (GET .../tests/<id>/entrada)
+TEST_INLINE_MAX_BYTES = int(os.environ.get('TEST_INLINE_MAX_BYTES', 64 * 1024))
+
+_INSERT_TESTS = """
+    INSERT INTO TEST (datos_entrada, hash_entrada, salida_esperada, hash_salida, es_publico, id_reto)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+
 class RetosModel:
 
     @classmethod
@@ -11,6 +34,12 @@ class RetosModel:
         Crea un nuevo reto, sus lenguajes asociados y sus casos de prueba
         dentro de una transacción de base de datos.
         """
+        # 1. Validar contra el registro de catálogos en memoria
+        reto, error = cls.prepare_reto(reto_data, CatalogoModel.registry())
+        if error:
+            return {"error": error}, 400
+        tests = cls._store_test_payloads(reto['tests'])
+
         conn = get_db_connection()
         if conn is None:
             raise Exception("No se pudo conectar a la base de datos")
@@ -18,80 +47,18 @@ class RetosModel:
         cursor = conn.cursor(dictionary=True)
 
         try:
-            # 1. Iniciar transacción
+            # 2. Iniciar transacción
             conn.start_transaction()
 
-            # 2. Obtener el id_dificultad
-            query_dificultad = "SELECT id_dificultad FROM DIFICULTAD WHERE nombre_dificultad = %s"
-            cursor.execute(query_dificultad, (reto_data['nombre_dificultad'],))
-            dificultad = cursor.fetchone()
-            
-            if not dificultad:
-                conn.rollback() 
-                return {"error": f"Dificultad '{reto_data['nombre_dificultad']}' no encontrada"}, 400
-            
-            id_dificultad = dificultad['id_dificultad']
-
-            # 3. Insertar en RETO
-            query_reto = """
-                INSERT INTO RETO (titulo, descripcion, fecha_publicacion, limite_tiempo_segundos, id_dificultad)
-                VALUES (%s, %s, %s, %s, %s)
-            """
-            fecha_ahora = datetime.utcnow()
-            cursor.execute(query_reto, (
-                reto_data['titulo'],
-                reto_data['descripcion'],
-                fecha_ahora,
-                reto_data.get('limite_tiempo_segundos'),
-                id_dificultad
-            ))
-            
-            id_reto_nuevo = cursor.lastrowid
-            if id_reto_nuevo == 0:
-                 raise Exception("No se pudo obtener el ID del reto creado.")
-
-            # 4. Insertar en RETO_LENGUAJE
-            nombres_lenguajes = reto_data['lenguajes']
-            if not nombres_lenguajes:
-                 conn.rollback()
-                 return {"error": "Se debe proporcionar al menos un lenguaje"}, 400
-
-            format_strings = ','.join(['%s'] * len(nombres_lenguajes))
-            query_lenguajes = f"SELECT id_lenguaje, nombre_lenguaje FROM LENGUAJE WHERE nombre_lenguaje IN ({format_strings})"
-            cursor.execute(query_lenguajes, tuple(nombres_lenguajes))
-            lenguajes_encontrados = cursor.fetchall()
-
-            if len(lenguajes_encontrados) != len(nombres_lenguajes):
-                conn.rollback()
-                return {"error": "Uno o más lenguajes no son válidos"}, 400
-
-            datos_reto_lenguaje = [(id_reto_nuevo, lang['id_lenguaje']) for lang in lenguajes_encontrados]
-            query_insert_lenguajes = "INSERT INTO RETO_LENGUAJE (id_reto, id_lenguaje) VALUES (%s, %s)"
-            cursor.executemany(query_insert_lenguajes, datos_reto_lenguaje)
-
-            # 5. Insertar en TEST
-            tests = reto_data['tests']
-            if not tests:
-                conn.rollback()
-                return {"error": "Se debe proporcionar al menos un caso de prueba"}, 400
-
-            datos_tests = []
-            for test in tests:
-                datos_tests.append((
-                    test['datos_entrada'],
-                    test['salida_esperada'],
-                    test.get('es_publico', True),
-                    id_reto_nuevo
-                ))
-
-            query_insert_tests = """
-                INSERT INTO TEST (datos_entrada, salida_esperada, es_publico, id_reto)
-                VALUES (%s, %s, %s, %s)
-            """
-            cursor.executemany(query_insert_tests, datos_tests)
+            # 3. Insertar RETO, RETO_LENGUAJE y TEST
+            id_reto_nuevo = cls._insert_reto(cursor, reto)
+            cursor.executemany("INSERT INTO RETO_LENGUAJE (id_reto, id_lenguaje) VALUES (%s, %s)",
+                               [(id_reto_nuevo, id_lenguaje) for id_lenguaje in reto['ids_lenguajes']])
+            cursor.executemany(_INSERT_TESTS, [(*test, id_reto_nuevo) for test in tests])
 
-            # 6. Commit
+            # 4. Commit
             conn.commit()
+            cls._after_insert(id_reto_nuevo, reto)
             
             return {"message": "Reto creado exitosamente", "id_reto": id_reto_nuevo}, 201
 
@@ -107,21 +74,227 @@ class RetosModel:
             cursor.close()
             conn.close()
 
+    # =====================================================================
+    #  Importación masiva (ver services/retoImporter.py)
+    # =====================================================================
+    @classmethod
+    def insert_reto_batch(cls, retos, max_statement_bytes=8 * 1024 * 1024):
+        """
+        Inserta un lote de retos ya validados (ver prepare_reto) en una sola
+        transacción. RETO se inserta fila a fila (hace falta cada id_reto);
+        RETO_LENGUAJE y TEST de todo el lote con executemany, partidos en
+        sentencias de a lo sumo `max_statement_bytes` para no superar
+        max_allowed_packet con tests grandes.
+        Devuelve los id_reto creados, en el mismo orden.
+        """
+        if not retos:
+            return []
+        # Los blobs se escriben antes de abrir la transacción (no alargan los bloqueos)
+        tests_por_reto = [cls._store_test_payloads(reto['tests']) for reto in retos]
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("No se pudo conectar a la base de datos")
+
+        cursor = conn.cursor()
+        try:
+            conn.start_transaction()
+            ids = [cls._insert_reto(cursor, reto) for reto in retos]
+
+            cursor.executemany("INSERT INTO RETO_LENGUAJE (id_reto, id_lenguaje) VALUES (%s, %s)", [
+                (id_reto, id_lenguaje) for id_reto, reto in zip(ids, retos) for id_lenguaje in reto['ids_lenguajes']
+            ])
+
+            filas, tamano = [], 0
+            for id_reto, tests in zip(ids, tests_por_reto):
+                for test in tests:
+                    bytes_fila = len(test[0] or '') + len(test[2] or '')
+                    if filas and tamano + bytes_fila > max_statement_bytes:
+                        cursor.executemany(_INSERT_TESTS, filas)
+                        filas, tamano = [], 0
+                    filas.append((*test, id_reto))
+                    tamano += bytes_fila
+            if filas:
+                cursor.executemany(_INSERT_TESTS, filas)
+
+            conn.commit()
+            for id_reto, reto in zip(ids, retos):
+                cls._after_insert(id_reto, reto)
+            return ids
+        except mysql.connector.Error as err:
+            conn.rollback()
+            print(f"Error de MySQL en insert_reto_batch: {err}")
+            raise Exception(f"Error de base de datos: {err.msg}")
+        except Exception as e:
+            conn.rollback()
+            print(f"Error inesperado en insert_reto_batch: {e}")
+            raise Exception(f"Error interno al importar retos: {e}")
+        finally:
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    def prepare_reto(reto_data, catalogos):
+        """
+        Valida los datos de un reto (mismo formato que el cuerpo de POST
+        /api/retos) contra los catálogos y los deja listos para insertar.
+        Devuelve (reto, None) o (None, mensaje de error).
+        """
+        faltantes = [k for k in ('titulo', 'descripcion', 'nombre_dificultad', 'lenguajes', 'tests')
+                     if k not in reto_data]
+        if faltantes:
+            return None, f"Faltan datos requeridos ({', '.join(faltantes)})"
+        if not isinstance(reto_data['titulo'], str) or not isinstance(reto_data['descripcion'], str):
+            return None, "'titulo' y 'descripcion' deben ser texto"
+        if not isinstance(reto_data['nombre_dificultad'], (str, int)):
+            return None, "'nombre_dificultad' debe ser un nombre o un id"
+        limite = reto_data.get('limite_tiempo_segundos')
+        if limite is not None and (isinstance(limite, bool) or not isinstance(limite, (int, float))):
+            return None, "'limite_tiempo_segundos' debe ser un número"
+        if not isinstance(reto_data['lenguajes'], list) or not isinstance(reto_data['tests'], list):
+            return None, "'lenguajes' y 'tests' deben ser listas"
+
+        id_dificultad = catalogos.id_of('dificultad', reto_data['nombre_dificultad'])
+        if id_dificultad is None:
+            return None, f"Dificultad '{reto_data['nombre_dificultad']}' no encontrada"
+
+        modo_comparacion = reto_data.get('modo_comparacion') or MODO_LINEAS
+        if modo_comparacion not in MODOS:
+            return None, f"'modo_comparacion' debe ser uno de: {', '.join(MODOS)}"
+
+        nombres_lenguajes = reto_data['lenguajes']
+        if not nombres_lenguajes:
+            return None, "Se debe proporcionar al menos un lenguaje"
+        if not all(isinstance(nombre, (str, int)) for nombre in nombres_lenguajes):
+            return None, "Cada lenguaje debe ser un nombre o un id"
+        ids_lenguajes = {catalogos.id_of('lenguaje', nombre) for nombre in nombres_lenguajes}
+        if None in ids_lenguajes or len(ids_lenguajes) != len(nombres_lenguajes):
+            return None, "Uno o más lenguajes no son válidos"
+
+        if not reto_data['tests']:
+            return None, "Se debe proporcionar al menos un caso de prueba"
+        tests = []
+        for test in reto_data['tests']:
+            if not isinstance(test, dict) or 'datos_entrada' not in test or 'salida_esperada' not in test:
+                return None, "Cada caso de prueba necesita 'datos_entrada' y 'salida_esperada'"
+            if not isinstance(test['datos_entrada'], str) or not isinstance(test['salida_esperada'], str):
+                return None, "'datos_entrada' y 'salida_esperada' deben ser texto"
+            if max(len(test['datos_entrada']), len(test['salida_esperada'])) > MAX_TEST_CHARS:
+                return None, f"Un caso de prueba supera el máximo de {MAX_TEST_CHARS} caracteres"
+            tests.append((test['datos_entrada'], test['salida_esperada'], test.get('es_publico', True)))
+
+        return {
+            'titulo': reto_data['titulo'],
+            'descripcion': reto_data['descripcion'],
+            'nombre_dificultad': reto_data['nombre_dificultad'],
+            'id_dificultad': id_dificultad,
+            'limite_tiempo_segundos': reto_data.get('limite_tiempo_segundos'),
+            'modo_comparacion': modo_comparacion,
+            'ids_lenguajes': sorted(ids_lenguajes),
+            'tests': tests,
+        }, None
+
+    @staticmethod
+    def _store_test_payloads(tests):
+        """
+        (datos_entrada, hash_entrada, salida_esperada, hash_salida, es_publico) de
+        cada test: con TEST_BLOB_STORAGE activo, las entradas/salidas grandes se
+        guardan como blob y en la fila sólo queda su hash.
+        """
+        filas = []
+        for entrada, salida, publico in tests:
+            hash_entrada = test_blob_store.maybe_put(entrada)
+            hash_salida = test_blob_store.maybe_put(salida)
+            filas.append((None if hash_entrada else entrada, hash_entrada,
+                          None if hash_salida else salida, hash_salida, publico))
+        return filas
+
+    @staticmethod
+    def _insert_reto(cursor, reto):
+        reto['fecha_publicacion'] = datetime.utcnow()
+        cursor.execute("""
+            INSERT INTO RETO (titulo, descripcion, fecha_publicacion, limite_tiempo_segundos, id_dificultad,
+                              modo_comparacion)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (
+            reto['titulo'],
+            reto['descripcion'],
+            reto['fecha_publicacion'],
+            reto['limite_tiempo_segundos'],
+            reto['id_dificultad'],
+            reto['modo_comparacion']
+        ))
+        if not cursor.lastrowid:
+            raise Exception("No se pudo obtener el ID del reto creado.")
+        return cursor.lastrowid
+
+    @staticmethod
+    def _after_insert(id_reto, reto):
+        """ Cachés e índices en memoria de un reto nuevo, una vez confirmado. """
+        ids_lenguajes = reto['ids_lenguajes']
+        on_commit(lambda: test_set_cache.invalidate(id_reto))
+        on_commit(lambda: catalog_registry.set_reto_lenguajes(id_reto, ids_lenguajes))
+        if search_index.loaded:
+            reto_indexado = {
+                'id_reto': id_reto,
+                'titulo': reto['titulo'],
+                'descripcion': reto['descripcion'],
+                'nombre_dificultad': reto['nombre_dificultad'],
+                'fecha_publicacion': reto['fecha_publicacion'],
+            }
+            on_commit(lambda: search_index.add(reto_indexado))
+            on_commit(search_index.maybe_save)
+
     # =====================================================================
     #  NUEVO MÉTODO: GET Todos los Retos (con paginación)
     # =====================================================================
     @classmethod
-    def get_all_retos(cls, page=1, per_page=20):
+    def get_all_retos(cls, page=1, per_page=20, after=None, id_dificultad=None, id_lenguaje=None,
+                      resuelto=None, id_persona=None):
+        """
+        `after` = (fecha_publicacion, id_reto) de la última fila vista para
+        paginación por cursor (usa idx_reto_fecha en lugar de OFFSET).
+
+        Filtros opcionales: `id_dificultad` (idx_reto_dificultad_fecha),
+        `id_lenguaje` (RETO_LENGUAJE) y `resuelto` True/False respecto de los
+        retos que `id_persona` ya resolvió (conjunto cacheado en memoria, ver
+        RespuestaModel.get_solved_retos).
+        """
+        condiciones, params = [], []
+        if id_dificultad is not None:
+            condiciones.append("r.id_dificultad = %s")
+            params.append(id_dificultad)
+        if id_lenguaje is not None:
+            condiciones.append("""EXISTS (
+                    SELECT 1 FROM RETO_LENGUAJE rl WHERE rl.id_reto = r.id_reto AND rl.id_lenguaje = %s
+                )""")
+            params.append(id_lenguaje)
+        if resuelto is not None:
+            resueltos = sorted(RespuestaModel.get_solved_retos(id_persona))
+            if resuelto and not resueltos:
+                return []
+            if resueltos:
+                placeholders = ','.join(['%s'] * len(resueltos))
+                condiciones.append(f"r.id_reto {'IN' if resuelto else 'NOT IN'} ({placeholders})")
+                params.extend(resueltos)
+
         conn = get_db_connection()
         if conn is None:
             raise Exception("Sin respuesta de la base de datos")
         
         cursor = conn.cursor(dictionary=True)
         try:
-            offset = (page - 1) * per_page
+            if after is not None:
+                fecha, id_reto = after
+                condiciones.append("(r.fecha_publicacion < %s OR (r.fecha_publicacion = %s AND r.id_reto < %s))")
+                params.extend((fecha, fecha, id_reto, per_page))
+                limit = "LIMIT %s"
+            else:
+                params.extend((per_page, (page - 1) * per_page))
+                limit = "LIMIT %s OFFSET %s"
+            where = ("WHERE " + " AND ".join(condiciones)) if condiciones else ""
             
             # Unimos RETO con DIFICULTAD para obtener el nombre de la dificultad
-            query = """
+            query = f"""
                 SELECT 
                     r.id_reto, 
                     r.titulo, 
@@ -129,10 +302,11 @@ class RetosModel:
                     d.nombre_dificultad
                 FROM RETO r
                 JOIN DIFICULTAD d ON r.id_dificultad = d.id_dificultad
-                ORDER BY r.fecha_publicacion DESC
-                LIMIT %s OFFSET %s
+                {where}
+                ORDER BY r.fecha_publicacion DESC, r.id_reto DESC
+                {limit}
             """
-            cursor.execute(query, (per_page, offset))
+            cursor.execute(query, tuple(params))
             retos = cursor.fetchall()
             return retos
         
@@ -148,13 +322,16 @@ class RetosModel:
     # =====================================================================
     @classmethod
     def get_reto_by_id(cls, id_reto):
+        """
+        Detalle del reto en una sola consulta: los lenguajes permitidos y los
+        casos de prueba PÚBLICOS llegan agregados como arreglos JSON.
+        """
         conn = get_db_connection()
         if conn is None:
             raise Exception("Sin respuesta de la base de datos")
 
         cursor = conn.cursor(dictionary=True)
         try:
-            # 1. Obtener los detalles principales del reto
             query_reto = """
                 SELECT 
                     r.id_reto, 
@@ -162,7 +339,30 @@ class RetosModel:
                     r.descripcion, 
                     r.fecha_publicacion, 
                     r.limite_tiempo_segundos, 
-                    d.nombre_dificultad
+                    d.nombre_dificultad,
+                    (
+                        SELECT JSON_ARRAYAGG(JSON_OBJECT('nombre_lenguaje', l.nombre_lenguaje, 'version', l.version))
+                        FROM (
+                            SELECT l.nombre_lenguaje, l.version
+                            FROM RETO_LENGUAJE rl
+                            JOIN LENGUAJE l ON l.id_lenguaje = rl.id_lenguaje
+                            WHERE rl.id_reto = r.id_reto
+                            ORDER BY l.id_lenguaje
+                        ) l
+                    ) AS lenguajes_permitidos,
+                    (
+                        SELECT JSON_ARRAYAGG(JSON_OBJECT('id_test', t.id_test,
+                                                         'datos_entrada', t.datos_entrada,
+                                                         'salida_esperada', t.salida_esperada,
+                                                         'hash_entrada', t.hash_entrada,
+                                                         'hash_salida', t.hash_salida))
+                        FROM (
+                            SELECT id_test, datos_entrada, salida_esperada, hash_entrada, hash_salida
+                            FROM TEST
+                            WHERE id_reto = r.id_reto AND es_publico = TRUE
+                            ORDER BY id_test
+                        ) t
+                    ) AS casos_de_prueba
                 FROM RETO r
                 JOIN DIFICULTAD d ON r.id_dificultad = d.id_dificultad
                 WHERE r.id_reto = %s
@@ -173,26 +373,11 @@ class RetosModel:
             if not reto:
                 return None # Reto no encontrado
 
-            # 2. Obtener los lenguajes permitidos
-            query_lenguajes = """
-                SELECT l.nombre_lenguaje, l.version
-                FROM LENGUAJE l
-                JOIN RETO_LENGUAJE rl ON l.id_lenguaje = rl.id_lenguaje
-                WHERE rl.id_reto = %s
-            """
-            cursor.execute(query_lenguajes, (id_reto,))
-            lenguajes = cursor.fetchall()
-            reto['lenguajes_permitidos'] = lenguajes
-
-            # 3. Obtener los casos de prueba PÚBLICOS
-            query_tests = """
-                SELECT datos_entrada, salida_esperada
-                FROM TEST
-                WHERE id_reto = %s AND es_publico = TRUE
-            """
-            cursor.execute(query_tests, (id_reto,))
-            tests_publicos = cursor.fetchall()
-            reto['casos_de_prueba'] = tests_publicos
+            for campo in ('lenguajes_permitidos', 'casos_de_prueba'):
+                valor = reto[campo]
+                reto[campo] = json.loads(valor) if valor else []
+            for caso in reto['casos_de_prueba']:
+                cls._resolve_test_blobs(id_reto, caso)
 
             return reto
 
@@ -203,4 +388,256 @@ class RetosModel:
             cursor.close()
             conn.close()
 
-    
\ No newline at end of file
+    # =====================================================================
+    #  Búsqueda por texto (índice invertido en memoria)
+    # =====================================================================
+    @classmethod
+    def search_retos(cls, q, limit=20):
+        search_index.ensure_loaded(cls.get_retos_for_search, cls.count_retos)
+        return search_index.search(q, limit)
+
+    @classmethod
+    def get_retos_for_search(cls, after_id=0, limit=1000):
+        """ Retos con id_reto > after_id, por lotes, para construir el índice de búsqueda. """
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("Sin respuesta de la base de datos")
+
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("""
+                SELECT r.id_reto, r.titulo, r.descripcion, r.fecha_publicacion, d.nombre_dificultad
+                FROM RETO r
+                JOIN DIFICULTAD d ON r.id_dificultad = d.id_dificultad
+                WHERE r.id_reto > %s
+                ORDER BY r.id_reto ASC
+                LIMIT %s
+            """, (after_id, limit))
+            return cursor.fetchall()
+        except Exception as e:
+            print(f"Error al ejecutar consulta en get_retos_for_search: {e}")
+            raise Exception("Error interno al leer retos para el índice de búsqueda")
+        finally:
+            cursor.close()
+            conn.close()
+
+    @classmethod
+    def count_retos(cls):
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("Sin respuesta de la base de datos")
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT COUNT(*) FROM RETO")
+            return cursor.fetchone()[0]
+        except Exception as e:
+            print(f"Error al ejecutar consulta en count_retos: {e}")
+            raise Exception("Error interno al contar retos")
+        finally:
+            cursor.close()
+            conn.close()
+
+    # =====================================================================
+    #  Entradas y salidas de los TEST guardadas como blob (testBlobStore)
+    # =====================================================================
+    @staticmethod
+    def _resolve_test_blobs(id_reto, caso):
+        """
+        En el detalle, un test guardado como blob se incluye completo si es
+        pequeño; si no, se da su tamaño y la URL que lo sirve en streaming.
+        """
+        for campo, campo_hash, ruta in (('datos_entrada', 'hash_entrada', 'entrada'),
+                                        ('salida_esperada', 'hash_salida', 'salida')):
+            digest = caso.pop(campo_hash, None)
+            if not digest:
+                continue
+            tamano = test_blob_store.size(digest)
+            if tamano <= TEST_INLINE_MAX_BYTES:
+                caso[campo] = test_blob_store.read_text(digest)
+            else:
+                caso[campo] = None
+                caso[f'bytes_{ruta}'] = tamano
+                caso[f'url_{ruta}'] = f"/api/retos/{id_reto}/tests/{caso['id_test']}/{ruta}"
+
+    @classmethod
+    def get_public_test_payload(cls, id_reto, id_test, campo):
+        """
+        Entrada ('entrada') o salida ('salida') de un test PÚBLICO del reto:
+        {'texto': ...} si está en la fila o {'hash': ...} si es un blob.
+        None si el test no existe, es de otro reto o es privado.
+        """
+        columna, columna_hash = (('datos_entrada', 'hash_entrada') if campo == 'entrada'
+                                 else ('salida_esperada', 'hash_salida'))
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("Sin respuesta de la base de datos")
+
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(f"""
+                SELECT {columna_hash} AS hash, IF({columna_hash} IS NULL, {columna}, NULL) AS texto
+                FROM TEST
+                WHERE id_test = %s AND id_reto = %s AND es_publico = TRUE
+            """, (id_test, id_reto))
+            return cursor.fetchone()
+        except Exception as e:
+            print(f"Error al ejecutar consulta en get_public_test_payload: {e}")
+            raise Exception("Error interno al consultar el caso de prueba")
+        finally:
+            cursor.close()
+            conn.close()
+
+    @classmethod
+    def get_tests_for_blob_migration(cls, after_id, limit, min_bytes):
+        """ TEST con id_test > after_id que aún tienen en la fila una entrada o salida >= min_bytes. """
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("Sin respuesta de la base de datos")
+
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("""
+                SELECT id_test, id_reto,
+                       IF(OCTET_LENGTH(datos_entrada) >= %s, datos_entrada, NULL) AS datos_entrada,
+                       IF(OCTET_LENGTH(salida_esperada) >= %s, salida_esperada, NULL) AS salida_esperada
+                FROM TEST
+                WHERE id_test > %s
+                  AND ((hash_entrada IS NULL AND OCTET_LENGTH(datos_entrada) >= %s)
+                       OR (hash_salida IS NULL AND OCTET_LENGTH(salida_esperada) >= %s))
+                ORDER BY id_test ASC
+                LIMIT %s
+            """, (min_bytes, min_bytes, after_id, min_bytes, min_bytes, limit))
+            return cursor.fetchall()
+        except Exception as e:
+            print(f"Error al ejecutar consulta en get_tests_for_blob_migration: {e}")
+            raise Exception("Error interno al leer tests para migrar")
+        finally:
+            cursor.close()
+            conn.close()
+
+    @classmethod
+    def set_test_blobs(cls, cambios):
+        """
+        cambios: [(id_test, id_reto, hash_entrada o None, hash_salida o None)].
+        Reemplaza el texto de la fila por el hash del blob (el contenido no
+        cambia, así que no se incrementa version_tests).
+        """
+        if not cambios:
+            return 0
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("No se pudo conectar a la base de datos")
+
+        cursor = conn.cursor()
+        try:
+            conn.start_transaction()
+            cursor.executemany("""
+                UPDATE TEST
+                SET hash_entrada = COALESCE(%s, hash_entrada),
+                    datos_entrada = IF(%s IS NULL, datos_entrada, NULL),
+                    hash_salida = COALESCE(%s, hash_salida),
+                    salida_esperada = IF(%s IS NULL, salida_esperada, NULL)
+                WHERE id_test = %s
+            """, [(h_in, h_in, h_out, h_out, id_test) for id_test, _, h_in, h_out in cambios])
+            conn.commit()
+            for id_reto in {id_reto for _, id_reto, _, _ in cambios}:
+                on_commit(lambda id_reto=id_reto: reto_detail_cache.invalidate(id_reto))
+            return len(cambios)
+        except Exception as e:
+            conn.rollback()
+            print(f"Error en set_test_blobs: {e}")
+            raise Exception(f"Error interno al migrar tests a blobs: {e}")
+        finally:
+            cursor.close()
+            conn.close()
+
+    @classmethod
+    def get_referenced_blob_hashes(cls):
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("Sin respuesta de la base de datos")
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT hash_entrada FROM TEST WHERE hash_entrada IS NOT NULL
+                UNION
+                SELECT hash_salida FROM TEST WHERE hash_salida IS NOT NULL
+            """)
+            return {fila[0] for fila in cursor.fetchall()}
+        except Exception as e:
+            print(f"Error al ejecutar consulta en get_referenced_blob_hashes: {e}")
+            raise Exception("Error interno al leer los blobs referenciados")
+        finally:
+            cursor.close()
+            conn.close()
+
+    # =====================================================================
+    #  Versión de los casos de prueba (caché de tests del juez)
+    # =====================================================================
+    @staticmethod
+    def _bump_tests_version(cursor, id_reto):
+        """
+        Debe llamarse, dentro de la misma transacción, cada vez que se
+        agregan, modifican o eliminan TEST de un reto existente (o cambian
+        limite_tiempo_segundos / modo_comparacion): los jueces comparan
+        RETO.version_tests con la de su caché y recargan los tests, y los
+        veredictos de reenvíos idénticos dejan de reutilizarse.
+        """
+        cursor.execute("UPDATE RETO SET version_tests = version_tests + 1 WHERE id_reto = %s", (id_reto,))
+        on_commit(lambda: test_set_cache.invalidate(id_reto))
+        on_commit(lambda: reto_detail_cache.invalidate(id_reto))
+
+    @classmethod
+    def bump_tests_version(cls, id_reto):
+        """
+        Marca como nuevos los tests del reto (ej. tras corregirlos a mano en la
+        BD) en su propia transacción. Devuelve la nueva version_tests, o None
+        si el reto no existe.
+        """
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("Sin respuesta de la base de datos")
+
+        cursor = conn.cursor()
+        try:
+            conn.start_transaction()
+            cls._bump_tests_version(cursor, id_reto)
+            cursor.execute("SELECT version_tests FROM RETO WHERE id_reto = %s", (id_reto,))
+            fila = cursor.fetchone()
+            conn.commit()
+            return fila[0] if fila else None
+        except Exception as e:
+            conn.rollback()
+            print(f"Error al ejecutar consulta en bump_tests_version: {e}")
+            raise Exception("Error interno al actualizar la versión de los tests")
+        finally:
+            cursor.close()
+            conn.close()
+
+    # =====================================================================
+    #  MÉTODO DEL JUEZ: todos los casos de prueba (públicos y privados)
+    # =====================================================================
+    @classmethod
+    def get_tests_for_judge(cls, id_reto):
+        conn = get_db_connection()
+        if conn is None:
+            raise Exception("Sin respuesta de la base de datos")
+
+        cursor = conn.cursor(dictionary=True)
+        try:
+            query = """
+                SELECT id_test, datos_entrada, salida_esperada, hash_entrada, hash_salida
+                FROM TEST
+                WHERE id_reto = %s
+                ORDER BY id_test ASC
+            """
+            cursor.execute(query, (id_reto,))
+            return cursor.fetchall()
+        except Exception as e:
+            print(f"Error al ejecutar consulta en get_tests_for_judge: {e}")
+            raise Exception("Error interno al consultar casos de prueba")
+        finally:
+            cursor.close()
+            conn.close()
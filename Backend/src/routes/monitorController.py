@@ -0,0 +1,78 @@
+# Backend/src/routes/monitorController.py
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+from ..database.db import get_pool_stats
+from ..cache.identityCache import identity_cache
+from ..cache.verdictCache import verdict_dedup
+from ..cache.retoDetailCache import reto_detail_cache
+from ..cache.solvedCache import solved_cache
+from ..services.passwordHasher import password_hasher
+from ..services.rankingIndex import ranking_index
+from ..services.submissionEvents import submission_events
+from ..services.submissionScheduler import submission_scheduler
+from ..services.catalogRegistry import catalog_registry
+from ..services.searchIndex import search_index
+from ..services.testBlobStore import test_blob_store
+from ..services.reactionCounters import reaction_counters
+from ..models.catalogoModels.catalogoModel import CatalogoModel
+from ..services.identity import identity_required
+
+monitor_bp = Blueprint('monitor_bp', __name__)
+
+
+# =====================================================================
+# GET Métricas internas (pool de conexiones, etc.)
+# =====================================================================
+@monitor_bp.route('/_monitor/stats', methods=['GET'])
+@jwt_required()
+def get_stats():
+    try:
+        return jsonify({
+            "db_pool": get_pool_stats(),
+            "identity_cache": identity_cache.stats(),
+            "password_hasher": password_hasher.stats(),
+            "ranking_index": ranking_index.stats(),
+            "verdict_dedup": verdict_dedup.stats(),
+            "submission_events": submission_events.stats(),
+            "submission_scheduler": submission_scheduler.stats(),
+            "catalog_registry": catalog_registry.stats(),
+            "reto_detail_cache": reto_detail_cache.stats(),
+            "solved_cache": solved_cache.stats(),
+            "search_index": search_index.stats(),
+            "test_blob_store": test_blob_store.stats(),
+            "reaction_counters": reaction_counters.stats(),
+        }), 200
+    except Exception as e:
+        print(f"Error en GET /_monitor/stats: {e}")
+        return jsonify({"error": "Error interno del servidor"}), 500
+
+
+# =====================================================================
+# POST Recargar el registro de catálogos (tras editarlos a mano en la BD)
+# =====================================================================
+@monitor_bp.route('/_monitor/catalogs/refresh', methods=['POST'])
+@identity_required(roles=[1])
+def refresh_catalogs():
+    try:
+        return jsonify(CatalogoModel.refresh().stats()), 200
+    except Exception as e:
+        print(f"Error en POST /_monitor/catalogs/refresh: {e}")
+        return jsonify({"error": "Error interno del servidor"}), 500
+
+
+
+# =====================================================================
+# POST Reconciliar los contadores de reacciones con REACCION
+# =====================================================================
+@monitor_bp.route('/_monitor/reactions/reconcile', methods=['POST'])
+@identity_required(roles=[1])
+def reconcile_reactions():
+    try:
+        if not reaction_counters.reconcile_async():
+            return jsonify({"message": "Ya hay una reconciliación en curso",
+                            "stats": reaction_counters.stats()}), 409
+        return jsonify({"message": "Reconciliación iniciada",
+                        "stats": reaction_counters.stats()}), 202
+    except Exception as e:
+        print(f"Error en POST /_monitor/reactions/reconcile: {e}")
+        return jsonify({"error": "Error interno del servidor"}), 500
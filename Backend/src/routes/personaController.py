@@ -1,9 +1,11 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, g
 from ..models.personaModels.personaModel import PersonaModel 
 from mysql.connector.errors import IntegrityError 
 from werkzeug.security import check_password_hash
 from flask_jwt_extended import create_access_token
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..services.identity import identity_required
+from ..services.pagination import decode_cursor, paginated_response, InvalidCursorError
 
 
 
@@ -18,8 +20,13 @@ def get_personas():
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
-        personas = PersonaModel.get_all_persons(page, per_page)
-        return jsonify(personas), 200
+        # Paginación por cursor (opcional): ?cursor=<X-Next-Cursor de la página anterior>
+        cursor = request.args.get('cursor')
+        after = decode_cursor(cursor, 1) if cursor else None
+        personas = PersonaModel.get_all_persons(page, per_page, after)
+        return paginated_response(personas, per_page, ('id_persona',))
+    except InvalidCursorError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Error en get_personas: {e}")
         return jsonify({"error": "Error interno del servidor"}), 500
@@ -87,31 +94,42 @@ def delete_person(id_persona):
 # GET Ranking
 # =====================================================================
 @persona_bp.route('/ranking', methods=['GET'])
-@jwt_required()
+@identity_required()
 def get_ranking_leaderboard():
     
-    # Validar que el usuario del token existe
-    try:
-        id_persona_str = get_jwt_identity()
-        id_persona_actual = int(id_persona_str)
-    except (ValueError, TypeError):
-        return jsonify({"error": "Token inválido"}), 422
-
-    if not PersonaModel.get_persona_by_id(id_persona_actual):
-        return jsonify({"error": "Usuario del token no encontrado"}), 401
-    
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
+        cursor = request.args.get('cursor')
+        after = decode_cursor(cursor, 3) if cursor else None
         
-        ranking_data = PersonaModel.get_ranking(page, per_page)
+        ranking_data = PersonaModel.get_ranking(page, per_page, after)
         
-        return jsonify(ranking_data), 200
+        return paginated_response(ranking_data, per_page,
+                                  ('puntaje_total', 'num_retos_resueltos', 'id_persona'))
 
+    except InvalidCursorError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Error en GET /ranking: {e}")
         return jsonify({"error": "Error interno del servidor"}), 500
 
+# =====================================================================
+# GET Mi posición en el Ranking
+# =====================================================================
+@persona_bp.route('/ranking/me', methods=['GET'])
+@identity_required()
+def get_my_ranking():
+    try:
+        posicion = PersonaModel.get_ranking_position(g.id_persona_actual)
+        if posicion is None:
+            return jsonify({"error": "Persona no encontrada en el ranking"}), 404
+        return jsonify(posicion), 200
+
+    except Exception as e:
+        print(f"Error en GET /ranking/me: {e}")
+        return jsonify({"error": "Error interno del servidor"}), 500
+
 # =====================================================================
 #  NUEVA RUTA: Simulador de Juez (Temporal)
 # =====================================================================
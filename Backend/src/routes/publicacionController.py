@@ -3,6 +3,7 @@ from flask import Blueprint, jsonify, request
 from ..models.personaModels import personaModel 
 from ..models.interaccionSocialModels.publicacionModel import PublicacionModel
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..services.pagination import decode_cursor, paginated_response, InvalidCursorError
 
 publicacion_bp = Blueprint('publicacion_bp', __name__)
 
@@ -37,25 +38,29 @@ def crear_publicacion():
 @publicacion_bp.route('/', methods=['GET'])
 @jwt_required()
 def obtener_publicaciones():
-    if get_current_user_id()[1]: # Solo validar token
-        return get_current_user_id()[1]
+    id_persona, error_response = get_current_user_id()
+    if error_response: return error_response
         
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
-        response, status = PublicacionModel.get_all_posts(page, per_page)
-        return jsonify(response), status
+        cursor = request.args.get('cursor')
+        after = decode_cursor(cursor, 2) if cursor else None
+        response, status = PublicacionModel.get_all_posts(page, per_page, after, id_persona)
+        return paginated_response(response, per_page, ('fecha', 'id_publicacion'), status)
+    except InvalidCursorError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @publicacion_bp.route('/<int:id_publicacion>', methods=['GET'])
 @jwt_required()
 def obtener_publicacion_detalle(id_publicacion):
-    if get_current_user_id()[1]: # Solo validar token
-        return get_current_user_id()[1]
+    id_persona, error_response = get_current_user_id()
+    if error_response: return error_response
         
     try:
-        response, status = PublicacionModel.get_post_by_id(id_publicacion)
+        response, status = PublicacionModel.get_post_by_id(id_publicacion, id_persona)
         return jsonify(response), status
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1,35 +1,43 @@
 # Backend/src/routes/retosController.py
-from flask import Blueprint, jsonify, request
-from ..models.personaModels.personaModel import PersonaModel 
+from flask import Blueprint, jsonify, request, g, Response
+from werkzeug.wsgi import wrap_file
+from ..database.db import release_connection
 from ..models.retosModels.retosModel import RetosModel
 from ..models.retosModels.respuestaModel import RespuestaModel
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..models.catalogoModels.catalogoModel import CatalogoModel
+from ..cache.retoDetailCache import reto_detail_cache
+from ..services.identity import identity_required
+from ..services.submissionEvents import submission_events, make_event
+from ..judge.rejudge import start_rejudge, get_rejudge
+from ..services.retoImporter import start_import, get_import
+from ..services.testBlobStore import test_blob_store
+from ..services.pagination import decode_cursor, paginated_response, InvalidCursorError
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
 import mysql
 
 # Blueprint ahora definido SIN prefijo, se añade en app.py
 retos_bp = Blueprint('retos_bp', __name__)
 
+# Espera máxima de una petición long-poll y duración máxima de un stream SSE
+SUBMISSION_LONG_POLL_TIMEOUT = float(os.environ.get('SUBMISSION_LONG_POLL_TIMEOUT', 25))
+SUBMISSION_SSE_MAX_SECONDS = float(os.environ.get('SUBMISSION_SSE_MAX_SECONDS', 300))
+SUBMISSION_SSE_HEARTBEAT = 15
+
 
 #-------------------------------------------------------------------------------
 # RUTA POST para CREAR un nuevo reto
 #-------------------------------------------------------------------------------
 @retos_bp.route('/', methods=['POST'])
-@jwt_required() 
+@identity_required()
 def crear_nuevo_reto():
-    
-    # --- CORRECCIÓN INICIA ---
-    #por lo pronto....
-    # 1. Validar que el usuario del token existe y es un entero válido
-    try:
-        id_persona_str = get_jwt_identity()
-        id_persona_actual = int(id_persona_str) # Convertir de string a int
-    except (ValueError, TypeError):
-        return jsonify({"error": "Token inválido (identidad no numérica)"}), 422 # 422 Unprocessable Entity
 
-    persona = PersonaModel.get_persona_by_id(id_persona_actual)
-    if not persona:
-        return jsonify({"error": "Usuario del token no encontrado"}), 401 # 401 Unauthorized
-    # --- CORRECCIÓN TERMINA ---
+    # La identidad del token ya fue validada por @identity_required (con caché)
+    persona = g.persona_actual
 
     # (Opcional) Verificar Rol de Admin/Tutor
     # if persona['id_rol'] not in [1, 3]: # 1:Admin, 3:Tutor
@@ -56,85 +64,155 @@ def crear_nuevo_reto():
 # RUTA GET para OBTENER TODOS los retos (con paginación)
 #-------------------------------------------------------------------------------
 @retos_bp.route('/', methods=['GET'])
-@jwt_required() 
+@identity_required()
 def get_retos():
-    
-    # --- CORRECCIÓN INICIA ---
-    # Validar que el usuario del token existe y es un entero válido
-    try:
-        id_persona_str = get_jwt_identity()
-        id_persona_actual = int(id_persona_str) # Convertir de string a int
-    except (ValueError, TypeError):
-        return jsonify({"error": "Token inválido (identidad no numérica)"}), 422
-
-    if not PersonaModel.get_persona_by_id(id_persona_actual):
-        return jsonify({"error": "Usuario del token no encontrado"}), 401
-    # --- CORRECCIÓN TERMINA ---
 
     try:
         # Obtener parámetros de paginación de la URL
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
+        cursor = request.args.get('cursor')
+        after = decode_cursor(cursor, 2) if cursor else None
+
+        # Filtros opcionales: ?dificultad=<nombre o id>&lenguaje=<nombre o id>&resuelto=true|false
+        filtros = {}
+        for parametro, catalogo, campo in (('dificultad', 'dificultad', 'id_dificultad'),
+                                           ('lenguaje', 'lenguaje', 'id_lenguaje')):
+            valor = request.args.get(parametro)
+            if not valor:
+                continue
+            catalogos = CatalogoModel.registry()
+            id_item = int(valor) if valor.isdigit() else catalogos.id_of(catalogo, valor)
+            if id_item is None or catalogos.nombre_of(catalogo, id_item) is None:
+                return jsonify({"error": f"'{parametro}' no válido: {valor}"}), 400
+            filtros[campo] = id_item
+
+        resuelto = request.args.get('resuelto')
+        if resuelto is not None:
+            if resuelto.lower() not in ('true', 'false', '1', '0'):
+                return jsonify({"error": "'resuelto' debe ser true o false"}), 400
+            filtros['resuelto'] = resuelto.lower() in ('true', '1')
+            filtros['id_persona'] = g.id_persona_actual
         
         # Llamar al modelo para obtener los retos
-        lista_retos = RetosModel.get_all_retos(page, per_page)
+        lista_retos = RetosModel.get_all_retos(page, per_page, after, **filtros)
         
-        return jsonify(lista_retos), 200
+        return paginated_response(lista_retos, per_page, ('fecha_publicacion', 'id_reto'))
 
+    except InvalidCursorError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Error en retosController GET /: {e}")
         return jsonify({"error": "Error interno del servidor"}), 500
 
+#-------------------------------------------------------------------------------
+# RUTA GET para BUSCAR retos por texto (titulo y descripcion)
+#-------------------------------------------------------------------------------
+@retos_bp.route('/search', methods=['GET'])
+@identity_required()
+def search_retos():
+
+    q = (request.args.get('q') or '').strip()
+    if not q:
+        return jsonify({"error": "El parámetro 'q' es requerido"}), 400
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+
+    try:
+        return jsonify(RetosModel.search_retos(q, limit)), 200
+    except Exception as e:
+        print(f"Error en retosController GET /search: {e}")
+        return jsonify({"error": "Error interno del servidor"}), 500
+
 #-------------------------------------------------------------------------------
 # RUTA GET para OBTENER UN reto por su ID
 #-------------------------------------------------------------------------------
 @retos_bp.route('/<int:id_reto>', methods=['GET'])
-@jwt_required() 
+@identity_required()
 def get_reto(id_reto):
-    
-    # --- CORRECCIÓN INICIA ---
-    # Validar que el usuario del token existe y es un entero válido
-    try:
-        id_persona_str = get_jwt_identity()
-        id_persona_actual = int(id_persona_str) # Convertir de string a int
-    except (ValueError, TypeError):
-        return jsonify({"error": "Token inválido (identidad no numérica)"}), 422
-
-    if not PersonaModel.get_persona_by_id(id_persona_actual):
-        return jsonify({"error": "Usuario del token no encontrado"}), 401
-    # --- CORRECCIÓN TERMINA ---
-    
+
     try:
-        # Llamar al modelo para obtener el detalle del reto
-        reto_detalle = RetosModel.get_reto_by_id(id_reto)
-        
-        if reto_detalle:
-            return jsonify(reto_detalle), 200
-        else:
-            return jsonify({"error": "Reto no encontrado"}), 404
+        # El detalle se sirve ya serializado desde la caché; con If-None-Match
+        # igual al ETag se responde 304 sin cuerpo
+        entrada = reto_detail_cache.get(id_reto)
+        if entrada is None:
+            reto_detalle = RetosModel.get_reto_by_id(id_reto)
+            if not reto_detalle:
+                return jsonify({"error": "Reto no encontrado"}), 404
+
+            cuerpo = jsonify(reto_detalle).get_data()
+            entrada = (cuerpo, hashlib.sha256(cuerpo).hexdigest()[:32])
+            reto_detail_cache.set(id_reto, entrada)
+
+        cuerpo, etag = entrada
+        response = Response(cuerpo, status=200, mimetype='application/json')
+        response.set_etag(etag)
+        # Requiere token: sólo caché privada, revalidando siempre con el ETag
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response.make_conditional(request)
 
     except Exception as e:
         print(f"Error en retosController GET /<id>: {e}")
         return jsonify({"error": "Error interno del servidor"}), 500
-    
+
+
+#-------------------------------------------------------------------------------
+# RUTA GET para DESCARGAR la entrada o la salida de un caso de prueba público
+#-------------------------------------------------------------------------------
+@retos_bp.route('/<int:id_reto>/tests/<int:id_test>/<any(entrada, salida):campo>', methods=['GET'])
+@identity_required()
+def get_test_payload(id_reto, id_test, campo):
+    try:
+        test = RetosModel.get_public_test_payload(id_reto, id_test, campo)
+    except Exception as e:
+        print(f"Error en retosController GET /<id>/tests/<id_test>/{campo}: {e}")
+        return jsonify({"error": "Error interno del servidor"}), 500
+    if test is None:
+        return jsonify({"error": "Caso de prueba no encontrado"}), 404
+    # El envío puede tardar: no se retiene la conexión mientras
+    release_connection()
+
+    if not test['hash']:
+        response = Response(test['texto'] or '', status=200, mimetype='text/plain')
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    # Blob direccionado por contenido: el hash es un ETag que nunca cambia
+    gzip_aceptado = 'gzip' in request.accept_encodings
+    etag = f"{test['hash']}-gz" if gzip_aceptado else test['hash']
+    if etag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    try:
+        if gzip_aceptado:
+            # Se envía el archivo comprimido tal cual, sin descomprimirlo
+            archivo = test_blob_store.open_compressed(test['hash'])
+            response = Response(wrap_file(request.environ, archivo), status=200, mimetype='text/plain',
+                                direct_passthrough=True)
+            response.headers['Content-Encoding'] = 'gzip'
+            response.headers['Content-Length'] = os.fstat(archivo.fileno()).st_size
+        else:
+            response = Response(test_blob_store.iter_chunks(test['hash']), status=200, mimetype='text/plain')
+            response.headers['Content-Length'] = test_blob_store.size(test['hash'])
+    except FileNotFoundError:
+        print(f"Falta el blob {test['hash']} del test {id_test}")
+        return jsonify({"error": "Contenido del caso de prueba no disponible"}), 500
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    response.set_etag(etag)
+    return response
+
 
 
 #-------------------------------------------------------------------------------
 # RUTA POST para ENVIAR (SUBMIT) una respuesta a un reto
 #-------------------------------------------------------------------------------
 @retos_bp.route('/<int:id_reto>/submit', methods=['POST'])
-@jwt_required()
+@identity_required()
 def submit_respuesta(id_reto):
     
-    # 1. Validar identidad del usuario
-    try:
-        id_persona_str = get_jwt_identity()
-        id_persona_actual = int(id_persona_str)
-    except (ValueError, TypeError):
-        return jsonify({"error": "Token inválido (identidad no numérica)"}), 422
-
-    if not PersonaModel.get_persona_by_id(id_persona_actual):
-        return jsonify({"error": "Usuario del token no encontrado"}), 401
+    # 1. Identidad del usuario (validada por @identity_required)
+    id_persona_actual = g.id_persona_actual
 
     # 2. Obtener y validar el JSON de entrada
     data = request.json
@@ -150,8 +228,8 @@ def submit_respuesta(id_reto):
     if not isinstance(id_lenguaje, int):
         return jsonify({"error": "'id_lenguaje' debe ser un número entero (ID)"}), 400
 
-    # (Validación extra futura: ¿El id_lenguaje está permitido para este id_reto?)
-    
+    # (El modelo valida que el id_lenguaje esté permitido para este id_reto)
+
     # 3. Llamar al modelo para crear el envío "Pendiente"
     try:
         response, status_code = RespuestaModel.create_submission(
@@ -160,8 +238,193 @@ def submit_respuesta(id_reto):
             id_lenguaje=id_lenguaje,
             codigo_fuente=codigo_fuente
         )
+        if status_code == 429:
+            # Persona o cola del juez al límite: el cliente debe reintentar más tarde
+            return jsonify(response), status_code, {'Retry-After': str(response['retry_after'])}
         return jsonify(response), status_code
         
     except Exception as e:
         print(f"Error en retosController POST /<id>/submit: {e}")
-        return jsonify({"error": "Error interno del servidor", "detalle": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": "Error interno del servidor", "detalle": str(e)}), 500
+
+
+#-------------------------------------------------------------------------------
+# RUTA GET para ESPERAR el veredicto de una respuesta (SSE o long-poll)
+#-------------------------------------------------------------------------------
+def load_submission_events(ids):
+    """ Cargador del sondeo de respaldo de submission_events (ver app.py). """
+    return [_event_from_row(fila) for fila in RespuestaModel.get_submission_statuses(ids)]
+
+
+def _event_from_row(fila):
+    return make_event(fila['id_respuesta'], fila['nombre_estado'], fila['puntaje'], fila['tiempo_ejecucion_ms'],
+                      motivo=fila.get('motivo_error'))
+
+
+def _sse(event):
+    return f"event: estado\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+def _sse_stream(subscription, actual):
+    # No toca la BD: la conexión de la petición ya se devolvió al pool
+    with subscription:
+        yield _sse(actual)
+        if actual['final']:
+            return
+        deadline = time.monotonic() + SUBMISSION_SSE_MAX_SECONDS
+        while True:
+            restante = deadline - time.monotonic()
+            if restante <= 0:
+                return
+            event = subscription.get(min(SUBMISSION_SSE_HEARTBEAT, restante))
+            if event is None:
+                yield ": ping\n\n"
+                continue
+            yield _sse(event)
+            if event['final']:
+                return
+
+
+@retos_bp.route('/submissions/<int:id_respuesta>/events', methods=['GET'])
+@identity_required()
+def submission_status_events(id_respuesta):
+
+    # Suscribirse ANTES de leer el estado: un veredicto guardado entre la
+    # lectura y la suscripción se perdería
+    subscription = submission_events.subscribe(id_respuesta)
+    try:
+        filas = RespuestaModel.get_submission_statuses([id_respuesta])
+    except Exception as e:
+        subscription.close()
+        print(f"Error en retosController GET /submissions/<id>/events: {e}")
+        return jsonify({"error": "Error interno del servidor", "detalle": str(e)}), 500
+
+    if not filas:
+        subscription.close()
+        return jsonify({"error": "Respuesta no encontrada"}), 404
+    if filas[0]['id_persona'] != g.id_persona_actual:
+        subscription.close()
+        return jsonify({"error": "No tienes acceso a esta respuesta"}), 403
+
+    actual = _event_from_row(filas[0])
+
+    # La espera no usa la BD: no se retiene una conexión del pool por cliente
+    release_connection()
+
+    if 'text/event-stream' in request.headers.get('Accept', ''):
+        return Response(
+            _sse_stream(subscription, actual),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        )
+
+    # Long-poll: responde con el veredicto en cuanto llegue, o con el estado actual al vencer el plazo
+    with subscription:
+        if not actual['final']:
+            timeout = request.args.get('timeout', SUBMISSION_LONG_POLL_TIMEOUT, type=float)
+            actual = subscription.get(min(max(timeout, 0), SUBMISSION_LONG_POLL_TIMEOUT)) or actual
+    return jsonify(actual), 200
+
+
+#-------------------------------------------------------------------------------
+# RUTAS de RE-EVALUACIÓN (rejudge) de todas las respuestas de un reto (Admin)
+#-------------------------------------------------------------------------------
+@retos_bp.route('/<int:id_reto>/rejudge', methods=['POST'])
+@identity_required(roles=[1])
+def rejudge_reto(id_reto):
+    data = request.get_json(silent=True) or {}
+    opciones = {k: data[k] for k in ('workers', 'batch_size', 'rate', 'max_backlog') if k in data}
+    try:
+        rejudger = start_rejudge(id_reto, **opciones)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Opciones de re-evaluación inválidas: {e}"}), 400
+
+    if rejudger is None:
+        return jsonify({"error": "Ya hay una re-evaluación en curso para este reto",
+                        "progreso": get_rejudge(id_reto).progress()}), 409
+    return jsonify({"message": "Re-evaluación iniciada", "progreso": rejudger.progress()}), 202
+
+
+@retos_bp.route('/<int:id_reto>/rejudge', methods=['GET'])
+@identity_required(roles=[1])
+def rejudge_progreso(id_reto):
+    rejudger = get_rejudge(id_reto)
+    if rejudger is None:
+        return jsonify({"error": "No hay re-evaluaciones de este reto"}), 404
+    return jsonify(rejudger.progress()), 200
+
+
+@retos_bp.route('/<int:id_reto>/rejudge', methods=['DELETE'])
+@identity_required(roles=[1])
+def rejudge_cancelar(id_reto):
+    rejudger = get_rejudge(id_reto)
+    if rejudger is None or not rejudger.running:
+        return jsonify({"error": "No hay una re-evaluación en curso para este reto"}), 404
+    rejudger.cancel()
+    return jsonify({"message": "Re-evaluación cancelada tras el lote en curso", "progreso": rejudger.progress()}), 202
+
+
+#-------------------------------------------------------------------------------
+# RUTAS de IMPORTACIÓN MASIVA de retos (Admin)
+#-------------------------------------------------------------------------------
+@retos_bp.route('/import', methods=['POST'])
+@identity_required(roles=[1])
+def importar_retos():
+    """
+    Recibe un paquete (JSONL, .zip o .tar.gz, ver services/retoImporter.py)
+    como cuerpo de la petición o como archivo 'paquete' de un formulario, lo
+    copia a disco por bloques y lo importa en segundo plano.
+    """
+    opciones = {}
+    try:
+        if 'batch_size' in request.args:
+            opciones['batch_size'] = int(request.args['batch_size'])
+    except ValueError:
+        return jsonify({"error": "'batch_size' debe ser un entero"}), 400
+    opciones['dry_run'] = request.args.get('dry_run', '').lower() in ('1', 'true', 'si')
+
+    # La importación usa sus propias conexiones (una transacción por lote)
+    release_connection()
+
+    fd, path = tempfile.mkstemp(prefix='codium-import-', suffix='.paquete')
+    try:
+        with os.fdopen(fd, 'wb') as destino:
+            if request.files:
+                paquete = request.files.get('paquete')
+                if paquete is None:
+                    raise ValueError("El formulario debe incluir el archivo 'paquete'")
+                shutil.copyfileobj(paquete.stream, destino, 1024 * 1024)
+            else:
+                shutil.copyfileobj(request.stream, destino, 1024 * 1024)
+        if os.path.getsize(path) == 0:
+            raise ValueError("No se recibió ningún paquete")
+    except ValueError as e:
+        os.remove(path)
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        os.remove(path)
+        print(f"Error en retosController POST /import: {e}")
+        return jsonify({"error": "Error interno del servidor", "detalle": str(e)}), 500
+
+    id_importacion, importer = start_import(path, remove_file=True, **opciones)
+    return jsonify({"message": "Importación iniciada", "id_importacion": id_importacion,
+                    "progreso": importer.progress()}), 202
+
+
+@retos_bp.route('/import/<int:id_importacion>', methods=['GET'])
+@identity_required(roles=[1])
+def importacion_progreso(id_importacion):
+    importer = get_import(id_importacion)
+    if importer is None:
+        return jsonify({"error": "Importación no encontrada"}), 404
+    return jsonify(importer.progress()), 200
+
+
+@retos_bp.route('/import/<int:id_importacion>', methods=['DELETE'])
+@identity_required(roles=[1])
+def importacion_cancelar(id_importacion):
+    importer = get_import(id_importacion)
+    if importer is None or not importer.running:
+        return jsonify({"error": "No hay una importación en curso con ese id"}), 404
+    importer.cancel()
+    return jsonify({"message": "Importación cancelada tras el lote en curso", "progreso": importer.progress()}), 202
@@ -2,7 +2,7 @@ from flask import Blueprint, jsonify, request
 from ..models.personaModels.personaModel import PersonaModel 
 from ..models.personaModels.authModel import authModel
 from mysql.connector.errors import IntegrityError 
-from werkzeug.security import check_password_hash
+from .passwordHasher import password_hasher, HasherOverloadedError
 from flask_jwt_extended import create_access_token
 import re
 
@@ -10,6 +10,14 @@ import re
 auth_bp = Blueprint('auth_bp', __name__)
 
 
+def overloaded_response(error):
+    """ 503 + Retry-After cuando el pool de hashing rechaza el trabajo """
+    response = jsonify({"error": str(error)})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+
 ## -----------------------------------------------------
 ## RUTA CREATE (POST)
 ## -----------------------------------------------------
@@ -63,6 +71,8 @@ def create_person():
 
     except KeyError as e:
         return jsonify({"error": f"Falta el campo: {str(e)}"}), 400
+    except HasherOverloadedError as e:
+        return overloaded_response(e)
     except Exception as e:
         print(f"Error en create_person: {e}")
         return jsonify({"error": "Error interno del servidor"}), 500
@@ -143,6 +153,8 @@ def google_auth():
                 # Retornar errores del modelo (ej. 409 Conflict)
                 return jsonify(response_dict), status_code
 
+        except HasherOverloadedError as e:
+            return overloaded_response(e)
         except Exception as e:
             print(f"Error en google_auth/registro: {e}")
             return jsonify({"error": "Error interno al procesar el registro de Google"}), 500
@@ -168,10 +180,20 @@ def login_person():
         user_credentials = PersonaModel.get_credentials(correo)
 
         # 2. Verificamos si el usuario existe Y la contraseña es correcta
-        if not user_credentials or not check_password_hash(user_credentials['contraseña_hash'], contrasena_plana):
+        #    (la verificación se ejecuta en el pool de procesos de hashing)
+        if not user_credentials or not password_hasher.verify(user_credentials['contraseña_hash'], contrasena_plana):
             # Es importante dar un mensaje genérico por seguridad
             return jsonify({"error": "Credenciales inválidas"}), 401 # Unauthorized
 
+        # 2.1 Rehash transparente si cambiaron los parámetros de hashing
+        try:
+            if password_hasher.needs_rehash(user_credentials['contraseña_hash']):
+                nuevo_hash = password_hasher.rehash(contrasena_plana)
+                PersonaModel.update_password_hash(user_credentials['id_persona'], nuevo_hash)
+        except Exception as e:
+            # No es motivo para fallar el login: se reintentará en el próximo inicio de sesión
+            print(f"No se pudo actualizar el hash de la contraseña: {e}")
+
         # 3. Crear el token si las credenciales son válidas
         # El 'identity' es el id_persona que será guardado en el token
         access_token = create_access_token(identity=str(user_credentials['id_persona']))
@@ -182,6 +204,8 @@ def login_person():
             "id_persona": user_credentials['id_persona']
         }), 200
 
+    except HasherOverloadedError as e:
+        return overloaded_response(e)
     except Exception as e:
         print(f"Error en /login: {e}")
         return jsonify({"error": "Error interno del servidor"}), 500
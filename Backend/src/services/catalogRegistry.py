@@ -0,0 +1,150 @@
+# Backend/src/services/catalogRegistry.py
+import os
+import threading
+import time
+
+
+# Cada cuánto se compara la versión de los catálogos en la BD con la cargada
+CATALOG_CHECK_SECONDS = float(os.environ.get('CATALOG_CHECK_SECONDS', 60))
+
+# catálogo -> (tabla, columna id, columna nombre)
+CATALOGOS = {
+    'dificultad': ('DIFICULTAD', 'id_dificultad', 'nombre_dificultad'),
+    'lenguaje': ('LENGUAJE', 'id_lenguaje', 'nombre_lenguaje'),
+    'estado_respuesta': ('ESTADO_RESPUESTA', 'id_estado', 'nombre_estado'),
+    'tipo_reaccion': ('TIPO_REACCION', 'id_tipo_reaccion', 'nombre_reaccion'),
+}
+
+
+class CatalogRegistry:
+    """
+    Catálogos (DIFICULTAD, LENGUAJE, ESTADO_RESPUESTA, TIPO_REACCION) y los
+    lenguajes permitidos de cada reto (RETO_LENGUAJE) en memoria, para
+    resolver nombre <-> id sin consultar la BD en cada escritura.
+
+    Se carga al arrancar. Cada `check_seconds` se compara en segundo plano
+    la versión de la BD (huella de las tablas, ver CatalogoModel.get_version)
+    con la cargada y, si otro proceso los modificó, se recarga. refresh()
+    fuerza la recarga.
+    """
+
+    def __init__(self, check_seconds=CATALOG_CHECK_SECONDS):
+        self.check_seconds = check_seconds
+        self._lock = threading.RLock()
+        self._by_name = {}        # catálogo -> {nombre: id}
+        self._by_id = {}          # catálogo -> {id: fila}
+        self._reto_lenguajes = {} # id_reto -> frozenset(id_lenguaje)
+        self._version = None
+        self._loaded_at = None
+        self._checked_at = None
+        self._checking = False
+        self._stats = {'loads': 0, 'version_checks': 0, 'stale_reloads': 0}
+
+    # -----------------------------------------------------------------
+    # Carga
+    # -----------------------------------------------------------------
+    def load(self, snapshot):
+        """ snapshot: {'version', <catálogo>: [filas], 'reto_lenguaje': [(id_reto, id_lenguaje)]} """
+        by_name, by_id = {}, {}
+        for catalogo, (_, columna_id, columna_nombre) in CATALOGOS.items():
+            filas = snapshot.get(catalogo) or []
+            by_name[catalogo] = {fila[columna_nombre]: fila[columna_id] for fila in filas}
+            by_id[catalogo] = {fila[columna_id]: dict(fila) for fila in filas}
+
+        reto_lenguajes = {}
+        for id_reto, id_lenguaje in snapshot.get('reto_lenguaje') or []:
+            reto_lenguajes.setdefault(id_reto, set()).add(id_lenguaje)
+
+        with self._lock:
+            self._by_name = by_name
+            self._by_id = by_id
+            self._reto_lenguajes = {k: frozenset(v) for k, v in reto_lenguajes.items()}
+            self._version = snapshot.get('version')
+            self._loaded_at = self._checked_at = time.monotonic()
+            self._stats['loads'] += 1
+
+    def ensure_loaded(self, loader, version_loader=None):
+        """
+        Carga los catálogos con `loader()` si aún no están. Si pasó
+        check_seconds desde la última verificación, compara en segundo plano
+        `version_loader()` con la versión cargada y recarga si cambió.
+        """
+        if self._loaded_at is None:
+            with self._lock:
+                if self._loaded_at is None:
+                    self.load(loader())
+            return
+
+        if version_loader is None or not self.check_seconds:
+            return
+        if time.monotonic() - self._checked_at > self.check_seconds:
+            with self._lock:
+                if self._checking:
+                    return
+                self._checking = True
+            threading.Thread(target=self._check_version, args=(loader, version_loader), daemon=True).start()
+
+    def _check_version(self, loader, version_loader):
+        try:
+            version = version_loader()
+            with self._lock:
+                self._checked_at = time.monotonic()
+                self._stats['version_checks'] += 1
+                stale = version != self._version
+            if stale:
+                self.load(loader())
+                with self._lock:
+                    self._stats['stale_reloads'] += 1
+        except Exception as e:
+            print(f"Error al verificar la versión de los catálogos: {e}")
+        finally:
+            self._checking = False
+
+    def refresh(self, loader):
+        """ Recarga inmediata (ej. tras modificar un catálogo a mano). """
+        self.load(loader())
+
+    @property
+    def loaded(self):
+        return self._loaded_at is not None
+
+    # -----------------------------------------------------------------
+    # Consultas
+    # -----------------------------------------------------------------
+    def id_of(self, catalogo, nombre):
+        return self._by_name[catalogo].get(nombre)
+
+    def nombre_of(self, catalogo, id_item):
+        fila = self._by_id[catalogo].get(id_item)
+        return fila[CATALOGOS[catalogo][2]] if fila else None
+
+    def ids(self, catalogo):
+        """ {nombre: id} de un catálogo (copia). """
+        return dict(self._by_name[catalogo])
+
+    def rows(self, catalogo):
+        """ Filas del catálogo ordenadas por id. """
+        by_id = self._by_id[catalogo]
+        return [dict(by_id[k]) for k in sorted(by_id)]
+
+    def lenguajes_de_reto(self, id_reto):
+        """ ids de lenguaje permitidos en el reto, o None si el reto no está cargado. """
+        return self._reto_lenguajes.get(id_reto)
+
+    def set_reto_lenguajes(self, id_reto, ids_lenguaje):
+        with self._lock:
+            self._reto_lenguajes[id_reto] = frozenset(ids_lenguaje)
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                'loaded': self.loaded,
+                'version': self._version,
+                'sizes': {catalogo: len(items) for catalogo, items in self._by_name.items()},
+                'retos': len(self._reto_lenguajes),
+                'age_seconds': round(time.monotonic() - self._loaded_at, 1) if self.loaded else None,
+            }
+
+
+catalog_registry = CatalogRegistry()
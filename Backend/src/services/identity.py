@@ -0,0 +1,53 @@
+# Backend/src/services/identity.py
+from functools import wraps
+from flask import g, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..models.personaModels.personaModel import PersonaModel
+from ..cache.identityCache import identity_cache
+
+
+def resolve_identity(id_persona):
+    """
+    Devuelve la persona activa del token, consultando primero la caché
+    de identidades y sólo ante un fallo la base de datos.
+    """
+    persona = identity_cache.get(id_persona)
+    if persona is None:
+        persona = PersonaModel.get_persona_by_id(id_persona)
+        if persona:
+            identity_cache.set(id_persona, persona)
+    return persona
+
+
+def identity_required(roles=None):
+    """
+    Igual que @jwt_required(), pero además valida que el usuario del token
+    existe (y opcionalmente su rol). Deja en `g.id_persona_actual` y
+    `g.persona_actual` la identidad resuelta para el controlador.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        @jwt_required()
+        def wrapper(*args, **kwargs):
+            try:
+                id_persona_actual = int(get_jwt_identity())
+            except (ValueError, TypeError):
+                return jsonify({"error": "Token inválido (identidad no numérica)"}), 422
+
+            try:
+                persona = resolve_identity(id_persona_actual)
+            except Exception as e:
+                print(f"Error al resolver la identidad del token: {e}")
+                return jsonify({"error": "Error interno del servidor"}), 500
+
+            if not persona:
+                return jsonify({"error": "Usuario del token no encontrado"}), 401
+
+            if roles is not None and persona['id_rol'] not in roles:
+                return jsonify({"error": "No tienes permisos para realizar esta acción"}), 403
+
+            g.id_persona_actual = id_persona_actual
+            g.persona_actual = persona
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,54 @@
+# Backend/src/services/pagination.py
+import base64
+import json
+from datetime import datetime
+from flask import jsonify
+
+
+# Cabecera con el cursor de la página siguiente (el cuerpo sigue siendo un arreglo)
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    """ Convierte la clave de orden de la última fila en un token opaco. """
+    payload = [{'dt': v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, arity):
+    """ Inversa de encode_cursor. Lanza InvalidCursorError si el token no es válido. """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values = tuple(
+            datetime.fromisoformat(v['dt']) if isinstance(v, dict) else v
+            for v in payload
+        )
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursorError("Cursor de paginación inválido")
+
+    if len(values) != arity or not all(isinstance(v, (int, datetime)) for v in values):
+        raise InvalidCursorError("Cursor de paginación inválido")
+    return values
+
+
+def next_cursor(items, per_page, fields):
+    """ Cursor de la página siguiente, o None si esta fue la última. """
+    if not items or len(items) < per_page:
+        return None
+    last = items[-1]
+    return encode_cursor([last[field] for field in fields])
+
+
+def paginated_response(items, per_page, fields, status_code=200):
+    response = jsonify(items)
+    response.status_code = status_code
+    cursor = next_cursor(items, per_page, fields)
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+    return response
@@ -0,0 +1,159 @@
+# Backend/src/services/passwordHasher.py
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+
+
+# Parámetros de hashing (formato de Werkzeug, ej. 'scrypt:32768:8:1' o 'pbkdf2:sha256:600000')
+PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+PASSWORD_HASH_SALT_LENGTH = int(os.environ.get('PASSWORD_HASH_SALT_LENGTH', 16))
+
+# Pool de procesos: 0 workers = hashing en el propio hilo (útil en desarrollo)
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+PASSWORD_HASH_MAX_QUEUE = int(os.environ.get('PASSWORD_HASH_MAX_QUEUE', max(1, PASSWORD_HASH_WORKERS) * 8))
+PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+PASSWORD_HASH_RETRY_AFTER = int(os.environ.get('PASSWORD_HASH_RETRY_AFTER', 2))
+
+
+class HasherOverloadedError(Exception):
+    """ La cola de hashing está llena: la petición debe rechazarse (503). """
+
+    def __init__(self, retry_after=PASSWORD_HASH_RETRY_AFTER):
+        super().__init__("Servicio de autenticación saturado, intenta de nuevo en unos segundos")
+        self.retry_after = retry_after
+
+
+def _hash_method_of(password_hash):
+    """ 'scrypt:32768:8:1$salt$hash' -> 'scrypt:32768:8:1' """
+    return password_hash.split('$', 1)[0]
+
+
+def _full_method(method):
+    """
+    Método con los parámetros por defecto que completa Werkzeug, tal como
+    queda al inicio del hash ('scrypt' -> 'scrypt:32768:8:1'), sin calcular
+    ningún hash.
+    """
+    nombre, *args = method.split(':')
+    # Los parámetros que falten se completan con los valores por defecto de Werkzeug
+    if nombre == 'scrypt' and len(args) < 3:
+        n, r, p = args + [str(2 ** 15), '8', '1'][len(args):]
+        return f"scrypt:{n}:{r}:{p}"
+    if nombre == 'pbkdf2' and len(args) < 2:
+        hash_name, iterations = args + ['sha256', str(DEFAULT_PBKDF2_ITERATIONS)][len(args):]
+        return f"pbkdf2:{hash_name}:{iterations}"
+    return method
+
+
+class PasswordHasher:
+    """
+    Ejecuta generate_password_hash / check_password_hash en un pool de
+    procesos acotado, para que el coste de CPU del hashing no bloquee los
+    hilos que atienden peticiones. Si la cola supera el límite se rechaza
+    el trabajo en lugar de acumular latencia (load shedding).
+    """
+
+    def __init__(self, method, salt_length, workers, max_queue, timeout):
+        # Con todos sus parámetros: así se generan los hashes y se compara en needs_rehash
+        self.method = _full_method(method)
+        self.salt_length = salt_length
+        self.workers = workers
+        self.timeout = timeout
+
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_queue)
+        self.max_queue = max_queue
+        self._current_method = self.method
+
+        self._stats_lock = threading.Lock()
+        self._stats = {'hashes': 0, 'verifications': 0, 'rehashes': 0,
+                       'rejected': 0, 'in_flight': 0, 'time_total_ms': 0.0}
+
+    # -----------------------------------------------------------------
+    # API pública
+    # -----------------------------------------------------------------
+    def hash(self, contrasena_plana):
+        self._count('hashes')
+        return self._run(generate_password_hash, contrasena_plana, self.method, self.salt_length)
+
+    def verify(self, password_hash, contrasena_plana):
+        self._count('verifications')
+        return self._run(check_password_hash, password_hash, contrasena_plana)
+
+    def needs_rehash(self, password_hash):
+        """ True si el hash almacenado se generó con parámetros distintos a los actuales. """
+        return _hash_method_of(password_hash) != self._current_method
+
+    def rehash(self, contrasena_plana):
+        self._count('rehashes')
+        return self.hash(contrasena_plana)
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        total = stats['hashes'] + stats['verifications']
+        stats['time_avg_ms'] = round(stats.pop('time_total_ms') / total, 3) if total else 0.0
+        stats.update({'method': self.method, 'workers': self.workers, 'max_queue': self.max_queue})
+        return stats
+
+    # -----------------------------------------------------------------
+    # Ejecución en el pool
+    # -----------------------------------------------------------------
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return self._timed(fn, *args)
+
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected')
+            raise HasherOverloadedError()
+
+        self._count('in_flight')
+        try:
+            start = time.monotonic()
+            future = self._get_executor().submit(fn, *args)
+            result = future.result(timeout=self.timeout)
+            self._add_time(start)
+            return result
+        finally:
+            self._count('in_flight', -1)
+            self._slots.release()
+
+    def _timed(self, fn, *args):
+        start = time.monotonic()
+        result = fn(*args)
+        self._add_time(start)
+        return result
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    # 'spawn' evita heredar locks/hilos del servidor web al crear los workers
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                    )
+                    atexit.register(self._executor.shutdown, wait=False, cancel_futures=True)
+        return self._executor
+
+    def _count(self, key, delta=1):
+        with self._stats_lock:
+            self._stats[key] += delta
+
+    def _add_time(self, start):
+        with self._stats_lock:
+            self._stats['time_total_ms'] += (time.monotonic() - start) * 1000
+
+
+password_hasher = PasswordHasher(
+    method=PASSWORD_HASH_METHOD,
+    salt_length=PASSWORD_HASH_SALT_LENGTH,
+    workers=PASSWORD_HASH_WORKERS,
+    max_queue=PASSWORD_HASH_MAX_QUEUE,
+    timeout=PASSWORD_HASH_TIMEOUT,
+)
@@ -0,0 +1,365 @@
+# Backend/src/services/rankingIndex.py
+import os
+import random
+import threading
+import time
+from collections import deque
+
+
+RANKING_INDEX_REFRESH_SECONDS = int(os.environ.get('RANKING_INDEX_REFRESH_SECONDS', 300))
+
+
+# =====================================================================
+# Árbol de estadísticos de orden (treap con tamaño de subárbol)
+# =====================================================================
+class _Node:
+    __slots__ = ('key', 'priority', 'left', 'right', 'size')
+
+    def __init__(self, key, priority=None):
+        self.key = key
+        self.priority = random.random() if priority is None else priority
+        self.left = None
+        self.right = None
+        self.size = 1
+
+
+def _size(node):
+    return node.size if node else 0
+
+
+def _update(node):
+    node.size = 1 + _size(node.left) + _size(node.right)
+
+
+def _split(node, key):
+    """ Divide en (claves < key, claves >= key). """
+    if node is None:
+        return None, None
+    if node.key < key:
+        left, right = _split(node.right, key)
+        node.right = left
+        _update(node)
+        return node, right
+    left, right = _split(node.left, key)
+    node.left = right
+    _update(node)
+    return left, node
+
+
+def _merge(left, right):
+    """ Une dos treaps donde todas las claves de `left` son menores que las de `right`. """
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+
+def _pop_min(node):
+    """ Devuelve el subárbol sin su clave mínima. """
+    if node.left is None:
+        return node.right
+    node.left = _pop_min(node.left)
+    _update(node)
+    return node
+
+
+class OrderStatisticTree:
+    """
+    Conjunto ordenado de claves únicas con inserción, borrado, rank (posición
+    de una clave) y select (clave en una posición) en O(log n) esperado.
+    """
+
+    def __init__(self):
+        self._root = None
+
+    def __len__(self):
+        return _size(self._root)
+
+    def build(self, sorted_keys):
+        """ Construye el árbol balanceado en O(n) a partir de claves ya ordenadas. """
+        priorities = sorted((random.random() for _ in sorted_keys), reverse=True)
+
+        def build_range(lo, hi):
+            if lo >= hi:
+                return None
+            mid = (lo + hi) // 2
+            node = _Node(sorted_keys[mid], 0.0)
+            node.left = build_range(lo, mid)
+            node.right = build_range(mid + 1, hi)
+            _update(node)
+            return node
+
+        self._root = build_range(0, len(sorted_keys))
+
+        # Prioridades en orden por niveles: cada padre queda con prioridad mayor que sus hijos
+        queue = deque([self._root] if self._root else [])
+        it = iter(priorities)
+        while queue:
+            node = queue.popleft()
+            node.priority = next(it)
+            if node.left:
+                queue.append(node.left)
+            if node.right:
+                queue.append(node.right)
+
+    def insert(self, key):
+        left, right = _split(self._root, key)
+        self._root = _merge(_merge(left, _Node(key)), right)
+
+    def remove(self, key):
+        left, right = _split(self._root, key)
+        # `right` empieza en `key` si la clave existe: en ese caso quitamos su mínimo
+        if right is not None:
+            minimum = right
+            while minimum.left is not None:
+                minimum = minimum.left
+            if minimum.key == key:
+                right = _pop_min(right)
+        self._root = _merge(left, right)
+
+    def rank(self, key):
+        """ Número de claves estrictamente menores que `key`. """
+        node, rank = self._root, 0
+        while node is not None:
+            if node.key < key:
+                rank += _size(node.left) + 1
+                node = node.right
+            else:
+                node = node.left
+        return rank
+
+    def select(self, index):
+        """ Clave en la posición `index` (0 = menor). """
+        node = self._root
+        while node is not None:
+            left_size = _size(node.left)
+            if index < left_size:
+                node = node.left
+            elif index == left_size:
+                return node.key
+            else:
+                index -= left_size + 1
+                node = node.right
+        raise IndexError(index)
+
+
+# =====================================================================
+# Índice de ranking en memoria
+# =====================================================================
+class RankingIndex:
+    """
+    Ranking de personas activas mantenido en proceso. Mismo orden que
+    PersonaModel.get_ranking (puntaje DESC, retos DESC, id ASC): la clave
+    del árbol es (-puntaje_total, -num_retos_resueltos, id_persona).
+
+    Se carga completo una vez y después se actualiza incrementalmente.
+    Cada cierto tiempo se recarga para absorber cambios hechos por otros
+    procesos (otros workers web o jueces externos). Las personas que cambian
+    mientras se lee la instantánea se anotan y, al reemplazar el índice, se
+    vuelven a leer de la BD (valores absolutos): un incremento puede estar ya
+    incluido en la instantánea, así que no se puede volver a sumar.
+    """
+
+    def __init__(self, refresh_seconds=RANKING_INDEX_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._tree = OrderStatisticTree()
+        self._entries = {}  # id_persona -> (clave, nombre_usuario)
+        self._lock = threading.RLock()
+        self._loaded_at = None
+        self._reloading = False
+        self._dirty = None     # id_persona modificadas durante una recarga
+
+    @staticmethod
+    def _key(id_persona, puntaje_total, num_retos_resueltos):
+        return (-(puntaje_total or 0), -(num_retos_resueltos or 0), id_persona)
+
+    # -----------------------------------------------------------------
+    # Carga
+    # -----------------------------------------------------------------
+    def load(self, rows):
+        """ rows: iterable de dicts con id_persona, nombre_usuario, puntaje_total, num_retos_resueltos """
+        entries = {}
+        for row in rows:
+            key = self._key(row['id_persona'], row['puntaje_total'], row['num_retos_resueltos'])
+            entries[row['id_persona']] = (key, row['nombre_usuario'])
+
+        tree = OrderStatisticTree()
+        tree.build(sorted(key for key, _ in entries.values()))
+
+        with self._lock:
+            self._tree = tree
+            self._entries = entries
+            self._loaded_at = time.monotonic()
+
+    def ensure_loaded(self, loader, rows_loader=None):
+        """
+        Carga el índice con `loader()` si aún no existe. Si está vencido se
+        recarga en segundo plano y mientras tanto se sigue sirviendo el actual.
+        rows_loader(ids): filas actuales de esas personas (las inactivas no
+        vienen), para corregir las que cambian durante la recarga.
+        """
+        if self._loaded_at is None:
+            with self._lock:
+                if self._loaded_at is None:
+                    self.load(loader())
+            return
+
+        if self.refresh_seconds and time.monotonic() - self._loaded_at > self.refresh_seconds:
+            with self._lock:
+                if self._reloading:
+                    return
+                self._reloading = True
+            threading.Thread(target=self._reload, args=(loader, rows_loader), daemon=True).start()
+
+    def _reload(self, loader, rows_loader=None):
+        with self._lock:
+            self._dirty = set() if rows_loader is not None else None
+        try:
+            self.load(loader())
+            if rows_loader is not None:
+                self._refresh_dirty(rows_loader)
+        except Exception as e:
+            print(f"Error al recargar el índice de ranking: {e}")
+        finally:
+            with self._lock:
+                self._dirty = None
+            self._reloading = False
+
+    def _refresh_dirty(self, rows_loader, rounds=3):
+        """
+        Vuelve a leer las personas modificadas durante la recarga. Si alguna
+        cambia otra vez mientras se lee, se repite con ésas (en la última
+        ronda se aplica lo leído igualmente).
+        """
+        for ronda in range(rounds):
+            with self._lock:
+                ids, self._dirty = self._dirty, set()
+            if not ids:
+                return
+            rows = {row['id_persona']: row for row in rows_loader(list(ids))}
+            with self._lock:
+                for id_persona in ids:
+                    if id_persona in self._dirty and ronda < rounds - 1:
+                        continue
+                    row = rows.get(id_persona)
+                    if row is None:
+                        self._remove(id_persona)
+                    else:
+                        self._upsert(id_persona, row['nombre_usuario'],
+                                     row['puntaje_total'], row['num_retos_resueltos'])
+
+    @property
+    def loaded(self):
+        return self._loaded_at is not None
+
+    # -----------------------------------------------------------------
+    # Actualizaciones incrementales
+    # -----------------------------------------------------------------
+    def _record(self, id_persona):
+        # Con el lock tomado: si hay una recarga en curso, se relee al terminarla
+        if self._dirty is not None:
+            self._dirty.add(id_persona)
+
+    def upsert(self, id_persona, nombre_usuario, puntaje_total, num_retos_resueltos):
+        if not self.loaded:
+            return
+        with self._lock:
+            self._record(id_persona)
+            self._upsert(id_persona, nombre_usuario, puntaje_total, num_retos_resueltos)
+
+    def _upsert(self, id_persona, nombre_usuario, puntaje_total, num_retos_resueltos):
+        key = self._key(id_persona, puntaje_total, num_retos_resueltos)
+        previous = self._entries.get(id_persona)
+        if previous is not None:
+            self._tree.remove(previous[0])
+        self._tree.insert(key)
+        self._entries[id_persona] = (key, nombre_usuario)
+
+    def apply_delta(self, id_persona, delta_puntaje, delta_retos):
+        if not self.loaded:
+            return
+        with self._lock:
+            self._record(id_persona)
+            previous = self._entries.get(id_persona)
+            if previous is None:
+                return
+            (neg_puntaje, neg_retos, _), nombre_usuario = previous
+            self._upsert(id_persona, nombre_usuario,
+                         -neg_puntaje + delta_puntaje, -neg_retos + delta_retos)
+
+    def rename(self, id_persona, nombre_usuario):
+        with self._lock:
+            self._record(id_persona)
+            previous = self._entries.get(id_persona)
+            if previous is not None:
+                self._entries[id_persona] = (previous[0], nombre_usuario)
+
+    def remove(self, id_persona):
+        with self._lock:
+            self._record(id_persona)
+            self._remove(id_persona)
+
+    def _remove(self, id_persona):
+        previous = self._entries.pop(id_persona, None)
+        if previous is not None:
+            self._tree.remove(previous[0])
+
+    # -----------------------------------------------------------------
+    # Consultas
+    # -----------------------------------------------------------------
+    def _row(self, key):
+        neg_puntaje, neg_retos, id_persona = key
+        return {
+            'id_persona': id_persona,
+            'nombre_usuario': self._entries[id_persona][1],
+            'puntaje_total': -neg_puntaje,
+            'num_retos_resueltos': -neg_retos,
+        }
+
+    def page(self, page=1, per_page=10):
+        with self._lock:
+            start = max(page - 1, 0) * per_page
+            end = min(start + per_page, len(self._tree))
+            return [self._row(self._tree.select(i)) for i in range(start, end)]
+
+    def page_after(self, after, per_page=10):
+        """
+        Página que sigue a la fila `after` = (puntaje_total, num_retos_resueltos,
+        id_persona). Funciona aunque esa persona haya cambiado de puntaje.
+        """
+        puntaje_total, num_retos_resueltos, id_persona = after
+        # Las claves son tuplas de enteros: id + 0.5 cae justo después de la clave del cursor
+        seek_key = (-puntaje_total, -num_retos_resueltos, id_persona + 0.5)
+        with self._lock:
+            start = self._tree.rank(seek_key)
+            end = min(start + per_page, len(self._tree))
+            return [self._row(self._tree.select(i)) for i in range(start, end)]
+
+    def position_of(self, id_persona):
+        """ Posición (1 = primero) de la persona en el ranking, o None si no está. """
+        with self._lock:
+            entry = self._entries.get(id_persona)
+            if entry is None:
+                return None
+            row = self._row(entry[0])
+            row['posicion'] = self._tree.rank(entry[0]) + 1
+            row['total'] = len(self._tree)
+            return row
+
+    def stats(self):
+        with self._lock:
+            return {
+                'loaded': self.loaded,
+                'size': len(self._tree),
+                'age_seconds': round(time.monotonic() - self._loaded_at, 1) if self.loaded else None,
+            }
+
+
+ranking_index = RankingIndex()
@@ -0,0 +1,214 @@
+# Backend/src/services/reactionCounters.py
+import os
+import threading
+import time
+
+
+# Cada cuánto se escriben en REACCION_CONTEO los incrementos acumulados
+REACTION_FLUSH_SECONDS = float(os.environ.get('REACTION_FLUSH_SECONDS', 1.0))
+# Con tantas claves (publicación, tipo) pendientes se escribe sin esperar
+REACTION_FLUSH_MAX_KEYS = int(os.environ.get('REACTION_FLUSH_MAX_KEYS', 1000))
+# Cada cuánto se comparan los contadores con REACCION (0 = sólo a pedido)
+REACTION_RECONCILE_SECONDS = float(os.environ.get('REACTION_RECONCILE_SECONDS', 3600))
+# Publicaciones (rango de id) revisadas por consulta al reconciliar
+REACTION_RECONCILE_BATCH = int(os.environ.get('REACTION_RECONCILE_BATCH', 1000))
+
+
+class ReactionCounterBuffer:
+    """
+    Contadores de reacciones por (publicación, tipo) en REACCION_CONTEO,
+    mantenidos con escritura diferida (write-behind).
+
+    - set_reaction / remove_reaction calculan en su transacción el cambio
+      exacto (-1 al tipo anterior, +1 al nuevo) y, al confirmarse, lo suman
+      aquí en memoria: los cambios de una publicación muy activa se
+      acumulan y se escriben como un único incremento por clave cada
+      flush_seconds (o antes, con max_keys claves pendientes).
+    - Las lecturas suman los incrementos aún no escritos de este proceso
+      (pending), así quien reacciona ve su cambio. Los de otros procesos
+      aparecen tras su siguiente escritura.
+    - Lo que se pierda (ej. el proceso muere antes de escribir) lo corrige
+      reconcile(): compara los contadores con REACCION y aplica la
+      diferencia, sólo si se mantiene igual en dos pasadas separadas (una
+      diferencia que cambia son incrementos aún en memoria de algún
+      proceso, no un error).
+    """
+
+    def __init__(self, flush_seconds=REACTION_FLUSH_SECONDS, max_keys=REACTION_FLUSH_MAX_KEYS,
+                 reconcile_seconds=REACTION_RECONCILE_SECONDS, reconcile_batch=REACTION_RECONCILE_BATCH):
+        self.flush_seconds = flush_seconds
+        self.max_keys = max_keys
+        self.reconcile_seconds = reconcile_seconds
+        self.reconcile_batch = reconcile_batch
+        # Debe cubrir la escritura diferida de todos los procesos
+        self.settle_seconds = max(5.0, 3 * flush_seconds)
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}       # (id_publicacion, id_tipo_reaccion) -> incremento
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._writer = None
+        self._reconciler = None
+        self._reconciling = False
+        self._last_reconcile = time.monotonic()
+        self._stats = {'increments': 0, 'flushes': 0, 'rows_written': 0, 'flush_errors': 0,
+                       'reconciles': 0, 'corrections': 0, 'last_reconcile': None}
+
+    def configure(self, writer, reconciler=None):
+        """
+        writer(deltas): suma {(id_publicacion, id_tipo_reaccion): n} a REACCION_CONTEO.
+        reconciler: objeto con drift(desde, hasta), max_post_id() y lock()
+        (ver PublicacionModel.reaction_reconciler).
+        """
+        self._writer = writer
+        self._reconciler = reconciler
+
+    # -----------------------------------------------------------------
+    # Escritura diferida
+    # -----------------------------------------------------------------
+    def add(self, id_publicacion, id_tipo_reaccion, delta):
+        if not delta:
+            return
+        key = (id_publicacion, id_tipo_reaccion)
+        with self._lock:
+            total = self._pending.get(key, 0) + delta
+            if total:
+                self._pending[key] = total
+            else:
+                # +1 y -1 seguidos (ej. quitar y volver a poner) no llegan a la BD
+                self._pending.pop(key, None)
+            self._stats['increments'] += 1
+            full = len(self._pending) >= self.max_keys
+        self._ensure_thread()
+        if full:
+            self._wakeup.set()
+
+    def pending(self, ids_publicacion):
+        """ Incrementos aún no escritos de esas publicaciones: {(id_publicacion, id_tipo): n}. """
+        ids = set(ids_publicacion)
+        with self._lock:
+            return {key: delta for key, delta in self._pending.items() if key[0] in ids}
+
+    def flush(self):
+        """ Escribe lo acumulado. Si falla, los incrementos vuelven al buffer. Devuelve las filas escritas. """
+        with self._flush_lock:
+            with self._lock:
+                deltas, self._pending = self._pending, {}
+            if not deltas:
+                return 0
+            if self._writer is None:
+                self._restore(deltas)
+                return 0
+            try:
+                self._writer(deltas)
+            except Exception as e:
+                print(f"Error al escribir los contadores de reacciones: {e}")
+                self._restore(deltas)
+                with self._lock:
+                    self._stats['flush_errors'] += 1
+                return 0
+            with self._lock:
+                self._stats['flushes'] += 1
+                self._stats['rows_written'] += len(deltas)
+            return len(deltas)
+
+    def _restore(self, deltas):
+        with self._lock:
+            for key, delta in deltas.items():
+                total = self._pending.get(key, 0) + delta
+                if total:
+                    self._pending[key] = total
+                else:
+                    self._pending.pop(key, None)
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='contadores-reacciones', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            self.flush()
+            if (self.reconcile_seconds and self._reconciler is not None
+                    and time.monotonic() - self._last_reconcile > self.reconcile_seconds):
+                self.reconcile_async()
+
+    # -----------------------------------------------------------------
+    # Reconciliación con REACCION
+    # -----------------------------------------------------------------
+    def reconcile_async(self):
+        """ Lanza reconcile() en segundo plano. False si ya hay una en curso. """
+        with self._lock:
+            if self._reconciling:
+                return False
+            self._reconciling = True
+            self._last_reconcile = time.monotonic()
+        threading.Thread(target=self.reconcile, name='reconciliar-reacciones', daemon=True).start()
+        return True
+
+    def reconcile(self):
+        """
+        Recorre las publicaciones por rangos de id y corrige los contadores
+        cuya diferencia con COUNT(*) de REACCION es la misma antes y después
+        de settle_seconds. Un lock con nombre en MySQL evita que dos procesos
+        apliquen la misma corrección.
+        """
+        with self._lock:
+            self._reconciling = True
+            self._last_reconcile = time.monotonic()
+        reporte = {'publicaciones_revisadas': 0, 'diferencias': 0, 'corregidas': 0, 'omitida': False}
+        try:
+            with self._reconciler.lock() as adquirido:
+                if not adquirido:
+                    reporte['omitida'] = True
+                    return reporte
+                maximo = self._reconciler.max_post_id() or 0
+                desde = 0
+                while desde < maximo:
+                    hasta = min(desde + self.reconcile_batch, maximo)
+                    self._reconcile_range(desde, hasta, reporte)
+                    desde = hasta
+        except Exception as e:
+            print(f"Error al reconciliar los contadores de reacciones: {e}")
+            reporte['error'] = str(e)
+        finally:
+            with self._lock:
+                self._reconciling = False
+                self._stats['reconciles'] += 1
+                self._stats['corrections'] += reporte['corregidas']
+                self._stats['last_reconcile'] = reporte
+        return reporte
+
+    def _reconcile_range(self, desde, hasta, reporte):
+        reporte['publicaciones_revisadas'] += hasta - desde
+        self.flush()
+        antes = self._reconciler.drift(desde, hasta)
+        if not antes:
+            return
+        reporte['diferencias'] += len(antes)
+        time.sleep(self.settle_seconds)
+        self.flush()
+        despues = self._reconciler.drift(desde, hasta)
+        correcciones = {key: diff for key, diff in despues.items() if antes.get(key) == diff}
+        if correcciones:
+            self._writer(correcciones)
+            reporte['corregidas'] += len(correcciones)
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                'pending_keys': len(self._pending),
+                'flush_seconds': self.flush_seconds,
+                'reconciling': self._reconciling,
+            }
+
+
+reaction_counters = ReactionCounterBuffer()
@@ -0,0 +1,398 @@
+# Backend/src/services/retoImporter.py
+import gzip
+import json
+import os
+import posixpath
+import re
+import shutil
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+
+from ..models.retosModels.retosModel import RetosModel
+from ..models.catalogoModels.catalogoModel import CatalogoModel
+
+
+# Retos por transacción
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 50))
+# Un lote se confirma antes si sus tests ya suman esto (acota la memoria usada)
+IMPORT_BATCH_BYTES = int(os.environ.get('IMPORT_BATCH_BYTES', 32 * 1024 * 1024))
+# Tamaño máximo de cada INSERT de TEST (debe quedar por debajo de max_allowed_packet)
+IMPORT_MAX_STATEMENT_BYTES = int(os.environ.get('IMPORT_MAX_STATEMENT_BYTES', 8 * 1024 * 1024))
+# Errores que se conservan en el progreso (el resto sólo se cuenta)
+IMPORT_MAX_ERRORS = 100
+
+_NUMERO = re.compile(r'(\d+)')
+
+
+def _orden_natural(nombre):
+    # '2.in' antes que '10.in'
+    return [int(parte) if parte.isdigit() else parte for parte in _NUMERO.split(nombre)]
+
+
+# =====================================================================
+# Lectura de paquetes
+# =====================================================================
+class _Zip:
+    """ Miembros de un .zip: cada uno se descomprime por separado, en cualquier orden. """
+
+    def __init__(self, path):
+        self._zip = zipfile.ZipFile(path)
+        self._miembros = {info.filename: info for info in self._zip.infolist() if not info.is_dir()}
+
+    def nombres(self):
+        return list(self._miembros)
+
+    def open(self, nombre):
+        return self._zip.open(self._miembros[nombre])
+
+    def read_text(self, nombre):
+        with self.open(nombre) as f:
+            return f.read().decode('utf-8')
+
+    def close(self):
+        self._zip.close()
+
+
+class _Spool:
+    """
+    Copia en un directorio temporal de los archivos de las carpetas de retos
+    de un .tar, para leerlos en cualquier orden tras recorrerlo una sola vez.
+    """
+
+    def __init__(self):
+        self._dir = tempfile.mkdtemp(prefix='codium-import-')
+        self._rutas = {}
+
+    def add(self, nombre, f):
+        # Nombre numerado: el del miembro no se usa como ruta (puede traer '..')
+        ruta = os.path.join(self._dir, str(len(self._rutas)))
+        with open(ruta, 'wb') as out:
+            shutil.copyfileobj(f, out)
+        self._rutas[nombre] = ruta
+
+    def nombres(self):
+        return list(self._rutas)
+
+    def read_text(self, nombre):
+        with open(self._rutas[nombre], 'rb') as f:
+            return f.read().decode('utf-8')
+
+    def close(self):
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+
+def read_package(path):
+    """
+    Genera (origen, reto_data, bytes_leidos, error) por cada reto del
+    paquete, sin cargarlo entero en memoria: como mucho un reto a la vez.
+    Si una entrada no se puede leer, reto_data es None y error lo explica.
+
+    Formatos:
+      - JSONL (opcionalmente .gz): un reto por línea, mismo formato que el
+        cuerpo de POST /api/retos.
+      - .zip o .tar(.gz): archivos *.jsonl como el anterior, y/o una carpeta
+        por reto con `reto.json` (sin `tests` o con parte de ellos) y sus
+        tests en `tests/<nombre>.in` + `tests/<nombre>.out`. Los nombres
+        listados en `tests_publicos` son públicos y el resto privados; sin
+        esa lista todos son públicos, como en POST /api/retos.
+
+    Un .tar(.gz) se lee una sola vez de principio a fin: sus JSONL salen en
+    el orden del archivo y las carpetas de retos, al final (ver _read_tar).
+    """
+    if zipfile.is_zipfile(path) or tarfile.is_tarfile(path):
+        yield from _read_archive(path)
+        return
+
+    with open(path, 'rb') as f:
+        comprimido = f.read(2) == b'\x1f\x8b'
+    with (gzip.open(path, 'rb') if comprimido else open(path, 'rb')) as f:
+        yield from _read_jsonl(f, os.path.basename(path))
+
+
+def _read_jsonl(f, nombre):
+    for numero, linea in enumerate(f, start=1):
+        if not linea.strip():
+            continue
+        origen = f"{nombre}:{numero}"
+        try:
+            yield origen, json.loads(linea), len(linea), None
+        except ValueError as e:
+            yield origen, None, len(linea), f"JSON inválido: {e}"
+
+
+def _read_archive(path):
+    if not zipfile.is_zipfile(path):
+        yield from _read_tar(path)
+        return
+    archivo = _Zip(path)
+    try:
+        nombres = sorted(archivo.nombres(), key=_orden_natural)
+        for nombre in nombres:
+            if nombre.endswith('.jsonl'):
+                with archivo.open(nombre) as f:
+                    yield from _read_jsonl(f, nombre)
+        yield from _read_reto_dirs(archivo, nombres)
+    finally:
+        archivo.close()
+
+
+def _read_tar(path):
+    """
+    Un .tar(.gz) se recorre una sola vez, en el orden del archivo: con gzip,
+    leer un miembro anterior obliga a descomprimir otra vez desde el inicio.
+    Los JSONL se procesan al pasar; los archivos de las carpetas de retos se
+    copian a disco (_Spool) y se procesan al final.
+    """
+    spool = _Spool()
+    try:
+        with tarfile.open(path, 'r|*') as tar:
+            for miembro in tar:
+                if not miembro.isfile():
+                    continue
+                nombre = miembro.name
+                if nombre.endswith('.jsonl'):
+                    with tar.extractfile(miembro) as f:
+                        yield from _read_jsonl(f, nombre)
+                elif (posixpath.basename(nombre) == 'reto.json'
+                      or posixpath.basename(posixpath.dirname(nombre)) == 'tests'):
+                    with tar.extractfile(miembro) as f:
+                        spool.add(nombre, f)
+        yield from _read_reto_dirs(spool, sorted(spool.nombres(), key=_orden_natural))
+    finally:
+        spool.close()
+
+
+def _read_reto_dirs(archivo, nombres):
+    """ Retos en formato carpeta (reto.json + tests/) de `nombres`, ya ordenados. """
+    tests_por_carpeta = {}
+    for nombre in nombres:
+        carpeta, archivo_test = posixpath.split(nombre)
+        if posixpath.basename(carpeta) == 'tests':
+            tests_por_carpeta.setdefault(posixpath.dirname(carpeta), []).append(archivo_test)
+
+    for nombre in nombres:
+        if posixpath.basename(nombre) != 'reto.json':
+            continue
+        carpeta = posixpath.dirname(nombre)
+        try:
+            reto_data, leidos = _read_reto_dir(archivo, carpeta, tests_por_carpeta.get(carpeta, []))
+        except (ValueError, KeyError) as e:
+            yield nombre, None, 0, f"Reto inválido: {e}"
+            continue
+        yield nombre, reto_data, leidos, None
+
+
+def _read_reto_dir(archivo, carpeta, archivos_test):
+    texto = archivo.read_text(posixpath.join(carpeta, 'reto.json'))
+    reto_data = json.loads(texto)
+    leidos = len(texto)
+
+    publicos = reto_data.pop('tests_publicos', None)
+    publicos = None if publicos is None else {str(p) for p in publicos}
+    tests = list(reto_data.get('tests') or [])
+    disponibles = set(archivos_test)
+    for archivo_test in archivos_test:
+        base, extension = posixpath.splitext(archivo_test)
+        if extension != '.in':
+            continue
+        if base + '.out' not in disponibles:
+            raise ValueError(f"falta tests/{base}.out")
+        entrada = archivo.read_text(posixpath.join(carpeta, 'tests', archivo_test))
+        salida = archivo.read_text(posixpath.join(carpeta, 'tests', base + '.out'))
+        leidos += len(entrada) + len(salida)
+        tests.append({'datos_entrada': entrada, 'salida_esperada': salida,
+                      'es_publico': publicos is None or base in publicos})
+    reto_data['tests'] = tests
+    return reto_data, leidos
+
+
+# =====================================================================
+# Importación
+# =====================================================================
+class RetoImporter:
+    """
+    Importa un paquete de retos (ver read_package) leyéndolo en streaming.
+
+    - Cada reto se valida contra el registro de catálogos (RetosModel.prepare_reto);
+      los inválidos se saltan y se informan con su origen (línea o archivo).
+    - Los válidos se insertan en lotes de `batch_size` retos, o menos si sus
+      tests ya suman `batch_bytes`, una transacción por lote
+      (RetosModel.insert_reto_batch). La memoria usada depende del lote, no
+      del tamaño del paquete.
+    - Si un lote falla se reintenta reto por reto, para que un reto con
+      datos que la BD rechaza no descarte a los demás.
+    - progress() informa el avance y el throughput; cancel() la detiene
+      tras el lote en curso (los lotes ya confirmados quedan importados).
+    - dry_run valida el paquete completo sin insertar nada.
+    """
+
+    def __init__(self, path, batch_size=IMPORT_BATCH_SIZE, batch_bytes=IMPORT_BATCH_BYTES,
+                 max_statement_bytes=IMPORT_MAX_STATEMENT_BYTES, dry_run=False, remove_file=False):
+        self.path = path
+        self.batch_size = max(1, int(batch_size))
+        self.batch_bytes = max(1, int(batch_bytes))
+        self.max_statement_bytes = max(1, int(max_statement_bytes))
+        self.dry_run = bool(dry_run)
+        self.remove_file = remove_file
+
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._progress = {
+            'estado': 'pendiente',
+            'dry_run': self.dry_run,
+            'leidos': 0,
+            'importados': 0,
+            'tests_importados': 0,
+            'invalidos': 0,
+            'lotes': 0,
+            'bytes_leidos': 0,
+            'ids_reto': {'primero': None, 'ultimo': None},
+            'errores': [],
+            'error': None,
+        }
+        self._started = None
+        self._finished = None
+
+    # -----------------------------------------------------------------
+    # API pública
+    # -----------------------------------------------------------------
+    def run(self):
+        """ Ejecuta la importación completa (bloqueante). Devuelve el progreso final. """
+        self._update(estado='en_curso')
+        self._started = time.monotonic()
+        try:
+            catalogos = CatalogoModel.registry()
+            lote, bytes_lote = [], 0
+            for origen, reto_data, leidos, error in read_package(self.path):
+                if self._cancel.is_set():
+                    break
+                with self._lock:
+                    self._progress['leidos'] += 1
+                    self._progress['bytes_leidos'] += leidos
+
+                if error is None:
+                    reto, error = self._prepare(reto_data, catalogos)
+                if error:
+                    self._invalid(origen, error)
+                    continue
+                lote.append((origen, reto))
+                bytes_lote += sum(len(entrada) + len(salida) for entrada, salida, _ in reto['tests'])
+                if len(lote) >= self.batch_size or bytes_lote >= self.batch_bytes:
+                    self._flush(lote)
+                    lote, bytes_lote = [], 0
+
+            if lote and not self._cancel.is_set():
+                self._flush(lote)
+            self._update(estado='cancelado' if self._cancel.is_set() else 'completado')
+        except Exception as e:
+            print(f"Error al importar el paquete {self.path}: {e}")
+            self._update(estado='fallido', error=str(e))
+        finally:
+            self._finished = time.monotonic()
+            if self.remove_file:
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+        return self.progress()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @staticmethod
+    def _prepare(reto_data, catalogos):
+        """ prepare_reto de una entrada; un dato con forma inesperada invalida sólo ese reto. """
+        if not isinstance(reto_data, dict):
+            return None, "Se esperaba un objeto JSON"
+        try:
+            return RetosModel.prepare_reto(reto_data, catalogos)
+        except (TypeError, ValueError, AttributeError) as e:
+            return None, f"Reto inválido: {e}"
+
+    @property
+    def running(self):
+        return self.progress()['estado'] in ('pendiente', 'en_curso')
+
+    def progress(self):
+        with self._lock:
+            progress = dict(self._progress, errores=list(self._progress['errores']),
+                            ids_reto=dict(self._progress['ids_reto']))
+        if self._started is not None:
+            elapsed = (self._finished or time.monotonic()) - self._started
+            progress['segundos'] = round(elapsed, 1)
+            if elapsed > 0:
+                progress['retos_por_segundo'] = round(progress['leidos'] / elapsed, 1)
+                progress['tests_por_segundo'] = round(progress['tests_importados'] / elapsed, 1)
+                progress['mb_por_segundo'] = round(progress['bytes_leidos'] / elapsed / 1024 / 1024, 2)
+        return progress
+
+    # -----------------------------------------------------------------
+    # Lotes
+    # -----------------------------------------------------------------
+    def _flush(self, lote):
+        if self.dry_run:
+            self._imported([reto for _, reto in lote], [None] * len(lote))
+            return
+        retos = [reto for _, reto in lote]
+        try:
+            self._imported(retos, RetosModel.insert_reto_batch(retos, self.max_statement_bytes))
+            return
+        except Exception as e:
+            if len(lote) == 1:
+                self._invalid(lote[0][0], str(e))
+                return
+            print(f"Lote de {len(lote)} retos rechazado ({e}), se reintenta reto por reto")
+        for origen, reto in lote:
+            try:
+                self._imported([reto], RetosModel.insert_reto_batch([reto], self.max_statement_bytes))
+            except Exception as e:
+                self._invalid(origen, str(e))
+
+    def _imported(self, retos, ids):
+        with self._lock:
+            self._progress['lotes'] += 1
+            self._progress['importados'] += len(retos)
+            self._progress['tests_importados'] += sum(len(reto['tests']) for reto in retos)
+            ids = [id_reto for id_reto in ids if id_reto is not None]
+            if ids:
+                rango = self._progress['ids_reto']
+                rango['primero'] = rango['primero'] or ids[0]
+                rango['ultimo'] = ids[-1]
+
+    def _invalid(self, origen, error):
+        with self._lock:
+            self._progress['invalidos'] += 1
+            if len(self._progress['errores']) < IMPORT_MAX_ERRORS:
+                self._progress['errores'].append({'origen': origen, 'error': error})
+
+    def _update(self, **kwargs):
+        with self._lock:
+            self._progress.update(kwargs)
+
+
+# =====================================================================
+# Importaciones lanzadas desde la API
+# =====================================================================
+_jobs = {}
+_jobs_lock = threading.Lock()
+_next_id = 1
+
+
+def start_import(path, **kwargs):
+    """ Lanza la importación en segundo plano. Devuelve (id_importacion, importer). """
+    global _next_id
+    importer = RetoImporter(path, **kwargs)
+    with _jobs_lock:
+        id_importacion = _next_id
+        _next_id += 1
+        _jobs[id_importacion] = importer
+    threading.Thread(target=importer.run, name=f'import-{id_importacion}', daemon=True).start()
+    return id_importacion, importer
+
+
+def get_import(id_importacion):
+    with _jobs_lock:
+        return _jobs.get(id_importacion)
@@ -0,0 +1,329 @@
+# Backend/src/services/searchIndex.py
+import bisect
+import gzip
+import heapq
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+import unicodedata
+from datetime import datetime
+
+
+SEARCH_INDEX_PATH = os.environ.get('SEARCH_INDEX_PATH',
+                                   os.path.join(tempfile.gettempdir(), 'codium-search-index.json.gz'))
+# Cada cuánto se incorporan los retos creados por otros procesos
+SEARCH_INDEX_REFRESH_SECONDS = float(os.environ.get('SEARCH_INDEX_REFRESH_SECONDS', 30))
+# Mínimo de segundos entre escrituras del índice a disco
+SEARCH_INDEX_SAVE_INTERVAL = float(os.environ.get('SEARCH_INDEX_SAVE_INTERVAL', 60))
+
+# Cambiar si cambia la tokenización o el formato del archivo (obliga a reconstruir)
+# Cambia cuando cambia el análisis (tokenize): el índice guardado se reconstruye
+_FORMAT_VERSION = 2
+
+# BM25
+_K1 = 1.2
+_B = 0.75
+# El título pesa más que la descripción (BM25F simplificado: frecuencias ponderadas)
+_PESO_TITULO = 3
+_PESO_DESCRIPCION = 1
+# Términos del vocabulario que puede expandir el prefijo de la última palabra
+_MAX_PREFIJOS = 20
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+_STOPWORDS = frozenset("""
+    a al algo ante como con contra cual cuando de del desde donde dos e el ella ellas ellos en entre era es
+    esa ese eso esta este esto fue ha hay la las le les lo los mas me mi muy no nos o otra otro para pero
+    por que se segun si sin sobre son su sus tambien te tiene tu un una uno unos y ya
+""".split())
+
+
+def fold(texto):
+    """ Minúsculas y sin tildes ('Árbol' -> 'arbol'); la ñ queda como n. """
+    normalizado = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(c for c in normalizado if not unicodedata.combining(c))
+
+
+_VOCALES = frozenset('aeiou')
+
+
+def _stem(token):
+    # Plurales regulares del español, de forma que singular y plural queden
+    # iguales: se quita la 's' final y después la 'e' final tras consonante.
+    # 'arboles' -> 'arbole' -> 'arbol' = 'arbol'; 'clases' -> 'clase' -> 'clas' = 'clase' -> 'clas';
+    # 'cadenas' -> 'cadena' = 'cadena'
+    if len(token) > 3 and token.endswith('s'):
+        token = token[:-1]
+    if len(token) > 3 and token.endswith('e') and token[-2] not in _VOCALES:
+        token = token[:-1]
+    return token
+
+
+def tokenize(texto):
+    return [_stem(t) for t in _TOKEN.findall(fold(texto or '')) if t not in _STOPWORDS]
+
+
+class RetoSearchIndex:
+    """
+    Índice invertido de los retos (titulo y descripcion) para búsqueda por
+    texto con ranking BM25, mantenido en proceso.
+
+    - Se construye al arrancar leyendo los retos por lotes, o se carga del
+      archivo en disco (SEARCH_INDEX_PATH) y sólo se leen los retos nuevos:
+      un reto no cambia tras crearse, así que basta con seguir por id_reto.
+    - create_reto lo actualiza al confirmar; los retos creados por otros
+      procesos se incorporan cada SEARCH_INDEX_REFRESH_SECONDS.
+    - La consulta sólo recorre las listas de los términos buscados: el
+      tiempo no depende del número total de retos.
+    """
+
+    def __init__(self, path=SEARCH_INDEX_PATH, refresh_seconds=SEARCH_INDEX_REFRESH_SECONDS,
+                 save_interval=SEARCH_INDEX_SAVE_INTERVAL):
+        self.path = path
+        self.refresh_seconds = refresh_seconds
+        self.save_interval = save_interval
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._reset()
+        self._loaded_at = None
+        self._refreshed_at = None
+        self._refreshing = False
+        self._saved_at = 0.0
+        self._dirty = False
+        self._saving = False
+        self._stats = {'searches': 0, 'added': 0, 'loaded_from_disk': 0, 'saves': 0}
+
+    def _reset(self):
+        self._postings = {}   # término -> {id_reto: frecuencia ponderada}
+        self._vocabulary = [] # términos ordenados (búsqueda por prefijo)
+        self._lengths = {}    # id_reto -> longitud ponderada
+        self._docs = {}       # id_reto -> datos que devuelve la búsqueda
+        self._total_length = 0
+        # Último id_reto leído con el loader (los agregados por create_reto no lo
+        # mueven: otro proceso puede haber creado retos con ids menores)
+        self._synced_id = 0
+
+    # -----------------------------------------------------------------
+    # Carga y actualización
+    # -----------------------------------------------------------------
+    def ensure_loaded(self, loader, count_loader=None):
+        """
+        loader(after_id, limit) -> retos con id_reto > after_id (ordenados).
+        La primera vez carga el archivo en disco (si existe) y completa con
+        los retos nuevos; después incorpora los nuevos en segundo plano.
+        Si count_loader() no coincide con los retos indexados (ej. la BD se
+        recreó) el archivo se descarta y el índice se reconstruye.
+        """
+        if self._loaded_at is None:
+            with self._lock:
+                if self._loaded_at is None:
+                    if not self._load_file():
+                        self._reset()
+                    self._catch_up(loader)
+                    if count_loader is not None and count_loader() != len(self._docs):
+                        print("El índice de búsqueda en disco no coincide con la BD, se reconstruye")
+                        self._reset()
+                        self._catch_up(loader)
+                    self._loaded_at = self._refreshed_at = time.monotonic()
+            self.maybe_save()
+            return
+
+        if self.refresh_seconds and time.monotonic() - self._refreshed_at > self.refresh_seconds:
+            with self._lock:
+                if self._refreshing:
+                    return
+                self._refreshing = True
+            threading.Thread(target=self._refresh, args=(loader, count_loader), daemon=True).start()
+
+    def _refresh(self, loader, count_loader):
+        try:
+            self._catch_up(loader)
+            if count_loader is not None and count_loader() != len(self._docs):
+                # Un reto con id menor se confirmó después que otro mayor: se repasa todo
+                # (los ya indexados se saltan)
+                self._catch_up(loader, after_id=0)
+            self.maybe_save()
+        except Exception as e:
+            print(f"Error al actualizar el índice de búsqueda: {e}")
+        finally:
+            self._refreshed_at = time.monotonic()
+            self._refreshing = False
+
+    def _catch_up(self, loader, after_id=None, batch_size=1000):
+        after_id = self._synced_id if after_id is None else after_id
+        while True:
+            retos = loader(after_id, batch_size)
+            for reto in retos:
+                self.add(reto)
+            if retos:
+                after_id = retos[-1]['id_reto']
+                with self._lock:
+                    self._synced_id = max(self._synced_id, after_id)
+            if len(retos) < batch_size:
+                return
+
+    def add(self, reto):
+        """ reto: dict con id_reto, titulo, descripcion, nombre_dificultad, fecha_publicacion. """
+        id_reto = reto['id_reto']
+        frecuencias = {}
+        for token in tokenize(reto.get('titulo')):
+            frecuencias[token] = frecuencias.get(token, 0) + _PESO_TITULO
+        for token in tokenize(reto.get('descripcion')):
+            frecuencias[token] = frecuencias.get(token, 0) + _PESO_DESCRIPCION
+
+        fecha = reto.get('fecha_publicacion')
+        with self._lock:
+            if id_reto in self._docs:
+                return
+            for token, frecuencia in frecuencias.items():
+                posting = self._postings.get(token)
+                if posting is None:
+                    posting = self._postings[token] = {}
+                    bisect.insort(self._vocabulary, token)
+                posting[id_reto] = frecuencia
+            longitud = sum(frecuencias.values())
+            self._lengths[id_reto] = longitud
+            self._total_length += longitud
+            self._docs[id_reto] = {
+                'id_reto': id_reto,
+                'titulo': reto.get('titulo'),
+                'nombre_dificultad': reto.get('nombre_dificultad'),
+                'fecha_publicacion': fecha.isoformat() if isinstance(fecha, datetime) else fecha,
+            }
+            self._dirty = True
+            self._stats['added'] += 1
+
+    @property
+    def loaded(self):
+        return self._loaded_at is not None
+
+    # -----------------------------------------------------------------
+    # Búsqueda
+    # -----------------------------------------------------------------
+    def search(self, query, limit=20):
+        """ Retos ordenados por relevancia (BM25) para `query`, con su `score`. """
+        terminos = tokenize(query)
+        if not terminos:
+            return []
+
+        with self._lock:
+            self._stats['searches'] += 1
+            n_docs = len(self._docs)
+            if not n_docs:
+                return []
+            longitud_media = self._total_length / n_docs
+
+            # La última palabra también vale como prefijo (búsqueda mientras se escribe)
+            pesos = {t: 1.0 for t in terminos}
+            ultima = terminos[-1]
+            i = bisect.bisect_left(self._vocabulary, ultima)
+            for termino in self._vocabulary[i:i + _MAX_PREFIJOS + 1]:
+                if not termino.startswith(ultima):
+                    break
+                pesos.setdefault(termino, 0.5)
+
+            scores = {}
+            lengths = self._lengths
+            norma_fija = _K1 * (1 - _B)
+            norma_por_largo = _K1 * _B / longitud_media
+            for termino, peso in pesos.items():
+                posting = self._postings.get(termino)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                factor = peso * idf * (_K1 + 1)
+                for id_reto, frecuencia in posting.items():
+                    parcial = factor * frecuencia / (frecuencia + norma_fija + norma_por_largo * lengths[id_reto])
+                    scores[id_reto] = scores.get(id_reto, 0.0) + parcial
+
+            mejores = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+            return [dict(self._docs[id_reto], score=round(score, 4)) for id_reto, score in mejores]
+
+    # -----------------------------------------------------------------
+    # Persistencia en disco
+    # -----------------------------------------------------------------
+    def maybe_save(self):
+        """ Guarda en segundo plano si hubo cambios y pasó save_interval desde la última vez. """
+        if not self.path or not self._dirty or time.monotonic() - self._saved_at < self.save_interval:
+            return
+        with self._lock:
+            if self._saving:
+                return
+            self._saving = True
+        threading.Thread(target=self._save_background, daemon=True).start()
+
+    def _save_background(self):
+        try:
+            self.save()
+        finally:
+            self._saving = False
+
+    def save(self):
+        if not self.path:
+            return
+        with self._save_lock:
+            self._save()
+
+    def _save(self):
+        with self._lock:
+            data = {
+                'format': _FORMAT_VERSION,
+                'synced_id': self._synced_id,
+                'docs': list(self._docs.values()),
+                'lengths': list(self._lengths.items()),
+                'postings': {t: list(p.items()) for t, p in self._postings.items()},
+            }
+            self._dirty = False
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with gzip.open(tmp, 'wt', encoding='utf-8', compresslevel=3) as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp, self.path)
+            self._saved_at = time.monotonic()
+            self._stats['saves'] += 1
+        except OSError as e:
+            self._dirty = True
+            print(f"No se pudo guardar el índice de búsqueda en {self.path}: {e}")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def _load_file(self):
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('format') != _FORMAT_VERSION:
+                return False
+            self._postings = {t: dict(items) for t, items in data['postings'].items()}
+            self._vocabulary = sorted(self._postings)
+            self._lengths = dict(data['lengths'])
+            self._docs = {doc['id_reto']: doc for doc in data['docs']}
+            self._total_length = sum(self._lengths.values())
+            self._synced_id = data['synced_id']
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Índice de búsqueda en disco inválido, se reconstruye: {e}")
+            return False
+        self._saved_at = time.monotonic()
+        self._stats['loaded_from_disk'] += 1
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                'loaded': self.loaded,
+                'documents': len(self._docs),
+                'terms': len(self._postings),
+                'synced_id': self._synced_id,
+                'path': self.path,
+            }
+
+
+search_index = RetoSearchIndex()
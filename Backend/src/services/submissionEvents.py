@@ -0,0 +1,157 @@
+# Backend/src/services/submissionEvents.py
+import os
+import queue
+import threading
+import time
+
+
+# Intervalo del sondeo de respaldo a la BD (cuando el juez corre en otro proceso)
+SUBMISSION_EVENTS_POLL_INTERVAL = float(os.environ.get('SUBMISSION_EVENTS_POLL_INTERVAL', 1.0))
+
+
+def make_event(id_respuesta, estado, puntaje, tiempo_ejecucion_ms, pendiente='Pendiente', motivo=None):
+    """ Evento publicado a los clientes: estado actual de una respuesta. """
+    event = {
+        'id_respuesta': id_respuesta,
+        'estado': estado,
+        'puntaje': puntaje,
+        'tiempo_ejecucion_ms': tiempo_ejecucion_ms,
+        'final': estado != pendiente,
+    }
+    if motivo:
+        # Sólo en 'Error del Juez': por qué no se pudo evaluar
+        event['motivo'] = motivo
+    return event
+
+
+class Subscription:
+    """ Eventos de una respuesta para un cliente conectado. """
+
+    def __init__(self, bus, id_respuesta):
+        self._bus = bus
+        self.id_respuesta = id_respuesta
+        self._queue = queue.Queue()
+
+    def get(self, timeout):
+        """ Siguiente evento, o None si pasa `timeout` sin novedades. """
+        try:
+            return self._queue.get(timeout=max(timeout, 0))
+        except queue.Empty:
+            return None
+
+    def _deliver(self, event):
+        self._queue.put(event)
+
+    def close(self):
+        self._bus._unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SubmissionEventBus:
+    """
+    Pub/sub en memoria: id_respuesta -> clientes esperando su veredicto.
+
+    Publican el juez embebido (JUDGE_EMBEDDED, al guardar cada veredicto) y,
+    si el juez corre en otro proceso, un hilo de sondeo que consulta con UNA
+    sola query por intervalo el estado de todas las respuestas observadas
+    (en lugar de que cada cliente haga polling por su cuenta).
+    """
+
+    def __init__(self, poll_interval=SUBMISSION_EVENTS_POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self._subscribers = {}   # id_respuesta -> set(Subscription)
+        self._lock = threading.Lock()
+        self._poller = None
+        self._status_loader = None
+        self._stats = {'subscriptions': 0, 'published': 0, 'delivered': 0, 'polls': 0}
+
+    # -----------------------------------------------------------------
+    # Suscripción y publicación
+    # -----------------------------------------------------------------
+    def subscribe(self, id_respuesta):
+        subscription = Subscription(self, id_respuesta)
+        with self._lock:
+            self._subscribers.setdefault(id_respuesta, set()).add(subscription)
+            self._stats['subscriptions'] += 1
+        self._ensure_poller()
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            subs = self._subscribers.get(subscription.id_respuesta)
+            if subs is not None:
+                subs.discard(subscription)
+                if not subs:
+                    del self._subscribers[subscription.id_respuesta]
+
+    def publish(self, id_respuesta, event):
+        with self._lock:
+            subs = list(self._subscribers.get(id_respuesta, ()))
+            self._stats['published'] += 1
+            self._stats['delivered'] += len(subs)
+        for subscription in subs:
+            subscription._deliver(event)
+        return len(subs)
+
+    def watched_ids(self):
+        with self._lock:
+            return list(self._subscribers)
+
+    # -----------------------------------------------------------------
+    # Sondeo de respaldo
+    # -----------------------------------------------------------------
+    def set_status_loader(self, loader):
+        """
+        loader(ids) -> [evento] con el estado actual de esas respuestas
+        (los eventos con final=True se publican y cierran la espera).
+        """
+        self._status_loader = loader
+
+    def _ensure_poller(self):
+        if self._status_loader is None or not self.poll_interval:
+            return
+        with self._lock:
+            if self._poller is not None and self._poller.is_alive():
+                return
+            self._poller = threading.Thread(target=self._poll_forever, name='submission-events-poller',
+                                            daemon=True)
+            self._poller.start()
+
+    def _poll_forever(self):
+        while True:
+            time.sleep(self.poll_interval)
+            ids = self.watched_ids()
+            if not ids:
+                # Sin clientes esperando: el hilo termina y se relanza con la próxima suscripción
+                with self._lock:
+                    if not self._subscribers:
+                        self._poller = None
+                        return
+                continue
+            try:
+                events = self._status_loader(ids)
+            except Exception as e:
+                print(f"Error al consultar el estado de las respuestas observadas: {e}")
+                continue
+            with self._lock:
+                self._stats['polls'] += 1
+            for event in events:
+                if event.get('final'):
+                    self.publish(event['id_respuesta'], event)
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                'watched_submissions': len(self._subscribers),
+                'connected_clients': sum(len(s) for s in self._subscribers.values()),
+                'poller_running': self._poller is not None,
+            }
+
+
+submission_events = SubmissionEventBus()
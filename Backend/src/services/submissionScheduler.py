@@ -0,0 +1,121 @@
+# Backend/src/services/submissionScheduler.py
+import math
+import os
+import threading
+import time
+
+
+# Respuestas sin veredicto (en cola o evaluándose) que puede tener cada persona
+SUBMISSION_MAX_IN_FLIGHT_PER_USER = int(os.environ.get('SUBMISSION_MAX_IN_FLIGHT_PER_USER', 3))
+# Tamaño máximo de la cola del juez; por encima se responde 429 (0 = sin límite)
+SUBMISSION_MAX_QUEUE_DEPTH = int(os.environ.get('SUBMISSION_MAX_QUEUE_DEPTH', 500))
+# Cada cuánto se vuelve a contar la cola en la BD (entre medio se estima en memoria)
+SUBMISSION_QUEUE_DEPTH_TTL = float(os.environ.get('SUBMISSION_QUEUE_DEPTH_TTL', 1.0))
+SUBMISSION_RETRY_AFTER_SECONDS = int(os.environ.get('SUBMISSION_RETRY_AFTER_SECONDS', 5))
+
+
+class SubmissionRejected(Exception):
+    """ La respuesta no se admite ahora; el cliente puede reintentar tras `retry_after` segundos. """
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class SubmissionScheduler:
+    """
+    Control de admisión delante de la cola del juez.
+
+    - Límite por persona: como mucho `max_in_flight_per_user` respuestas
+      'Pendiente' a la vez (el reparto justo entre personas lo hace el juez
+      al reclamar, ver RespuestaModel.claim_pending).
+    - Backpressure global: con la cola en `max_queue_depth` o más, las
+      nuevas respuestas se rechazan con 429 y Retry-After en lugar de
+      alargar la espera de todos.
+
+    El tamaño de la cola se cuenta en la BD como mucho cada `depth_ttl`
+    segundos; entre medio se suman en memoria las respuestas admitidas.
+    """
+
+    def __init__(self, max_in_flight_per_user=SUBMISSION_MAX_IN_FLIGHT_PER_USER,
+                 max_queue_depth=SUBMISSION_MAX_QUEUE_DEPTH, depth_ttl=SUBMISSION_QUEUE_DEPTH_TTL,
+                 retry_after=SUBMISSION_RETRY_AFTER_SECONDS):
+        self.max_in_flight_per_user = max_in_flight_per_user
+        self.max_queue_depth = max_queue_depth
+        self.depth_ttl = depth_ttl
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._depth = 0
+        self._depth_checked = None
+        self._stats = {'admitted': 0, 'rejected_user_cap': 0, 'rejected_queue_full': 0, 'depth_queries': 0}
+
+    def admit(self, cursor, id_persona, id_estado_pendiente):
+        """
+        Lanza SubmissionRejected si la persona o la cola están al límite.
+        Se llama dentro de la transacción que inserta la respuesta: bloquea la
+        fila de la persona para que dos envíos simultáneos no superen su límite.
+        """
+        if self.max_queue_depth > 0:
+            depth = self._queue_depth(cursor, id_estado_pendiente)
+            if depth >= self.max_queue_depth:
+                self._count('rejected_queue_full')
+                # Cuanto más se pasa la cola del límite, más se pide esperar
+                retry = self.retry_after * math.ceil((depth + 1) / self.max_queue_depth)
+                raise SubmissionRejected("El juez está saturado, vuelve a intentarlo en unos segundos", retry)
+
+        if self.max_in_flight_per_user > 0:
+            cursor.execute("SELECT id_persona FROM PERSONA WHERE id_persona = %s FOR UPDATE", (id_persona,))
+            cursor.fetchall()
+            # Lectura con bloqueo: lee lo último confirmado, no la instantánea que la
+            # transacción tomó en su primera lectura (REPEATABLE READ). Si no, un envío
+            # que esperó el lock de PERSONA no vería la respuesta del envío anterior
+            cursor.execute(
+                "SELECT COUNT(*) AS en_curso FROM RESPUESTA WHERE id_persona = %s AND id_estado = %s FOR SHARE",
+                (id_persona, id_estado_pendiente)
+            )
+            en_curso = _first_value(cursor.fetchone())
+            if en_curso >= self.max_in_flight_per_user:
+                self._count('rejected_user_cap')
+                raise SubmissionRejected(
+                    f"Ya tienes {en_curso} respuestas en evaluación; espera su veredicto antes de enviar otra",
+                    self.retry_after)
+
+        with self._lock:
+            self._depth += 1
+            self._stats['admitted'] += 1
+
+    def _queue_depth(self, cursor, id_estado_pendiente):
+        with self._lock:
+            fresh = self._depth_checked is not None and time.monotonic() - self._depth_checked < self.depth_ttl
+            if fresh:
+                return self._depth
+        cursor.execute("SELECT COUNT(*) AS en_cola FROM RESPUESTA WHERE id_estado = %s", (id_estado_pendiente,))
+        depth = _first_value(cursor.fetchone())
+        with self._lock:
+            self._depth = depth
+            self._depth_checked = time.monotonic()
+            self._stats['depth_queries'] += 1
+        return depth
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                'queue_depth': self._depth,
+                'max_queue_depth': self.max_queue_depth,
+                'max_in_flight_per_user': self.max_in_flight_per_user,
+            }
+
+
+def _first_value(row):
+    # Los modelos usan cursores de tuplas o de diccionarios
+    if isinstance(row, dict):
+        return next(iter(row.values()))
+    return row[0]
+
+
+submission_scheduler = SubmissionScheduler()
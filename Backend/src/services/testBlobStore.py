@@ -0,0 +1,307 @@
+# Backend/src/services/testBlobStore.py
+import gzip
+import hashlib
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+
+# TEST_BLOB_STORAGE=1: las entradas/salidas de TEST de al menos TEST_BLOB_MIN_BYTES se
+# guardan como blobs comprimidos en disco en lugar de en la fila (ver schema.sql)
+TEST_BLOB_STORAGE = os.environ.get('TEST_BLOB_STORAGE', '0') in ('1', 'true', 'True')
+TEST_BLOB_MIN_BYTES = int(os.environ.get('TEST_BLOB_MIN_BYTES', 16 * 1024))
+# Directorio de los blobs: es la fuente de verdad de esos tests, no una caché. La API
+# y todos los jueces deben verlo (mismo host o volumen compartido)
+TEST_BLOB_DIR = os.environ.get('TEST_BLOB_DIR', os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data', 'test-blobs')))
+# Copias sin comprimir que el juez mapea en memoria (caché local, acotada)
+TEST_BLOB_CACHE_DIR = os.environ.get('TEST_BLOB_CACHE_DIR', os.path.join(TEST_BLOB_DIR, 'cache'))
+TEST_BLOB_CACHE_MAX_MB = int(os.environ.get('TEST_BLOB_CACHE_MAX_MB', 1024))
+
+_HASH = re.compile(r'^[0-9a-f]{64}$')
+_CHUNK = 256 * 1024
+
+
+class TestBlobStore:
+    """
+    Almacén direccionado por contenido de las entradas y salidas grandes de
+    los TEST: cada blob es <root>/<hash[:2]>/<hash>.gz, con hash = sha256
+    del contenido sin comprimir. Un mismo contenido se guarda una sola vez
+    (ej. la misma entrada en varios retos) y la fila de TEST guarda el hash.
+
+    - Se escribe en un temporal y se publica con un rename atómico: varios
+      procesos pueden escribir el mismo blob sin locks.
+    - El juez no descomprime en cada evaluación: open_mapped() descomprime
+      una vez a TEST_BLOB_CACHE_DIR y mapea el archivo en memoria. Las
+      páginas se comparten entre los procesos evaluadores y los trabajos
+      que viajan al pool sólo llevan el hash.
+    - La API lo sirve en streaming (iter_chunks o, si el cliente acepta
+      gzip, el archivo comprimido tal cual con open_compressed).
+    - La caché sin comprimir está acotada por bytes (LRU según el mtime,
+      como judge/artifacts.py); los blobs nunca se desalojan, sólo gc()
+      elimina los que ningún TEST referencia.
+    """
+
+    def __init__(self, root=TEST_BLOB_DIR, cache_dir=TEST_BLOB_CACHE_DIR, enabled=TEST_BLOB_STORAGE,
+                 min_bytes=TEST_BLOB_MIN_BYTES, cache_max_bytes=TEST_BLOB_CACHE_MAX_MB * 1024 * 1024):
+        self.root = root
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.min_bytes = min_bytes
+        self.cache_max_bytes = cache_max_bytes
+        self._lock = threading.Lock()
+        self._cache_size = None   # estimación local; se recalcula al desalojar
+        self._stats = {'puts': 0, 'dedup_hits': 0, 'bytes_in': 0, 'bytes_stored': 0,
+                       'mapped': 0, 'materialized': 0, 'cache_evictions': 0}
+
+    def _path(self, digest):
+        if not _HASH.match(digest or ''):
+            raise ValueError(f"Hash de blob inválido: {digest!r}")
+        return os.path.join(self.root, digest[:2], digest + '.gz')
+
+    def _cache_path(self, digest):
+        return os.path.join(self.cache_dir, digest[:2], digest)
+
+    # -----------------------------------------------------------------
+    # Escritura
+    # -----------------------------------------------------------------
+    def put(self, data):
+        """ Guarda `data` (str o bytes) y devuelve su hash. No reescribe un blob existente. """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        self._count('bytes_in', len(data))
+        if os.path.exists(path):
+            try:
+                # Reutilizarlo reinicia su periodo de gracia en gc(): la fila que lo
+                # va a referenciar puede no estar confirmada todavía
+                os.utime(path)
+            except FileNotFoundError:
+                # gc() lo eliminó justo ahora: se vuelve a escribir
+                return self.put(data)
+            self._count('dedup_hits')
+            return digest
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp, 'wb') as raw:
+                # mtime=0: el mismo contenido produce siempre el mismo archivo
+                with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6, mtime=0) as f:
+                    view = memoryview(data)
+                    for i in range(0, len(view), _CHUNK):
+                        f.write(view[i:i + _CHUNK])
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        self._count('puts')
+        self._count('bytes_stored', os.path.getsize(path))
+        return digest
+
+    def maybe_put(self, data, min_bytes=None):
+        """ Hash del blob si el almacenamiento está activo y `data` es grande; None si va en la fila. """
+        if not self.enabled or data is None:
+            return None
+        return self.put_if_large(data, self.min_bytes if min_bytes is None else min_bytes)
+
+    def put_if_large(self, data, min_bytes):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return self.put(data) if len(data) >= min_bytes else None
+
+    # -----------------------------------------------------------------
+    # Lectura
+    # -----------------------------------------------------------------
+    def exists(self, digest):
+        return os.path.exists(self._path(digest))
+
+    def size(self, digest):
+        """ Tamaño sin comprimir, del trailer gzip (ISIZE; exacto hasta 4 GB). """
+        with open(self._path(digest), 'rb') as f:
+            f.seek(-4, os.SEEK_END)
+            return struct.unpack('<I', f.read(4))[0]
+
+    def open_compressed(self, digest):
+        """ El archivo gzip tal cual (para enviarlo con Content-Encoding: gzip). """
+        return open(self._path(digest), 'rb')
+
+    def iter_chunks(self, digest, chunk_size=_CHUNK):
+        """ El contenido descomprimido en trozos, sin cargarlo entero. """
+        with gzip.open(self._path(digest), 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def read_text(self, digest):
+        with gzip.open(self._path(digest), 'rb') as f:
+            return f.read().decode('utf-8')
+
+    @contextmanager
+    def open_mapped(self, digest):
+        """
+        El contenido sin comprimir mapeado en memoria (objeto tipo bytes,
+        sólo lectura). Se cierra al salir del bloque.
+        """
+        path = self._cache_path(digest)
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            self._materialize(digest, path)
+            fd = os.open(path, os.O_RDONLY)
+        try:
+            os.utime(fd)
+        except OSError:
+            pass
+        try:
+            if os.fstat(fd).st_size == 0:
+                yield b''
+                return
+            mapped = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        self._count('mapped')
+        try:
+            yield mapped
+        finally:
+            try:
+                mapped.close()
+            except BufferError:
+                # Aún hay una vista exportada (ej. en un traceback): se libera al recolectarla
+                pass
+
+    def _materialize(self, digest, path):
+        """ Descomprime el blob a la caché local verificando su hash. """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        sha = hashlib.sha256()
+        try:
+            with open(tmp, 'wb') as out:
+                for chunk in self.iter_chunks(digest):
+                    sha.update(chunk)
+                    out.write(chunk)
+            if sha.hexdigest() != digest:
+                raise ValueError(f"El blob {digest} está corrupto (no coincide su hash)")
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+        added = os.path.getsize(path)
+        with self._lock:
+            self._stats['materialized'] += 1
+            if self._cache_size is not None:
+                self._cache_size += added
+            over = self._cache_size is None or self._cache_size > self.cache_max_bytes
+        if over:
+            self.evict_cache()
+
+    def evict_cache(self):
+        """ Elimina las copias sin comprimir menos usadas hasta caber en cache_max_bytes. """
+        entries, total = [], 0
+        for path in self._walk(self.cache_dir, suffix=''):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+        evicted = 0
+        if total > self.cache_max_bytes:
+            # Los procesos que ya lo tienen mapeado siguen leyéndolo: el archivo
+            # desaparece del disco cuando lo desmapean
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.cache_max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                evicted += 1
+
+        with self._lock:
+            self._cache_size = total
+            self._stats['cache_evictions'] += evicted
+        return evicted
+
+    # -----------------------------------------------------------------
+    # Mantenimiento
+    # -----------------------------------------------------------------
+    def gc(self, referenced, grace_seconds=3600):
+        """
+        Elimina los blobs cuyo hash no está en `referenced`. Los creados (o
+        reutilizados por put) hace menos de grace_seconds se conservan: pueden
+        pertenecer a una transacción que aún no se confirmó. Devuelve
+        (eliminados, bytes).
+        """
+        eliminados = liberados = 0
+        limite = time.time() - grace_seconds
+        for path in self._walk(self.root, suffix='.gz'):
+            digest = os.path.basename(path)[:-3]
+            if digest in referenced:
+                continue
+            try:
+                st = os.stat(path)
+                if st.st_mtime > limite:
+                    continue
+                os.remove(path)
+            except OSError:
+                continue
+            eliminados += 1
+            liberados += st.st_size
+            try:
+                os.remove(self._cache_path(digest))
+            except OSError:
+                pass
+        return eliminados, liberados
+
+    def _walk(self, root, suffix):
+        try:
+            shards = os.listdir(root)
+        except FileNotFoundError:
+            return
+        for shard in shards:
+            shard_path = os.path.join(root, shard)
+            if len(shard) != 2 or not os.path.isdir(shard_path):
+                continue
+            for name in os.listdir(shard_path):
+                if name.endswith('.tmp') or not name.endswith(suffix):
+                    continue
+                yield os.path.join(shard_path, name)
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                'enabled': self.enabled,
+                'min_bytes': self.min_bytes,
+                'root': self.root,
+                'cache_bytes': self._cache_size,
+                'cache_max_bytes': self.cache_max_bytes,
+            }
+
+
+test_blob_store = TestBlobStore()
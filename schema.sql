@@ -43,8 +43,11 @@ CREATE TABLE `PERSONA` (
   `num_retos_resueltos`   INT NULL DEFAULT 0,
   `puntaje_total`         INT NULL DEFAULT 0,
   `token_refresco`        VARCHAR(255) NULL,
+  `esta_activo`           BOOLEAN NOT NULL DEFAULT TRUE,
   `id_rol`                INT NOT NULL,
-  FOREIGN KEY (`id_rol`) REFERENCES `ROL` (`id_rol`)
+  FOREIGN KEY (`id_rol`) REFERENCES `ROL` (`id_rol`),
+  -- Ranking y paginación por cursor: (puntaje DESC, retos DESC, id ASC)
+  INDEX `idx_persona_ranking` (`esta_activo`, `puntaje_total` DESC, `num_retos_resueltos` DESC, `id_persona`)
 ) ENGINE=InnoDB;
 
 -- -----------------------------------------------------
@@ -82,7 +85,15 @@ CREATE TABLE `RETO` (
   `fecha_publicacion`      DATETIME NOT NULL,
   `limite_tiempo_segundos` INT NULL,
   `id_dificultad`          INT NOT NULL,
-  FOREIGN KEY (`id_dificultad`) REFERENCES `DIFICULTAD` (`id_dificultad`)
+  -- Se incrementa al modificar los TEST del reto (invalida la caché de tests del juez)
+  `version_tests`          INT NOT NULL DEFAULT 1,
+  -- Cómo compara el juez la salida: 'lineas', 'tokens' o 'decimal' (ver judge/comparator.py)
+  `modo_comparacion`       VARCHAR(20) NOT NULL DEFAULT 'lineas',
+  FOREIGN KEY (`id_dificultad`) REFERENCES `DIFICULTAD` (`id_dificultad`),
+  -- Listado de retos paginado por cursor (fecha_publicacion DESC, id_reto DESC)
+  INDEX `idx_reto_fecha` (`fecha_publicacion`, `id_reto`),
+  -- Mismo listado filtrado por dificultad
+  INDEX `idx_reto_dificultad_fecha` (`id_dificultad`, `fecha_publicacion`, `id_reto`)
 ) ENGINE=InnoDB;
 
 -- -----------------------------------------------------
@@ -104,7 +115,9 @@ CREATE TABLE `RETO_LENGUAJE` (
   `id_lenguaje` INT NOT NULL,
   PRIMARY KEY (`id_reto`, `id_lenguaje`),
   FOREIGN KEY (`id_reto`) REFERENCES `RETO` (`id_reto`),
-  FOREIGN KEY (`id_lenguaje`) REFERENCES `LENGUAJE` (`id_lenguaje`)
+  FOREIGN KEY (`id_lenguaje`) REFERENCES `LENGUAJE` (`id_lenguaje`),
+  -- Retos de un lenguaje (filtro del listado de retos)
+  INDEX `idx_reto_lenguaje_lenguaje` (`id_lenguaje`, `id_reto`)
 ) ENGINE=InnoDB;
 
 -- -----------------------------------------------------
@@ -113,8 +126,13 @@ CREATE TABLE `RETO_LENGUAJE` (
 DROP TABLE IF EXISTS `TEST`;
 CREATE TABLE `TEST` (
   `id_test` INT NOT NULL AUTO_INCREMENT,
-  `datos_entrada` TEXT NOT NULL,
-  `salida_esperada` TEXT NOT NULL,
+  -- MEDIUMTEXT (hasta 16 MB): los paquetes importados traen tests de varios MB.
+  -- Con TEST_BLOB_STORAGE=1 las entradas/salidas grandes van a un blob comprimido en
+  -- disco (src/services/testBlobStore.py): la columna queda NULL y hash_* guarda su sha256
+  `datos_entrada` MEDIUMTEXT NULL,
+  `salida_esperada` MEDIUMTEXT NULL,
+  `hash_entrada` CHAR(64) NULL,
+  `hash_salida` CHAR(64) NULL,
   `es_publico` BOOLEAN NOT NULL DEFAULT TRUE,
   `id_reto` INT NOT NULL,
   PRIMARY KEY (`id_test`),
@@ -138,18 +156,32 @@ DROP TABLE IF EXISTS `RESPUESTA`;
 CREATE TABLE `RESPUESTA` (
   `id_respuesta` INT NOT NULL AUTO_INCREMENT,
   `codigo_fuente` TEXT NOT NULL,
-  `fecha` DATETIME NOT NULL,
+  `fecha` DATETIME(3) NOT NULL,
   `puntaje` INT NOT NULL,
   `tiempo_ejecucion_ms` INT NULL,
   `id_persona` INT NOT NULL,
   `id_reto` INT NOT NULL,
   `id_lenguaje` INT NOT NULL,
   `id_estado` INT NOT NULL,
+  -- Cola del juez: quién evalúa la respuesta y hasta cuándo (lease)
+  `lease_owner` VARCHAR(64) NULL,
+  `lease_expira` DATETIME NULL,
+  `intentos` INT NOT NULL DEFAULT 0,
+  -- Motivo del estado 'Error del Juez' (la evaluación falló en todos sus intentos)
+  `motivo_error` VARCHAR(255) NULL,
+  -- Reenvíos idénticos: hash del código normalizado y versión de los tests con que se evaluó
+  `hash_codigo` CHAR(64) NULL,
+  `version_tests` INT NULL,
   PRIMARY KEY (`id_respuesta`),
   FOREIGN KEY (`id_persona`) REFERENCES `PERSONA` (`id_persona`),
   FOREIGN KEY (`id_reto`) REFERENCES `RETO` (`id_reto`),
   FOREIGN KEY (`id_lenguaje`) REFERENCES `LENGUAJE` (`id_lenguaje`),
-  FOREIGN KEY (`id_estado`) REFERENCES `ESTADO_RESPUESTA` (`id_estado`)
+  FOREIGN KEY (`id_estado`) REFERENCES `ESTADO_RESPUESTA` (`id_estado`),
+  INDEX `idx_respuesta_cola` (`id_estado`, `lease_expira`, `id_respuesta`),
+  INDEX `idx_respuesta_dedup` (`id_reto`, `id_lenguaje`, `hash_codigo`, `version_tests`),
+  -- Respuestas en evaluación por persona (límite del control de admisión) y
+  -- retos resueltos por persona (filtro 'resuelto' del listado de retos)
+  INDEX `idx_respuesta_persona_estado` (`id_persona`, `id_estado`, `id_reto`)
 ) ENGINE=InnoDB;
 
 -- -----------------------------------------------------
@@ -176,7 +208,9 @@ CREATE TABLE `PUBLICACION` (
   `fecha` DATETIME NOT NULL,
   `id_persona` INT NOT NULL,
   PRIMARY KEY (`id_publicacion`),
-  FOREIGN KEY (`id_persona`) REFERENCES `PERSONA` (`id_persona`)
+  FOREIGN KEY (`id_persona`) REFERENCES `PERSONA` (`id_persona`),
+  -- Feed paginado por cursor (fecha DESC, id_publicacion DESC)
+  INDEX `idx_publicacion_fecha` (`fecha`, `id_publicacion`)
 ) ENGINE=InnoDB;
 
 -- -----------------------------------------------------
@@ -193,7 +227,9 @@ CREATE TABLE `COMENTARIO` (
   PRIMARY KEY (`id_comentario`),
   FOREIGN KEY (`id_publicacion`) REFERENCES `PUBLICACION` (`id_publicacion`),
   FOREIGN KEY (`id_persona`) REFERENCES `PERSONA` (`id_persona`),
-  FOREIGN KEY (`id_comentario_padre`) REFERENCES `COMENTARIO` (`id_comentario`)
+  FOREIGN KEY (`id_comentario_padre`) REFERENCES `COMENTARIO` (`id_comentario`),
+  -- Comentarios de una publicación en orden, y su conteo para el feed
+  INDEX `idx_comentario_publicacion_fecha` (`id_publicacion`, `fecha`)
 ) ENGINE=InnoDB;
 
 -- -----------------------------------------------------
@@ -220,6 +256,22 @@ CREATE TABLE `REACCION` (
   FOREIGN KEY (`id_tipo_reaccion`) REFERENCES `TIPO_REACCION` (`id_tipo_reaccion`)
 ) ENGINE=InnoDB;
 
+-- -----------------------------------------------------
+-- Tabla `REACCION_CONTEO`
+-- Conteo de REACCION por publicación y tipo, para el feed. Se actualiza con
+-- escritura diferida (Backend/src/services/reactionCounters.py) y se
+-- reconcilia periódicamente con REACCION
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS `REACCION_CONTEO`;
+CREATE TABLE `REACCION_CONTEO` (
+  `id_publicacion` INT NOT NULL,
+  `id_tipo_reaccion` INT NOT NULL,
+  `conteo` INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (`id_publicacion`, `id_tipo_reaccion`),
+  FOREIGN KEY (`id_publicacion`) REFERENCES `PUBLICACION` (`id_publicacion`),
+  FOREIGN KEY (`id_tipo_reaccion`) REFERENCES `TIPO_REACCION` (`id_tipo_reaccion`)
+) ENGINE=InnoDB;
+
 -- Volver a habilitar la verificación de claves foráneas
 SET FOREIGN_KEY_CHECKS=1;
 
@@ -230,7 +282,7 @@ SET FOREIGN_KEY_CHECKS=1;
 INSERT INTO `ROL` (`nombre_rol`) VALUES ('Administrador'), ('Usuario'), ('Tutor');
 INSERT INTO `DIFICULTAD` (`nombre_dificultad`) VALUES ('Fácil'), ('Medio'), ('Difícil');
 INSERT INTO `LENGUAJE` (`nombre_lenguaje`, `version`) VALUES ('Python', '3.1X'), ('JavaScript', 'ES6'), ('Java', '11');
-INSERT INTO `ESTADO_RESPUESTA` (`nombre_estado`) VALUES ('Aceptado'), ('Rechazado'), ('Error de Compilación'), ('Límite de Tiempo Excedido');
+INSERT INTO `ESTADO_RESPUESTA` (`nombre_estado`) VALUES ('Aceptado'), ('Rechazado'), ('Error de Compilación'), ('Límite de Tiempo Excedido'), ('Pendiente'), ('Error del Juez');
 INSERT INTO `TIPO_REACCION` (`nombre_reaccion`) VALUES ('Like'), ('Me encanta'), ('Me asombra'), ('Me divierte');
 
 CREATE USER 'app_user'@'localhost' IDENTIFIED BY 'S@ntiagoñ2002';